@@ -7,10 +7,13 @@ from stable_baselines3.common.callbacks import BaseCallback
 import os
 from logger import setup_logger
 from config import RL_ALGORITHM
+from policy_inference import InferencePolicy
 import numpy as np
 
 logger = setup_logger()
 
+ALGORITHMS = {"DQN": DQN, "PPO": PPO, "SAC": SAC}
+
 class CustomCallback(BaseCallback):
     def __init__(self, verbose: int = 0):
         super().__init__(verbose)
@@ -54,11 +57,55 @@ class Agent:
     def __init__(self, env, model_path: str = "models/model_corridor_car1", learning_rate: float = 0.0003, gamma: float = 0.98, **kwargs):
         self.env = env
         self.model_path = model_path
-        algorithms = {"DQN": DQN, "PPO": PPO, "SAC": SAC}
         algo_kwargs = {"learning_rate": learning_rate, "gamma": gamma, "tensorboard_log": None}  # Disable TensorBoard
         if RL_ALGORITHM == "DQN":
             algo_kwargs.update(dict(buffer_size=200000, batch_size=64, exploration_fraction=0.4, target_update_interval=500))
-        self.model = algorithms[RL_ALGORITHM]("MlpPolicy", env, verbose=1, **algo_kwargs)
+        self.model = ALGORITHMS[RL_ALGORITHM]("MlpPolicy", env, verbose=1, **algo_kwargs)
+
+    @classmethod
+    def from_saved(cls, path: str, env, model_path: str = None):
+        """Agente a partir de um modelo salvo, sem construir antes um modelo novo só para descartá-lo.
+
+        Args:
+            path (str): Arquivo .zip do modelo.
+            env (CorridaEnv ou VecEnv): Ambiente para continuar o treino.
+            model_path (str): Caminho base para salvar (padrão: path sem .zip).
+        Returns:
+            Agent: Agente com o modelo carregado (treinável).
+        """
+        agent = cls.__new__(cls)
+        agent.env = env
+        agent.model_path = model_path or path.replace(".zip", "")
+        agent.model = ALGORITHMS[RL_ALGORITHM].load(path, env=env)
+        return agent
+
+    @classmethod
+    def for_inference(cls, path: str):
+        """Agente só de inferência: lê apenas os pesos da política do .zip.
+
+        Sem otimizador, replay buffer nem ambiente; predict e evaluate funcionam, train
+        e save não.
+
+        Args:
+            path (str): Arquivo .zip do modelo.
+        Returns:
+            Agent: Agente com model = InferencePolicy.
+        """
+        agent = cls.__new__(cls)
+        agent.env = None
+        agent.model_path = path.replace(".zip", "")
+        agent.model = InferencePolicy.load(path)
+        return agent
+
+    def export_policy(self, backend: str = None):
+        """Cópia só de inferência da política atual (o modelo segue treinável).
+
+        Args:
+            backend (str): "numpy", "torchscript" ou "torch" (padrão: POLICY_BACKEND).
+        Returns:
+            InferencePolicy: Política com predict e predict_batch.
+        """
+        return InferencePolicy.from_model(self.model, backend=backend)
 
     def train(self, total_timesteps: int = 100000, eval_interval: int = 5000):
         """Treina o agente por um número de passos, salvando checkpoints.
@@ -149,5 +196,4 @@ class Agent:
         Args:
             path (str): Caminho do modelo salvo.
         """
-        algorithms = {"DQN": DQN, "PPO": PPO, "SAC": SAC}
-        self.model = algorithms[RL_ALGORITHM].load(path, env=self.env)
+        self.model = ALGORITHMS[RL_ALGORITHM].load(path, env=self.env)
@@ -0,0 +1,103 @@
+"""Agregados incrementais do histórico de um agente (XP total, melhores tempos, checkpoints).
+
+GamificationSystem, Achievement, o ranking e a seleção de top agentes consultavam o
+historico inteiro a cada verificação (soma de xp_gained, any(...) sobre as entradas).
+AgentAggregates mantém esses valores atualizados em O(1) a cada entrada acrescentada
+(AgentInfo.add_history) e é salvo junto com o agente em "agregados", então as
+consultas não dependem do tamanho do histórico — nem do quanto ele foi truncado.
+"""
+import math
+
+
+def _number(value):
+    """value como float (aceita escalares NumPy), ou None se não for um número finito."""
+    if value is None or isinstance(value, (bool, str)):
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+class AgentAggregates:
+    """Totais e recordes do histórico de um agente.
+
+    Attributes:
+        total_xp (int): Soma de xp_gained de todas as entradas.
+        episodes (int): Entradas registradas.
+        best_time (float | None): Menor "tempo" registrado.
+        max_checkpoints (int): Maior número de checkpoints num episódio.
+        maps (dict): Mapa -> {"episodes", "best_score", "best_time", "max_checkpoints"}.
+    """
+    __slots__ = ("total_xp", "episodes", "best_time", "max_checkpoints", "maps")
+
+    def __init__(self, total_xp=0, episodes=0, best_time=None, max_checkpoints=0, maps=None):
+        self.total_xp = total_xp
+        self.episodes = episodes
+        self.best_time = best_time
+        self.max_checkpoints = max_checkpoints
+        self.maps = maps if maps is not None else {}
+
+    def add(self, entry):
+        """Incorpora uma entrada do historico (O(1)).
+
+        Args:
+            entry (dict): Entrada no formato do historico (xp_gained, tempo, checkpoints, mapa, score).
+        """
+        self.total_xp += int(entry.get("xp_gained", 0) or 0)
+        self.episodes += 1
+        tempo = _number(entry.get("tempo"))
+        checkpoints = int(entry.get("checkpoints") or 0)
+        score = _number(entry.get("score"))
+        if tempo is not None and (self.best_time is None or tempo < self.best_time):
+            self.best_time = tempo
+        self.max_checkpoints = max(self.max_checkpoints, checkpoints)
+        mapa = entry.get("mapa", entry.get("map"))
+        if mapa is None:
+            return
+        best = self.maps.get(mapa)
+        if best is None:
+            best = self.maps[mapa] = {"episodes": 0, "best_score": None, "best_time": None, "max_checkpoints": 0}
+        best["episodes"] += 1
+        if score is not None and (best["best_score"] is None or score > best["best_score"]):
+            best["best_score"] = score
+        if tempo is not None and (best["best_time"] is None or tempo < best["best_time"]):
+            best["best_time"] = tempo
+        best["max_checkpoints"] = max(best["max_checkpoints"], checkpoints)
+
+    def map_best(self, mapa):
+        """Recordes do mapa (dict vazio se o agente nunca correu nele)."""
+        return self.maps.get(mapa, {})
+
+    def to_dict(self):
+        return {
+            "total_xp": self.total_xp,
+            "episodes": self.episodes,
+            "best_time": self.best_time,
+            "max_checkpoints": self.max_checkpoints,
+            "maps": {mapa: dict(best) for mapa, best in self.maps.items()},
+        }
+
+    @staticmethod
+    def from_dict(d):
+        return AgentAggregates(
+            d.get("total_xp", 0), d.get("episodes", 0), d.get("best_time"), d.get("max_checkpoints", 0),
+            {mapa: dict(best) for mapa, best in d.get("maps", {}).items()},
+        )
+
+    @staticmethod
+    def from_history(historico):
+        """Recalcula os agregados a partir de um historico (migração de agentes antigos)."""
+        aggregates = AgentAggregates()
+        for entry in historico:
+            if isinstance(entry, dict):
+                aggregates.add(entry)
+        return aggregates
+
+
+def record_total_xp(record):
+    """XP total de um dict de agente, sem percorrer o historico quando já há agregados."""
+    if "agregados" in record:
+        return record["agregados"].get("total_xp", 0)
+    return sum(h.get("xp_gained", 0) for h in record.get("historico", []))
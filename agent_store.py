@@ -0,0 +1,178 @@
+"""Repositório de agentes em memória com escrita adiada (write-behind) do agents.json.
+
+load_agents/save_agents (interface_agents) passam por aqui: o arquivo é lido uma vez
+(e relido só se mudar no disco enquanto não há alterações pendentes), as leituras
+devolvem cópias dos registros em memória e as gravações só marcam o repositório como
+sujo. A escrita no disco acontece em lote, de forma atômica (arquivo temporário +
+rename), quando o número de alterações pendentes chega a AGENT_FLUSH_DIRTY, depois de
+AGENT_FLUSH_SECONDS (timer) ou ao chamar flush_agents / encerrar o processo.
+"""
+import atexit
+import copy
+import json
+import os
+import tempfile
+import threading
+import config
+from config import AGENT_FLUSH_SECONDS, AGENT_FLUSH_DIRTY
+from logger import setup_logger
+
+logger = setup_logger()
+
+
+class AgentStore:
+    """Registros de agentes (dicts de AgentInfo.to_dict) de um arquivo JSON.
+
+    Args:
+        filename (str): Arquivo JSON dos agentes.
+        flush_interval (float): Segundos até gravar alterações pendentes (None desliga o timer).
+        dirty_threshold (int): Grava assim que houver este número de alterações pendentes.
+
+    Attributes:
+        path (str): Caminho absoluto do arquivo.
+        dirty (int): Alterações ainda não gravadas.
+        flushes (int): Gravações feitas no disco.
+    """
+    def __init__(self, filename="agents.json", flush_interval=AGENT_FLUSH_SECONDS, dirty_threshold=AGENT_FLUSH_DIRTY):
+        self.path = os.path.abspath(filename)
+        self.flush_interval = flush_interval
+        self.dirty_threshold = dirty_threshold
+        self.dirty = 0
+        self.flushes = 0
+        self._records = None
+        self._stamp = None
+        self._timer = None
+        self._lock = threading.RLock()
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _records_current(self):
+        """Registros em memória, relendo o arquivo se ele mudou e não há alterações pendentes."""
+        stamp = self._file_stamp()
+        if self._records is None or (not self.dirty and stamp != self._stamp):
+            if stamp is None:
+                self._records = []
+            else:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._records = json.load(f)
+            self._stamp = stamp
+        return self._records
+
+    def load(self):
+        """Cópia da lista de agentes (mesma semântica de load_agents).
+
+        Returns:
+            list: Dicts dos agentes; alterá-los não afeta o repositório.
+        """
+        with self._lock:
+            return copy.deepcopy(self._records_current())
+
+    def find(self, nome):
+        """Cópia do registro do agente nome, ou None."""
+        with self._lock:
+            record = next((a for a in self._records_current() if a.get("nome") == nome), None)
+            return copy.deepcopy(record)
+
+    def save(self, agents):
+        """Substitui todos os agentes (mesma semântica de save_agents, com escrita adiada).
+
+        Args:
+            agents (list): Dicts dos agentes.
+        """
+        with self._lock:
+            self._records_current()
+            self._records = copy.deepcopy(list(agents))
+            self._mark_dirty()
+
+    def update(self, record):
+        """Atualiza (ou acrescenta) um agente pelo nome, preservando campos não informados.
+
+        Args:
+            record (dict): Campos do agente; precisa de "nome".
+        """
+        with self._lock:
+            records = self._records_current()
+            current = next((a for a in records if a.get("nome") == record["nome"]), None)
+            if current is None:
+                records.append(copy.deepcopy(record))
+            else:
+                current.update(copy.deepcopy(record))
+            self._mark_dirty()
+
+    def _mark_dirty(self):
+        self.dirty += 1
+        if self.dirty >= self.dirty_threshold:
+            self.flush()
+        elif self._timer is None and self.flush_interval is not None:
+            self._timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        except OSError as e:
+            logger.warning(f"[AgentStore] Falha ao gravar {self.path}: {e}")
+
+    def flush(self):
+        """Grava as alterações pendentes no arquivo (temporário + rename, atômico)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self.dirty:
+                return
+            directory = os.path.dirname(self.path)
+            fd, tmp = tempfile.mkstemp(prefix=".agents_", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(self._records, f, ensure_ascii=False, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.path)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+            self._stamp = self._file_stamp()
+            self.dirty = 0
+            self.flushes += 1
+
+
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_agent_store(filename="agents.json"):
+    """AgentStore compartilhado do arquivo (um por caminho absoluto).
+
+    Com STORAGE_BACKEND = "sqlite" devolve o repositório do banco (filename é ignorado).
+    """
+    if config.STORAGE_BACKEND == "sqlite":
+        from corrida_db import SQLiteAgentStore, get_database
+        return SQLiteAgentStore(get_database())
+    path = os.path.abspath(filename)
+    with _STORES_LOCK:
+        store = _STORES.get(path)
+        if store is None:
+            store = _STORES[path] = AgentStore(path)
+        return store
+
+
+def flush_agents():
+    """Grava as alterações pendentes de todos os repositórios."""
+    with _STORES_LOCK:
+        stores = list(_STORES.values())
+    for store in stores:
+        try:
+            store.flush()
+        except OSError as e:
+            logger.warning(f"[AgentStore] Falha ao gravar {store.path}: {e}")
+
+
+atexit.register(flush_agents)
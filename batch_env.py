@@ -0,0 +1,420 @@
+"""Ambiente de corrida vetorizado (struct-of-arrays) para muitos carros em paralelo.
+
+Define BatchCorridaEnv, que simula N carros do CorridaEnv em arrays NumPy e avança
+todos em uma única chamada de step, expondo a API nativa de VecEnv do Stable-Baselines3.
+"""
+import logging
+import numpy as np
+from stable_baselines3.common.vec_env.base_vec_env import VecEnv
+from config import ENV_SCALE, TIME_STEP, RANDOMIZE_START, OBS_NOISE_STD, MAX_STEPS, MAX_EPISODE_TIME, REWARD_TRACE
+from environment import CorridaEnv, default_reward_config
+from core.reward_shaper import RewardShapeFactory
+from loop_detector import BatchLoopDetector
+from lidar import lidar_readings
+from logger import setup_logger, log_rate_limited
+
+logger = setup_logger()
+
+DEFAULT_CAR_STATS = {"accel": 0.5, "turn_speed": 5.0, "max_speed": 20.0}
+FRICTION = 0.98
+HISTORY_LEN = 20  # Mesmo limite de position_history do CorridaEnv
+
+
+class _BatchEnvView:
+    """Visão de um único carro do BatchCorridaEnv com a interface do CorridaEnv.
+
+    Permite que código que espera `vec_env.envs[idx]` (desenho do grid, reset manual)
+    funcione sem alterações.
+    """
+    def __init__(self, batch, idx):
+        self._batch = batch
+        self._idx = idx
+
+    @property
+    def car1_pos(self):
+        return self._batch.car1_pos[self._idx]
+
+    @property
+    def car1_speed(self):
+        return float(self._batch.car1_speed[self._idx])
+
+    @property
+    def car1_angle(self):
+        return float(self._batch.car1_angle[self._idx])
+
+    @property
+    def checkpoint_index(self):
+        return int(self._batch.checkpoint_index[self._idx])
+
+    @property
+    def checkpoints(self):
+        return [tuple(cp) for cp in self._batch.checkpoints[self._idx]]
+
+    @property
+    def current_step(self):
+        return int(self._batch.current_step[self._idx])
+
+    @property
+    def episode_time(self):
+        return float(self._batch.episode_time[self._idx])
+
+    @property
+    def progress_counter(self):
+        return int(self._batch.progress_counter[self._idx])
+
+    @property
+    def car_stats(self):
+        return self._batch.car_stats[self._idx]
+
+    def reset(self, **kwargs):
+        """Reseta apenas este carro.
+
+        Returns:
+            tuple: (obs, info) como em CorridaEnv.reset.
+        """
+        self._batch._reset_indices(np.array([self._idx]))
+        return self._batch._obs[self._idx].copy(), {}
+
+    def close(self):
+        pass
+
+    def __getattr__(self, name):
+        # Geometria do mapa (width, barriers, corridor_rect, ...) é compartilhada
+        return getattr(self._batch.track, name)
+
+
+class BatchCorridaEnv(VecEnv):
+    """N carros do CorridaEnv simulados em arrays NumPy (struct-of-arrays).
+
+    Mantém a física, as condições de término e as chaves de `info` do CorridaEnv,
+    mas avança todos os carros em um único `step(actions)`. Implementa a API de
+    VecEnv do Stable-Baselines3, incluindo reset automático dos carros que terminaram
+    (com `terminal_observation` em `info`).
+
+    Args:
+        n_envs (int): Número de carros/ambientes.
+        map_type (str): Tipo de mapa ('corridor', 'curve' ou 'circle').
+        car_stats (dict ou list): Stats únicos ou lista com stats por carro.
+        reward_shaper_type (str): Tipo de RewardShaper.
+        reward_config (dict): Configuração customizada do RewardShaper.
+        lidar_mode (str): 'march' ou 'exact' (ver CorridaEnv). Se None, usa LIDAR_MODE do config.
+        use_raster (bool): Usa o raster pré-computado do mapa (ver CorridaEnv). Se None, usa TRACK_RASTER do config.
+        reward_trace (bool): Devolve info["reward_components"] ao fim de cada episódio (ver CorridaEnv).
+            Se None, usa REWARD_TRACE do config.
+    """
+    def __init__(self, n_envs, map_type="corridor", car_stats=None, reward_shaper_type='balanced', reward_config=None, lidar_mode=None,
+                 use_raster=None, reward_trace=None):
+        # Ambiente de referência: geometria do mapa, checkpoints e espaços
+        self.track = CorridaEnv(map_type=map_type, reward_shaper_type=reward_shaper_type, reward_config=reward_config,
+                                lidar_mode=lidar_mode, use_raster=use_raster)
+        self.envs = [_BatchEnvView(self, i) for i in range(n_envs)]
+        super().__init__(n_envs, self.track.observation_space, self.track.action_space)
+        n = n_envs
+        self.map_type = map_type
+        self.width = self.track.width
+        self.height = self.track.height
+        self.width_norm = self.track.width_norm
+        self.height_norm = self.track.height_norm
+        self.n_lidar = self.track.n_lidar
+        self.lidar_mode = self.track.lidar_mode
+        self.max_steps = MAX_STEPS
+        self.max_steps_without_progress = self.track.max_steps_without_progress
+        self.min_progress_distance = self.track.min_progress_distance
+        self.randomize_checkpoint = False
+        self._rng = np.random.default_rng()
+
+        # Stats por carro
+        if car_stats is None or isinstance(car_stats, dict):
+            car_stats = [car_stats] * n
+        self.car_stats = [stats if stats else dict(DEFAULT_CAR_STATS) for stats in car_stats]
+        self.ACCEL_FORCE = np.array([s["accel"] for s in self.car_stats], dtype=np.float64)
+        self.TURN_SPEED = np.array([s["turn_speed"] for s in self.car_stats], dtype=np.float64)
+        self.MAX_SPEED = np.array([s["max_speed"] for s in self.car_stats], dtype=np.float64)
+
+        # Estado dos carros (struct-of-arrays)
+        self.car1_pos = np.zeros((n, 2), dtype=np.float64)
+        self.car1_speed = np.zeros(n, dtype=np.float64)
+        self.car1_angle = np.zeros(n, dtype=np.float64)
+        self.checkpoint_index = np.zeros(n, dtype=np.int64)
+        self.current_step = np.zeros(n, dtype=np.int64)
+        self.episode_time = np.zeros(n, dtype=np.float64)
+        self.progress_counter = np.zeros(n, dtype=np.int64)
+        self.prev_dist_to_checkpoint = np.full(n, np.nan)
+        self.last_velocity = np.zeros(n, dtype=np.float64)
+        n_checkpoints = len(self.track.setup_checkpoints(map_type))
+        self.checkpoints = np.zeros((n, n_checkpoints, 2), dtype=np.float64)
+        self.position_history = np.zeros((n, HISTORY_LEN, 2), dtype=np.float64)
+        self.history_len = np.zeros(n, dtype=np.int64)
+
+        config = reward_config or default_reward_config(reward_shaper_type)
+        # Um shaper com estado por carro (last_checkpoints em array) para o lote inteiro
+        self.reward_shaper = RewardShapeFactory.create_batch(reward_shaper_type, n, **config)
+        # Contadores por componente: nome -> array [n] do episódio atual (None = rastreio desligado)
+        self.reward_trace = {} if (REWARD_TRACE if reward_trace is None else reward_trace) else None
+        # Um detector para todos os carros; a decisão de cada carro só muda quando o histórico dele muda
+        self.loop_detector = BatchLoopDetector(history_size=100, threshold=0.7)
+        self.loop_flags = np.zeros(n, dtype=bool)
+
+        self._obs = np.zeros((n, self.observation_space.shape[0]), dtype=np.float32)
+        self._actions = np.zeros(n, dtype=np.int64)
+
+    # ===== API VecEnv =====
+    def reset(self):
+        """Reseta todos os carros.
+
+        Returns:
+            np.ndarray: Observações [n_envs, obs_dim].
+        """
+        if self._seeds[0] is not None:
+            self._rng = np.random.default_rng(self._seeds[0])
+        self._reset_seeds()
+        self._reset_options()
+        self._reset_indices(np.arange(self.num_envs))
+        return self._obs.copy()
+
+    def step_async(self, actions):
+        self._actions = np.asarray(actions).reshape(self.num_envs).astype(np.int64)
+
+    def step_wait(self):
+        """Avança todos os carros um passo.
+
+        Returns:
+            tuple: (obs, rewards, dones, infos) no formato VecEnv.
+        """
+        actions = self._actions
+        n = self.num_envs
+        self.current_step += 1
+        self.episode_time += TIME_STEP
+
+        # ===== FÍSICA DO CARRO =====
+        speed = self.car1_speed * FRICTION
+        speed += np.where(actions == 0, self.ACCEL_FORCE, 0.0)
+        speed -= np.where(actions == 1, self.ACCEL_FORCE, 0.0)
+        self.car1_speed = np.maximum(-self.MAX_SPEED, np.minimum(speed, self.MAX_SPEED))
+
+        turn = np.where(actions == 2, -self.TURN_SPEED, np.where(actions == 3, self.TURN_SPEED, 0.0))
+        turning = turn != 0.0
+        self.car1_angle[turning] = (self.car1_angle[turning] + turn[turning]) % 360
+
+        moving = np.abs(self.car1_speed) > 0.01
+        rad = np.radians(self.car1_angle)
+        self.car1_pos[:, 0] += np.where(moving, self.car1_speed * np.cos(rad), 0.0)
+        self.car1_pos[:, 1] += np.where(moving, self.car1_speed * np.sin(rad), 0.0)
+
+        # ===== CHECKPOINTS E PROGRESSO =====
+        dones = np.zeros(n, dtype=bool)
+        success = np.zeros(n, dtype=bool)
+        inside_corridor = self.track.is_on_corridor_batch(self.car1_pos[:, 0], self.car1_pos[:, 1])
+        collision = ~inside_corridor
+        progress = np.zeros(n, dtype=np.float64)
+        n_checkpoints = self.checkpoints.shape[1]
+        active = self.checkpoint_index < n_checkpoints
+        if n_checkpoints and active.any():
+            cp_idx = np.minimum(self.checkpoint_index, n_checkpoints - 1)
+            checkpoint = self.checkpoints[np.arange(n), cp_idx]
+            dist = np.sqrt(((self.car1_pos - checkpoint) ** 2).sum(axis=1))
+            has_prev = active & ~np.isnan(self.prev_dist_to_checkpoint)
+            progress[has_prev] = (self.prev_dist_to_checkpoint[has_prev] - dist[has_prev]) / 100.0
+            self.prev_dist_to_checkpoint[active] = dist[active]
+
+            reached = active & (dist < 30 * ENV_SCALE)
+            for i in np.flatnonzero(reached):
+                log_rate_limited(logger, logging.INFO, "checkpoint", "[CHECKPOINT] Agente atingiu checkpoint %d/%d em dist=%.2f",
+                                 self.checkpoint_index[i] + 1, n_checkpoints, dist[i])
+            success |= reached
+            self.checkpoint_index += reached
+            finished = reached & (self.checkpoint_index >= n_checkpoints)
+            for _ in np.flatnonzero(finished):
+                log_rate_limited(logger, logging.INFO, "sucesso", "[SUCESSO] Todos os %d checkpoints alcançados!", n_checkpoints)
+            dones |= finished
+
+        # ===== RECOMPENSAS (RewardShaper em lote) =====
+        compute_reward_batch = (self.reward_shaper.compute_reward_batch if self.reward_trace is None
+                                else self._compute_reward_traced)
+        rewards = compute_reward_batch(
+            positions=self.car1_pos,
+            velocities=self.car1_speed,
+            angles=self.car1_angle,
+            checkpoint_idx=self.checkpoint_index,
+            total_checkpoints=n_checkpoints,
+            collisions=collision,
+            out_of_bounds=collision,
+            progress=progress,
+            last_velocities=self.last_velocity
+        )
+        self.last_velocity[:] = self.car1_speed
+
+        rewards[collision] -= 50.0
+        dones |= collision
+        if self.reward_trace is not None:
+            self._add_trace('off_track', collision, -50.0)
+        collisions = collision.astype(np.int64)
+
+        # ===== DETECÇÃO DE LOOP/INATIVIDADE =====
+        sample = self.current_step % 10 == 0
+        if sample.any():
+            self._push_history(np.flatnonzero(sample))
+
+        loop = self.loop_flags.copy()
+        self.progress_counter[loop] += 2
+        rewards[loop] -= 5.0
+        if self.reward_trace is not None:
+            self._add_trace('loop', loop, -5.0)
+
+        check_idle = ~loop & (self.history_len >= 2)
+        if check_idle.any():
+            steps = np.linalg.norm(np.diff(self.position_history, axis=1), axis=2)
+            valid = np.arange(1, HISTORY_LEN)[None, :] < self.history_len[:, None]
+            total_distance = (steps * valid).sum(axis=1)
+            idle = check_idle & (total_distance < self.min_progress_distance)
+            self.progress_counter[idle] += 1
+            rewards[idle] -= 0.2
+            if self.reward_trace is not None:
+                self._add_trace('idle', idle, -0.2)
+            self.progress_counter[check_idle & ~idle] = 0
+
+        stuck = self.progress_counter > self.max_steps_without_progress
+        rewards[stuck] -= 10.0
+        dones |= stuck
+        if self.reward_trace is not None:
+            self._add_trace('stall', stuck, -10.0)
+
+        # ===== LIMITE DE TEMPO =====
+        dones |= (self.episode_time >= MAX_EPISODE_TIME) | (self.current_step >= self.max_steps)
+
+        # ===== RETORNO =====
+        self._compute_obs(np.arange(n))
+        infos = [
+            {
+                "collisions": int(collisions[i]),
+                "episode_time": float(self.episode_time[i]),
+                "checkpoint": int(self.checkpoint_index[i]),
+                "success": bool(success[i]),
+                "progress": int(self.progress_counter[i]),
+                "TimeLimit.truncated": False,
+            }
+            for i in range(n)
+        ]
+        done_idx = np.flatnonzero(dones)
+        for i in done_idx:
+            infos[i]["terminal_observation"] = self._obs[i].copy()
+            if self.reward_trace is not None:
+                infos[i]["reward_components"] = {name: float(value[i]) for name, value in self.reward_trace.items()}
+        if len(done_idx):
+            self._reset_indices(done_idx)
+        return self._obs.copy(), rewards.astype(np.float32), dones, infos
+
+    def _compute_reward_traced(self, **kwargs):
+        """compute_reward_batch via reward_components_batch, somando cada termo em reward_trace."""
+        rewards = np.zeros(self.num_envs, dtype=np.float64)
+        for name, value in self.reward_shaper.reward_components_batch(**kwargs).items():
+            rewards += value
+            self._add_trace(name, slice(None), value)
+        return rewards
+
+    def _add_trace(self, name, mask, value):
+        """Acumula value nos carros selecionados por mask no contador do componente name."""
+        trace = self.reward_trace.get(name)
+        if trace is None:
+            trace = self.reward_trace[name] = np.zeros(self.num_envs, dtype=np.float64)
+        trace[mask] += value
+
+    def close(self):
+        pass
+
+    def get_attr(self, attr_name, indices=None):
+        # Mesma regra de set_attr: arrays por carro e atributos do lote têm prioridade sobre as visões
+        per_env = self.__dict__.get(attr_name)
+        if isinstance(per_env, np.ndarray):
+            if per_env.shape == (self.num_envs,):
+                return [per_env[i].item() for i in self._get_indices(indices)]
+        elif attr_name in self.__dict__ and not isinstance(per_env, list):
+            return [per_env for _ in self._get_indices(indices)]
+        return [getattr(self.envs[i], attr_name) for i in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        per_env = getattr(self, attr_name, None)
+        if isinstance(per_env, np.ndarray) and per_env.shape[:1] == (self.num_envs,):
+            for i in self._get_indices(indices):
+                per_env[i] = value
+        else:
+            setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        return [getattr(self.envs[i], method_name)(*method_args, **method_kwargs) for i in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
+
+    # ===== Internos =====
+    def _reset_indices(self, idx):
+        """Reseta os carros nos índices dados (posição, checkpoints e contadores)."""
+        idx = np.asarray(idx, dtype=np.int64)
+        if len(idx) == 0:
+            return
+        pending = idx
+        tentativas = 0
+        while True:
+            m = len(pending)
+            if RANDOMIZE_START:
+                self.car1_pos[pending, 0] = 150 * ENV_SCALE + self._rng.uniform(-20, 20, size=m) * ENV_SCALE
+                self.car1_pos[pending, 1] = 300 * ENV_SCALE + self._rng.uniform(-20, 20, size=m) * ENV_SCALE
+                self.car1_angle[pending] = self._rng.uniform(-10, 10, size=m)
+            else:
+                self.car1_pos[pending] = (150 * ENV_SCALE, 300 * ENV_SCALE)
+                self.car1_angle[pending] = 0
+            valid = self.track.is_on_corridor_batch(self.car1_pos[pending, 0], self.car1_pos[pending, 1])
+            pending = pending[~valid]
+            if len(pending) == 0:
+                break
+            tentativas += 1
+            if tentativas > 10:
+                raise Exception(f"Não foi possível inicializar o carro em posição válida após {tentativas} tentativas!")
+        self.car1_speed[idx] = 1.0
+        for i in idx:
+            if self.checkpoints.shape[1]:
+                self.checkpoints[i] = self.track.setup_checkpoints(self.map_type, self.randomize_checkpoint)
+        self.reward_shaper.reset_batch(self.num_envs, idx)
+        if self.reward_trace is not None:
+            for trace in self.reward_trace.values():
+                trace[idx] = 0.0
+        self.checkpoint_index[idx] = 0
+        self.current_step[idx] = 0
+        self.episode_time[idx] = 0.0
+        self.prev_dist_to_checkpoint[idx] = np.nan
+        self.progress_counter[idx] = 0
+        self.last_velocity[idx] = 0.0
+        self.history_len[idx] = 0
+        self.loop_flags[idx] = False
+        self._compute_obs(idx)
+
+    def _push_history(self, idx):
+        """Adiciona a posição atual ao histórico (máx. HISTORY_LEN) e reavalia a detecção de loop."""
+        full = idx[self.history_len[idx] >= HISTORY_LEN]
+        if len(full):
+            self.position_history[full, :-1] = self.position_history[full, 1:]
+            self.history_len[full] -= 1
+        self.position_history[idx, self.history_len[idx]] = self.car1_pos[idx]
+        self.history_len[idx] += 1
+        self.loop_flags[idx] = self.loop_detector.detect(self.position_history[idx], self.history_len[idx])
+
+    def _compute_obs(self, idx):
+        """Escreve as observações dos carros em idx no buffer interno."""
+        n_checkpoints = self.checkpoints.shape[1]
+        obs = self._obs
+        if n_checkpoints:
+            cp = self.checkpoints[idx, np.minimum(self.checkpoint_index[idx], n_checkpoints - 1)]
+        else:
+            cp = np.zeros((len(idx), 2))
+        rad = np.radians(self.car1_angle[idx])
+        obs[idx, 0] = self.car1_pos[idx, 0] * self.width_norm
+        obs[idx, 1] = self.car1_pos[idx, 1] * self.height_norm
+        obs[idx, 2] = self.car1_speed[idx] / 2.0
+        obs[idx, 3] = np.sin(rad)
+        obs[idx, 4] = np.cos(rad)
+        obs[idx, 5] = cp[:, 0] * self.width_norm
+        obs[idx, 6] = cp[:, 1] * self.height_norm
+        obs[idx, 7:] = lidar_readings(self.track, self.car1_pos[idx, 0], self.car1_pos[idx, 1], self.car1_angle[idx],
+                                      mode=self.lidar_mode, n_lidar=self.n_lidar)
+        if OBS_NOISE_STD > 0:
+            obs[idx] += self._rng.normal(0, OBS_NOISE_STD, size=(len(idx), obs.shape[1]))
@@ -0,0 +1,119 @@
+"""Benchmark do Lidar: amostragem original (march) vs ray casting analítico (exact).
+
+Mede o custo por step do CorridaEnv em cada modo, o custo do Lidar vetorizado
+para um lote de carros e o erro de cada modo contra uma referência densa.
+
+Uso:
+    python benchmarks/bench_lidar.py [--cars 64] [--steps 300]
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from environment import CorridaEnv
+from lidar import lidar_angles, lidar_max_dist, march_readings, exact_readings
+
+MAPS = ["corridor", "curve", "circle"]
+
+
+def reference_readings(track, xs, ys, angles, n_samples=20000):
+    """Leituras de referência por amostragem muito densa (passo de ~0.005 px)."""
+    max_dist = lidar_max_dist()
+    samples = np.linspace(0, max_dist, num=n_samples)
+    readings = np.ones(angles.shape)
+    rad = np.radians(angles)
+    for i in range(len(xs)):
+        for k in range(angles.shape[1]):
+            px = xs[i] + samples * np.cos(rad[i, k])
+            py = ys[i] + samples * np.sin(rad[i, k])
+            blocked = ~track.is_on_corridor_batch(px, py)
+            if blocked.any():
+                readings[i, k] = samples[blocked.argmax()] / max_dist
+    return readings
+
+
+def random_poses(track, n, rng):
+    """Sorteia n posições dentro da pista e ângulos aleatórios."""
+    xs, ys = [], []
+    while len(xs) < n:
+        x = rng.uniform(0, track.width)
+        y = rng.uniform(0, track.height)
+        if track.is_on_corridor([x, y]):
+            xs.append(x)
+            ys.append(y)
+    return np.array(xs), np.array(ys), rng.uniform(0, 360, size=n)
+
+
+def time_lidar(map_type, lidar_mode, steps, rng):
+    """Tempo médio (s) de CorridaEnv.get_lidar_readings (um carro) com o modo dado."""
+    env = CorridaEnv(map_type=map_type, lidar_mode=lidar_mode)
+    xs, ys, angles = random_poses(env, steps, rng)
+    start = time.perf_counter()
+    for i in range(steps):
+        env.car1_pos = [xs[i], ys[i]]
+        env.car1_angle = angles[i]
+        env.get_lidar_readings()
+    return (time.perf_counter() - start) / steps
+
+
+def time_env_steps(map_type, lidar_mode, steps, rng):
+    """Tempo médio (s) de CorridaEnv.step com o modo de Lidar dado."""
+    env = CorridaEnv(map_type=map_type, lidar_mode=lidar_mode)
+    while True:
+        try:
+            env.reset()
+            break
+        except Exception:
+            continue  # Largada aleatória do mapa circular pode cair fora da pista
+    xs, ys, angles = random_poses(env, steps, rng)
+    total = 0.0
+    for i in range(steps):
+        env.car1_pos = [xs[i], ys[i]]
+        env.car1_angle = angles[i]
+        env.car1_speed = 0.0
+        start = time.perf_counter()
+        env.step(4)  # Ação sem aceleração/virada: isola física + sensores
+        total += time.perf_counter() - start
+    return total / steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do Lidar")
+    parser.add_argument("--cars", type=int, default=64, help="Carros no lote vetorizado")
+    parser.add_argument("--steps", type=int, default=300, help="Steps cronometrados por mapa")
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    print(f"{'mapa':<10}{'lidar march':>13}{'lidar exact':>13}{'step march':>12}{'step exact':>12}{'speedup':>9}"
+          f"{'lote march':>12}{'lote exact':>12}{'erro march':>12}{'erro exact':>12}")
+    for map_type in MAPS:
+        lidar_march = time_lidar(map_type, "march", args.steps, rng)
+        lidar_exact = time_lidar(map_type, "exact", args.steps, rng)
+        step_march = time_env_steps(map_type, "march", args.steps, rng)
+        step_exact = time_env_steps(map_type, "exact", args.steps, rng)
+
+        track = CorridaEnv(map_type=map_type)
+        xs, ys, car_angles = random_poses(track, args.cars, rng)
+        angles = lidar_angles(car_angles)
+        start = time.perf_counter()
+        for _ in range(20):
+            march = march_readings(track, xs, ys, angles)
+        batch_march = (time.perf_counter() - start) / 20
+        start = time.perf_counter()
+        for _ in range(20):
+            exact = exact_readings(track, xs, ys, angles)
+        batch_exact = (time.perf_counter() - start) / 20
+
+        ref = reference_readings(track, xs[:16], ys[:16], angles[:16])
+        err_march = np.abs(march[:16] - ref).mean() * lidar_max_dist()
+        err_exact = np.abs(exact[:16] - ref).mean() * lidar_max_dist()
+        print(f"{map_type:<10}{lidar_march*1e6:>11.1f}us{lidar_exact*1e6:>11.1f}us{step_march*1e6:>10.1f}us{step_exact*1e6:>10.1f}us{step_march/step_exact:>8.1f}x"
+              f"{batch_march*1e6:>10.1f}us{batch_exact*1e6:>10.1f}us{err_march:>10.2f}px{err_exact:>10.3f}px")
+
+
+if __name__ == "__main__":
+    main()
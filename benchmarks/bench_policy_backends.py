@@ -0,0 +1,56 @@
+"""Benchmark da latência por chamada das políticas de inferência.
+
+Compara, para lotes de 1, 8 e 128 observações, o model.predict do SB3 com o
+InferencePolicy.predict_batch em cada backend ("torch", "torchscript", "numpy").
+
+Uso:
+    python benchmarks/bench_policy_backends.py [--batch 1 8 128] [--calls 2000] [--algorithm DQN]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stable_baselines3 import DQN, PPO
+from environment import CorridaEnv
+from policy_inference import InferencePolicy, BACKENDS
+
+
+def time_call(fn, observations, calls):
+    fn(observations)  # Aquecimento
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn(observations)
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 8, 128])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--algorithm", choices=["DQN", "PPO"], default="DQN")
+    args = parser.parse_args()
+
+    env = CorridaEnv(map_type="corridor")
+    algorithm = {"DQN": DQN, "PPO": PPO}[args.algorithm]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "modelo.zip")
+        model = algorithm("MlpPolicy", env, seed=0, verbose=0)
+        model.save(path)
+        policies = {backend: InferencePolicy.load(path, backend=backend) for backend in BACKENDS}
+
+    columns = ["sb3"] + list(BACKENDS)
+    print(f"{'lote':>5} " + " ".join(f"{c + ' (us)':>16}" for c in columns))
+    for size in args.batch:
+        obs = np.stack([env.observation_space.sample() for _ in range(size)]).astype(np.float32)
+        times = [time_call(lambda o: model.predict(o, deterministic=True), obs, args.calls)]
+        times += [time_call(policies[b].predict_batch, obs, args.calls) for b in BACKENDS]
+        print(f"{size:>5} " + " ".join(f"{t * 1e6:>16.1f}" for t in times))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark da inferência do RaceManager: predict por raia vs lote por modelo.
+
+Mede a latência de um tick (ações de todas as raias) com o laço antigo, um predict
+com np.array([obs]) por raia, e com RaceManager.get_actions, um predict em lote por
+modelo distinto.
+
+Uso:
+    python benchmarks/bench_race_inference.py [--lanes 8 32 128] [--models 2] [--ticks 200]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stable_baselines3 import DQN
+from environment import CorridaEnv
+from interface_agents import AgentInfo
+from main import RaceManager
+
+
+def per_lane_actions(manager, observations, deterministic):
+    """Laço original: um forward por raia."""
+    actions = []
+    for i, obs in enumerate(observations):
+        model = manager.models[i % len(manager.models)]
+        action, _ = model.predict(np.array([obs]), deterministic=deterministic)
+        actions.append(int(action[0]))
+    return actions
+
+
+def time_tick(fn, manager, observations, ticks, deterministic):
+    fn(manager, observations, deterministic)  # Aquecimento
+    start = time.perf_counter()
+    for _ in range(ticks):
+        fn(manager, observations, deterministic)
+    return (time.perf_counter() - start) / ticks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lanes", type=int, nargs="+", default=[8, 32, 128])
+    parser.add_argument("--models", type=int, default=2, help="Modelos distintos na corrida")
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--stochastic", action="store_true",
+                        help="deterministic=False (o epsilon-greedy do DQN às vezes pula o forward)")
+    args = parser.parse_args()
+
+    env = CorridaEnv(map_type="corridor")
+    with tempfile.TemporaryDirectory() as tmp:
+        agents = []
+        for m in range(args.models):
+            path = os.path.join(tmp, f"modelo_{m}.zip")
+            DQN("MlpPolicy", env, buffer_size=100, seed=m, verbose=0).save(path)
+            agents.append(AgentInfo(f"Agente{m}", "DQN", modelo_path=path))
+        manager = RaceManager(agents, "corridor")
+        deterministic = not args.stochastic
+        print(f"{'raias':>6} {'por raia (ms)':>14} {'em lote (ms)':>13} {'ganho':>7}")
+        for lanes in args.lanes:
+            obs = np.stack([env.observation_space.sample() for _ in range(lanes)]).astype(np.float32)
+            old = time_tick(per_lane_actions, manager, obs, args.ticks, deterministic)
+            new = time_tick(lambda mgr, o, d: mgr.get_actions(o, deterministic=d), manager, obs, args.ticks, deterministic)
+            print(f"{lanes:>6} {old * 1e3:>14.3f} {new * 1e3:>13.3f} {old / new:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
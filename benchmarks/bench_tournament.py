@@ -0,0 +1,78 @@
+"""Benchmark do torneio round-robin: corridas uma a uma vs motor em lote/pool.
+
+Mede o tempo de um round-robin completo com o laço antigo (um CorridaEnv e um
+predict por carro, corrida por corrida) e com tournament.iter_tournament para cada
+número de workers pedido.
+
+Uso:
+    python benchmarks/bench_tournament.py [--agents 16] [--races-per-pair 1] [--steps 300] [--workers 1 2 4]
+        [--start-method fork]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stable_baselines3 import DQN
+from environment import CorridaEnv
+from model_cache import get_model_cache
+from shm_vec_env import available_cores
+from tournament import Entrant, iter_tournament, round_robin
+
+
+def serial_race(pair, max_steps):
+    """Laço original do run_race: cada carro com seu CorridaEnv, um predict por carro e passo."""
+    cache = get_model_cache()
+    models = [cache.get(e.modelo_path, e.tipo) for e in pair]
+    envs = [CorridaEnv(map_type="corridor", car_stats=e.stats) for e in pair]
+    obs = [env.reset()[0] for env in envs]
+    dones = [False] * len(pair)
+    step = 0
+    while not all(dones) and step < max_steps:
+        for i, env in enumerate(envs):
+            if not dones[i]:
+                action, _ = models[i].predict(obs[i], deterministic=True)
+                obs[i], _, terminated, truncated, _ = env.step(int(action))
+                dones[i] = terminated or truncated
+        step += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agents", type=int, default=16)
+    parser.add_argument("--races-per-pair", type=int, default=1)
+    parser.add_argument("--steps", type=int, default=300)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, available_cores()])
+    parser.add_argument("--start-method", default=None, help="fork, forkserver ou spawn (padrão do motor)")
+    args = parser.parse_args()
+
+    env = CorridaEnv(map_type="corridor")
+    with tempfile.TemporaryDirectory() as tmp:
+        entrants = []
+        for a in range(args.agents):
+            path = os.path.join(tmp, f"agente_{a}.zip")
+            DQN("MlpPolicy", env, buffer_size=100, seed=a, verbose=0).save(path)
+            entrants.append(Entrant(f"Agente{a}", "DQN", path, None))
+        pairs = round_robin(args.agents, args.races_per_pair)
+        print(f"{len(pairs)} corridas, {available_cores()} núcleo(s)")
+
+        start = time.perf_counter()
+        for i, j in pairs:
+            serial_race((entrants[i], entrants[j]), args.steps)
+        serial = time.perf_counter() - start
+        print(f"{'uma a uma':>12} {serial:8.2f} s")
+
+        for workers in args.workers:
+            start = time.perf_counter()
+            for _ in iter_tournament(entrants, args.races_per_pair, max_steps=args.steps, n_workers=workers,
+                                      start_method=args.start_method):
+                pass
+            elapsed = time.perf_counter() - start
+            print(f"{f'{workers} worker(s)':>12} {elapsed:8.2f} s  {serial / elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
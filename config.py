@@ -35,6 +35,75 @@ PHASES = [
 RANDOMIZE_START = True  # Randomizar posição/velocidade inicial
 OBS_NOISE_STD = 0.01    # Desvio padrão do ruído nas observações
 
+# Acima deste número de execuções paralelas o treino usa o BatchCorridaEnv (vetorizado)
+BATCH_ENV_MIN_PARALLEL = 16
+
+# Acima deste número de execuções paralelas (e com mais de um núcleo) o treino usa o
+# SharedMemoryVecEnv, com um processo por fatia de pelo menos SHM_ENVS_PER_WORKER carros
+SHM_VEC_ENV_MIN_PARALLEL = 64
+SHM_ENVS_PER_WORKER = 8
+
+# Lidar: "march" (20 amostras por raio, leituras quantizadas) ou "exact" (ray casting analítico)
+LIDAR_MODE = "march"
+
+# Raster de pista: se True, is_on_corridor consulta uma grade pré-computada (O(1)) em vez da geometria
+TRACK_RASTER = False
+TRACK_RASTER_CELL = 1.0  # Tamanho da célula do raster em pixels (resolução)
+
+# Fast path do CorridaEnv: step sem alocações (buffers de observação e blocos de ruído pré-alocados)
+FAST_PATH = False
+NOISE_BLOCK_STEPS = 1024  # Linhas de ruído geradas por bloco no fast path
+
+# Históricos por ambiente do loop de treino/dashboard: buffers circulares com esta capacidade
+# (amostras por ambiente). Deve cobrir um episódio inteiro para o log por episódio sair completo.
+HISTORY_CAPACITY = 2048
+
+# Log de episódios colunar (episode_store): episódios por chunk .npz, fsync a cada N chunks e
+# flush forçado após estes segundos. EPISODE_TEXT_DUMPS=True volta a escrever as listas
+# completas de cada episódio nos .txt da sessão (formato antigo).
+EPISODE_CHUNK_EPISODES = 256
+EPISODE_FSYNC_CHUNKS = 4
+EPISODE_FLUSH_SECONDS = 30.0
+EPISODE_TEXT_DUMPS = False
+
+# agents.json com escrita adiada (agent_store): grava após AGENT_FLUSH_SECONDS ou assim que
+# houver AGENT_FLUSH_DIRTY alterações pendentes (e sempre ao encerrar o processo)
+AGENT_FLUSH_SECONDS = 5.0
+AGENT_FLUSH_DIRTY = 50
+
+# Persistência de agentes, ranking e progresso de fases: "json" (agents.json, ranking.json,
+# models/<agente>_progress.json) ou "sqlite" (banco único DB_PATH em modo WAL, com histórico
+# completo; importa os JSON existentes ao ser criado). Agentes carregados do banco trazem só
+# as DB_HISTORY_VIEW entradas mais recentes do historico
+STORAGE_BACKEND = "json"
+DB_PATH = "corrida.db"
+DB_HISTORY_VIEW = 50
+
+# PhaseManager (backend JSON): cada episódio/avanço de fase vira uma linha em
+# models/<agente>_progress.jsonl; com este número de linhas o diário é compactado
+# no snapshot models/<agente>_progress.json
+PHASE_JOURNAL_COMPACT = 500
+
+# Eventos por passo do ambiente ([CHECKPOINT], [SUCESSO]) usam logger.log_rate_limited:
+# no máximo uma linha por tipo de evento a cada LOG_EVENT_INTERVAL segundos
+LOG_EVENT_INTERVAL = 1.0
+
+# Registro de modelos de inferência (model_cache): memória estimada máxima dos modelos
+# mantidos carregados; acima disso os menos usados recentemente são descartados
+MODEL_CACHE_BYTES = 256 * 1024 * 1024
+
+# Forward das políticas de inferência (policy_inference): "numpy", "torchscript" ou "torch"
+POLICY_BACKEND = "numpy"
+
+# Torneios (tournament): corridas simuladas juntas em cada tarefa do pool de processos
+# e pontos por posição de chegada (posições além da lista não pontuam)
+TOURNAMENT_RACES_PER_TASK = 8
+TOURNAMENT_POINTS = (3, 1)
+
+# Rastreio da recompensa por componente: se True, cada episódio devolve em info["reward_components"]
+# a soma de cada termo do RewardShaper e das penalidades do ambiente (desligado não custa nada)
+REWARD_TRACE = False
+
 # Limite de passos por episódio
 MAX_STEPS = 1000  # Aumentado para dar mais tempo de exploração
 
@@ -2,7 +2,7 @@
 
 from .config_manager import ConfigManager, init_config, get_config
 from .reward_shaper import BaseRewardShaper, RewardShapeFactory
-from .reward_shaper import BalancedRewardShaper, SpeedRewardShaper, SafetyRewardShaper
+from .reward_shaper import BalancedRewardShaper, SpeedRewardShaper, SafetyRewardShaper, RewardComponentStats
 from .base_agent import BaseAgent
 from .callbacks import TensorBoardCallback, MLflowCallback, EvaluationCallback, MetricsCallback
 
@@ -15,6 +15,7 @@ __all__ = [
     'BalancedRewardShaper',
     'SpeedRewardShaper',
     'SafetyRewardShaper',
+    'RewardComponentStats',
     'BaseAgent',
     'TensorBoardCallback',
     'MLflowCallback',
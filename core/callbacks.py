@@ -4,6 +4,7 @@ import numpy as np
 import os
 from typing import Optional, Dict, Any
 from stable_baselines3.common.callbacks import BaseCallback
+from .reward_shaper import RewardComponentStats
 import logging
 
 logger = logging.getLogger(__name__)
@@ -209,17 +210,22 @@ class MetricsCallback(BaseCallback):
     def __init__(self,
                  collect_fps: bool = True,
                  collect_policy_entropy: bool = True,
+                 collect_reward_components: bool = True,
                  verbose: int = 0):
         """Inicializa MetricsCallback.
         
         Args:
             collect_fps: Coleta frames por segundo.
             collect_policy_entropy: Coleta entropia da política.
+            collect_reward_components: Agrega info["reward_components"] dos episódios
+                (ambientes com reward_trace ligado).
             verbose: Nível de verbosidade.
         """
         super().__init__(verbose)
         self.collect_fps = collect_fps
         self.collect_policy_entropy = collect_policy_entropy
+        self.collect_reward_components = collect_reward_components
+        self.reward_components = RewardComponentStats()
         self.last_time = None
     
     def _on_step(self) -> bool:
@@ -236,6 +242,15 @@ class MetricsCallback(BaseCallback):
                 self.logger.record("metrics/fps", fps)
                 self.last_time = current_time
         
+        # Componentes da recompensa (só chegam no info do último passo de cada episódio)
+        if self.collect_reward_components:
+            for info in self.locals.get("infos", ()):
+                components = info.get("reward_components")
+                if components:
+                    self.reward_components.add(components)
+                    for name, value in components.items():
+                        self.logger.record_mean(f"reward_components/{name}", value)
+        
         # Policy entropy
         if self.collect_policy_entropy:
             try:
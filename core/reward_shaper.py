@@ -1,5 +1,6 @@
 """RewardShaper para design modular de funções de recompensa."""
 
+import copy
 from abc import ABC, abstractmethod
 from typing import Dict, Tuple, Any, Optional
 import numpy as np
@@ -42,8 +43,153 @@ class BaseRewardShaper(ABC):
         """Reseta estado interno do shaper (se necessário)."""
         pass
 
+    def reward_components(self, **kwargs) -> Dict[str, float]:
+        """compute_reward separado por termo, para rastrear a recompensa por componente.
 
-class BalancedRewardShaper(BaseRewardShaper):
+        A soma dos valores, na ordem do dict, é a recompensa de compute_reward (e o
+        estado do shaper avança do mesmo jeito). A implementação padrão não conhece
+        os termos de shapers customizados e devolve só o total.
+
+        Args:
+            **kwargs: Mesmos argumentos de compute_reward.
+
+        Returns:
+            Dict nome do componente -> contribuição.
+        """
+        return {'total': type(self).compute_reward(self, **kwargs)}
+
+    def trace_components(self, trace: Optional[Dict[str, float]]) -> None:
+        """Liga (dict) ou desliga (None) o rastreio por componente de compute_reward.
+
+        Ligado, compute_reward passa por reward_components e soma cada termo em trace.
+        Desligado, o método da classe é chamado diretamente, sem custo extra.
+
+        Args:
+            trace: Dict de contadores nome -> soma (ex.: CorridaEnv.reward_trace) ou None.
+        """
+        if trace is None:
+            self.__dict__.pop('compute_reward', None)
+            self._trace = None
+        else:
+            self._trace = trace
+            self.compute_reward = self._compute_reward_traced
+
+    def _compute_reward_traced(self, **kwargs) -> float:
+        """compute_reward via reward_components, acumulando cada termo em self._trace."""
+        reward = 0.0
+        trace = self._trace
+        for name, value in self.reward_components(**kwargs).items():
+            reward += value
+            trace[name] = trace.get(name, 0.0) + value
+        return reward
+
+    def reward_components_batch(self, **kwargs) -> Dict[str, np.ndarray]:
+        """Versão em lote de reward_components (arrays [N] por componente).
+
+        Args:
+            **kwargs: Mesmos argumentos de compute_reward_batch.
+        """
+        return {'total': self.compute_reward_batch(**kwargs)}
+
+    def reset_batch(self, n_envs: int, indices: Optional[np.ndarray] = None) -> None:
+        """Prepara (ou reseta) o estado por ambiente usado em compute_reward_batch.
+
+        A implementação padrão guarda uma cópia do shaper por ambiente, para que
+        shapers customizados que só implementam compute_reward funcionem em lote.
+
+        Args:
+            n_envs: Número de ambientes do lote.
+            indices: Ambientes a resetar; None reseta (ou cria) todos.
+        """
+        env_shapers = getattr(self, '_env_shapers', None)
+        if indices is None or env_shapers is None or len(env_shapers) != n_envs:
+            self._env_shapers = []
+            env_shapers = [copy.deepcopy(self) for _ in range(n_envs)]
+            self._env_shapers = env_shapers
+            indices = range(n_envs)
+        for i in indices:
+            env_shapers[i].reset()
+
+    def compute_reward_batch(self,
+                             positions: np.ndarray,
+                             velocities: np.ndarray,
+                             angles: np.ndarray,
+                             checkpoint_idx: np.ndarray,
+                             total_checkpoints: int,
+                             collisions: np.ndarray,
+                             out_of_bounds: np.ndarray,
+                             progress: np.ndarray,
+                             last_velocities: Optional[np.ndarray] = None) -> np.ndarray:
+        """Computa as recompensas de N ambientes de uma vez.
+
+        Implementação padrão: chama compute_reward da cópia de cada ambiente (ver
+        reset_batch). Os shapers embutidos sobrescrevem com versões vetorizadas.
+
+        Args:
+            positions: Posições [N, 2].
+            velocities: Velocidades [N].
+            angles: Ângulos [N].
+            checkpoint_idx: Índices do checkpoint atual [N].
+            total_checkpoints: Total de checkpoints.
+            collisions: Máscara de colisão [N].
+            out_of_bounds: Máscara de saída da pista [N].
+            progress: Progresso [N].
+            last_velocities: Velocidades do passo anterior [N] (opcional).
+
+        Returns:
+            Recompensas float64 [N].
+        """
+        n = len(velocities)
+        if len(getattr(self, '_env_shapers', None) or ()) != n:
+            self.reset_batch(n)
+        rewards = np.empty(n, dtype=np.float64)
+        for i, shaper in enumerate(self._env_shapers):
+            rewards[i] = shaper.compute_reward(
+                position=(positions[i][0], positions[i][1]),
+                velocity=velocities[i],
+                angle=angles[i],
+                checkpoint_idx=int(checkpoint_idx[i]),
+                total_checkpoints=total_checkpoints,
+                collision=bool(collisions[i]),
+                out_of_bounds=bool(out_of_bounds[i]),
+                progress=progress[i],
+                last_velocity=None if last_velocities is None else last_velocities[i]
+            )
+        return rewards
+
+
+class _BatchCheckpointState:
+    """Estado vetorizado dos shapers embutidos: último checkpoint de cada ambiente."""
+
+    last_checkpoints: Optional[np.ndarray] = None
+
+    def reset_batch(self, n_envs: int, indices: Optional[np.ndarray] = None) -> None:
+        """Zera last_checkpoints dos ambientes indicados (todos se indices for None)."""
+        if indices is None or self.last_checkpoints is None or len(self.last_checkpoints) != n_envs:
+            self.last_checkpoints = np.zeros(n_envs, dtype=np.int64)
+        else:
+            self.last_checkpoints[indices] = 0
+
+    def compute_reward_batch(self, **kwargs) -> np.ndarray:
+        """Soma os componentes de reward_components_batch na ordem do compute_reward escalar."""
+        components = iter(self.reward_components_batch(**kwargs).values())
+        reward = np.array(next(components), dtype=np.float64)
+        for value in components:
+            reward += value
+        return reward
+
+    def _checkpoint_gain(self, checkpoint_idx: np.ndarray, bonus: float) -> np.ndarray:
+        """Bônus por checkpoints novos em cada ambiente; atualiza last_checkpoints."""
+        checkpoint_idx = np.asarray(checkpoint_idx, dtype=np.int64)
+        if self.last_checkpoints is None or len(self.last_checkpoints) != len(checkpoint_idx):
+            self.reset_batch(len(checkpoint_idx))
+        new = checkpoint_idx > self.last_checkpoints
+        gain = np.where(new, bonus * (checkpoint_idx - self.last_checkpoints), 0.0)
+        np.maximum(self.last_checkpoints, checkpoint_idx, out=self.last_checkpoints)
+        return gain
+
+
+class BalancedRewardShaper(_BatchCheckpointState, BaseRewardShaper):
     """Recompensa balanceada: checkpoint + velocidade + penalidades."""
     
     def __init__(self, 
@@ -117,6 +263,41 @@ class BalancedRewardShaper(BaseRewardShaper):
              reward += self.stability_reward * stability
          
          return reward
+
+    def reward_components(self, position, velocity, angle, checkpoint_idx, total_checkpoints,
+                          collision, out_of_bounds, progress, last_velocity=None, **kwargs) -> Dict[str, float]:
+        """Termos de compute_reward (mesmos valores, mesma ordem de soma)."""
+        checkpoint = 0.0
+        if checkpoint_idx > self.last_checkpoint:
+            checkpoint = self.checkpoint_reward * (checkpoint_idx - self.last_checkpoint)
+            self.last_checkpoint = checkpoint_idx
+        stability = 0.0
+        if last_velocity is not None:
+            stability = self.stability_reward * (1.0 / (1.0 + abs(velocity - last_velocity)))
+        return {
+            'checkpoint': checkpoint,
+            'collision': self.collision_penalty if collision else 0.0,
+            'out_of_bounds': self.out_of_bounds_penalty if out_of_bounds else 0.0,
+            'speed': self.speed_reward_factor * min(velocity / 20.0, 1.0),
+            'progress': self.progress_reward_factor * progress,
+            'stability': stability,
+        }
+
+    def reward_components_batch(self, positions, velocities, angles, checkpoint_idx, total_checkpoints,
+                                collisions, out_of_bounds, progress, last_velocities=None) -> Dict[str, np.ndarray]:
+        """Termos de compute_reward vetorizados (somados por compute_reward_batch)."""
+        velocities = np.asarray(velocities, dtype=np.float64)
+        stability = 0.0
+        if last_velocities is not None:
+            stability = self.stability_reward * (1.0 / (1.0 + np.abs(velocities - last_velocities)))
+        return {
+            'checkpoint': self._checkpoint_gain(checkpoint_idx, self.checkpoint_reward),
+            'collision': np.where(collisions, self.collision_penalty, 0.0),
+            'out_of_bounds': np.where(out_of_bounds, self.out_of_bounds_penalty, 0.0),
+            'speed': self.speed_reward_factor * np.minimum(velocities / 20.0, 1.0),
+            'progress': self.progress_reward_factor * np.asarray(progress, dtype=np.float64),
+            'stability': np.broadcast_to(stability, velocities.shape),
+        }
     
     def reset(self) -> None:
         """Reseta estado para novo episódio."""
@@ -124,7 +305,7 @@ class BalancedRewardShaper(BaseRewardShaper):
         self.total_distance = 0.0
 
 
-class SpeedRewardShaper(BaseRewardShaper):
+class SpeedRewardShaper(_BatchCheckpointState, BaseRewardShaper):
     """Recompensa focada em velocidade (racing puro)."""
     
     def __init__(self,
@@ -167,13 +348,38 @@ class SpeedRewardShaper(BaseRewardShaper):
             reward -= 50.0
         
         return reward
+
+    def reward_components(self, position, velocity, angle, checkpoint_idx, total_checkpoints,
+                          collision, out_of_bounds, progress, **kwargs) -> Dict[str, float]:
+        """Termos de compute_reward (mesmos valores, mesma ordem de soma)."""
+        speed = self.speed_reward_factor * velocity
+        checkpoint = 0.0
+        if checkpoint_idx > self.last_checkpoint:
+            checkpoint = self.checkpoint_bonus * (checkpoint_idx - self.last_checkpoint)
+            self.last_checkpoint = checkpoint_idx
+        return {
+            'speed': speed,
+            'collision': self.collision_penalty if collision else 0.0,
+            'checkpoint': checkpoint,
+            'out_of_bounds': -50.0 if out_of_bounds else 0.0,
+        }
+
+    def reward_components_batch(self, positions, velocities, angles, checkpoint_idx, total_checkpoints,
+                                collisions, out_of_bounds, progress, last_velocities=None) -> Dict[str, np.ndarray]:
+        """Termos de compute_reward vetorizados (somados por compute_reward_batch)."""
+        return {
+            'speed': self.speed_reward_factor * np.asarray(velocities, dtype=np.float64),
+            'collision': np.where(collisions, self.collision_penalty, 0.0),
+            'checkpoint': self._checkpoint_gain(checkpoint_idx, self.checkpoint_bonus),
+            'out_of_bounds': np.where(out_of_bounds, -50.0, 0.0),
+        }
     
     def reset(self) -> None:
         """Reseta estado."""
         self.last_checkpoint = 0
 
 
-class SafetyRewardShaper(BaseRewardShaper):
+class SafetyRewardShaper(_BatchCheckpointState, BaseRewardShaper):
     """Recompensa focada em segurança e estabilidade."""
     
     def __init__(self,
@@ -223,12 +429,72 @@ class SafetyRewardShaper(BaseRewardShaper):
                 reward -= acceleration * 0.5  # Penaliza aceleração brusca
         
         return reward
+
+    def reward_components(self, position, velocity, angle, checkpoint_idx, total_checkpoints,
+                          collision, out_of_bounds, progress, last_velocity=None, **kwargs) -> Dict[str, float]:
+        """Termos de compute_reward (mesmos valores, mesma ordem de soma)."""
+        checkpoint = 0.0
+        if checkpoint_idx > self.last_checkpoint:
+            checkpoint = self.checkpoint_bonus * (checkpoint_idx - self.last_checkpoint)
+            self.last_checkpoint = checkpoint_idx
+        smoothness = 0.0
+        if last_velocity is not None:
+            acceleration = abs(velocity - last_velocity)
+            smoothness = 1.0 if acceleration < 2.0 else -(acceleration * 0.5)
+        return {
+            'base': self.smooth_driving_reward,
+            'collision': self.collision_penalty if collision else 0.0,
+            'out_of_bounds': self.out_of_bounds_penalty if out_of_bounds else 0.0,
+            'checkpoint': checkpoint,
+            'smoothness': smoothness,
+        }
+
+    def reward_components_batch(self, positions, velocities, angles, checkpoint_idx, total_checkpoints,
+                                collisions, out_of_bounds, progress, last_velocities=None) -> Dict[str, np.ndarray]:
+        """Termos de compute_reward vetorizados (somados por compute_reward_batch)."""
+        velocities = np.asarray(velocities, dtype=np.float64)
+        smoothness = 0.0
+        if last_velocities is not None:
+            acceleration = np.abs(velocities - last_velocities)
+            smoothness = np.where(acceleration < 2.0, 1.0, -(acceleration * 0.5))
+        return {
+            'base': np.full(velocities.shape, self.smooth_driving_reward),
+            'collision': np.where(collisions, self.collision_penalty, 0.0),
+            'out_of_bounds': np.where(out_of_bounds, self.out_of_bounds_penalty, 0.0),
+            'checkpoint': self._checkpoint_gain(checkpoint_idx, self.checkpoint_bonus),
+            'smoothness': np.broadcast_to(smoothness, velocities.shape),
+        }
     
     def reset(self) -> None:
         """Reseta estado."""
         self.last_checkpoint = 0
 
 
+class RewardComponentStats:
+    """Agrega os contadores de info["reward_components"] de vários episódios."""
+
+    def __init__(self):
+        """Inicializa sem episódios."""
+        self.totals: Dict[str, float] = {}
+        self.episodes = 0
+
+    def add(self, components: Dict[str, float]) -> None:
+        """Soma os componentes de um episódio.
+
+        Args:
+            components: Dict nome do componente -> soma no episódio.
+        """
+        self.episodes += 1
+        for name, value in components.items():
+            self.totals[name] = self.totals.get(name, 0.0) + float(value)
+
+    def means(self) -> Dict[str, float]:
+        """Média por episódio de cada componente (componentes ausentes contam como 0)."""
+        if not self.episodes:
+            return {}
+        return {name: total / self.episodes for name, total in self.totals.items()}
+
+
 class RewardShapeFactory:
     """Factory para criar RewardShapers."""
     
@@ -257,6 +523,37 @@ class RewardShapeFactory:
                            f"Opções: {list(cls._shapers.keys())}")
         
         return cls._shapers[shaper_type](**kwargs)
+
+    @classmethod
+    def create_batch(cls, shaper_type: str, n_envs: int, **kwargs) -> BaseRewardShaper:
+        """Cria um RewardShaper com estado para N ambientes (ver compute_reward_batch).
+
+        Args:
+            shaper_type: Nome registrado do shaper.
+            n_envs: Número de ambientes do lote.
+            **kwargs: Argumentos para o shaper.
+
+        Returns:
+            Instância de BaseRewardShaper com reset_batch(n_envs) já aplicado.
+        """
+        shaper = cls.create(shaper_type, **kwargs)
+        shaper.reset_batch(n_envs)
+        return shaper
+
+    @classmethod
+    def compute_reward_batch(cls, shaper: BaseRewardShaper, **batch) -> np.ndarray:
+        """Recompensas de um lote com um shaper criado por create_batch.
+
+        Args:
+            shaper: Shaper (embutido ou customizado) com estado em lote.
+            **batch: Arrays aceitos por BaseRewardShaper.compute_reward_batch.
+
+        Returns:
+            Recompensas float64 [N].
+        """
+        if not isinstance(shaper, BaseRewardShaper):
+            raise TypeError(f"{shaper} deve herdar de BaseRewardShaper")
+        return shaper.compute_reward_batch(**batch)
     
     @classmethod
     def register(cls, name: str, shaper_class: type) -> None:
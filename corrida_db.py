@@ -0,0 +1,452 @@
+"""Persistência em SQLite (modo WAL) de agentes, histórico, ranking e progresso de fases.
+
+Alternativa aos arquivos agents.json, ranking.json e models/<agente>_progress.json,
+ligada com config.STORAGE_BACKEND = "sqlite". Um único banco (config.DB_PATH) guarda:
+
+- agents: um registro por agente (campos de AgentInfo.to_dict, exceto o historico);
+- agent_history: o histórico completo de cada agente, sem truncar, com as colunas mais
+  consultadas (mapa, score, xp_gained, ...) indexadas;
+- ranking: melhor resultado por chave "tipo|mapa";
+- phase_progress / phase_episodes: fase atual e episódios do PhaseManager.
+
+As consultas usam SQL parametrizado constante (o sqlite3 mantém os statements
+preparados em cache por conexão). Os agentes carregados trazem em "historico" só as
+DB_HISTORY_VIEW entradas mais recentes; cada entrada vinda do banco tem a chave
+"_rowid", e entradas sem ela são inseridas como novas ao salvar. Na criação do banco
+os JSON existentes são importados (import_json).
+"""
+import copy
+import glob
+import json
+import os
+import sqlite3
+import threading
+import config
+from agent_stats import AgentAggregates
+from logger import setup_logger
+
+logger = setup_logger()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS agents (
+    nome TEXT PRIMARY KEY,
+    tipo TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS agent_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    agent TEXT NOT NULL REFERENCES agents(nome) ON DELETE CASCADE ON UPDATE CASCADE,
+    tipo_evento TEXT,
+    mapa TEXT,
+    score REAL,
+    xp_gained INTEGER NOT NULL DEFAULT 0,
+    checkpoints INTEGER,
+    tempo REAL,
+    data TEXT,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_agent ON agent_history(agent, id);
+CREATE INDEX IF NOT EXISTS idx_history_map_score ON agent_history(mapa, score);
+CREATE TABLE IF NOT EXISTS ranking (
+    key TEXT PRIMARY KEY,
+    agent_type TEXT,
+    map_type TEXT,
+    score REAL,
+    speed REAL,
+    tempo REAL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ranking_map_score ON ranking(map_type, score DESC);
+CREATE TABLE IF NOT EXISTS phase_progress (
+    agent TEXT PRIMARY KEY,
+    current_phase_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS phase_episodes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    agent TEXT NOT NULL,
+    phase_id INTEGER NOT NULL,
+    reward REAL NOT NULL,
+    success INTEGER NOT NULL,
+    steps INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_phase_episodes ON phase_episodes(agent, phase_id, id);
+"""
+
+SQL_AGENTS = "SELECT nome, tipo, payload FROM agents ORDER BY position"
+SQL_AGENT = "SELECT nome, tipo, payload FROM agents WHERE nome = ?"
+SQL_AGENT_NAMES = "SELECT nome FROM agents"
+SQL_NEXT_POSITION = "SELECT COALESCE(MAX(position) + 1, 0) FROM agents"
+SQL_UPSERT_AGENT = """
+INSERT INTO agents (nome, tipo, position, payload) VALUES (?, ?, ?, ?)
+ON CONFLICT(nome) DO UPDATE SET tipo = excluded.tipo, position = excluded.position, payload = excluded.payload
+"""
+SQL_UPDATE_AGENT = "UPDATE agents SET tipo = ?, payload = ? WHERE nome = ?"
+SQL_DELETE_AGENT = "DELETE FROM agents WHERE nome = ?"
+SQL_HISTORY_VIEW = "SELECT id, payload FROM agent_history WHERE agent = ? ORDER BY id DESC LIMIT ?"
+SQL_HISTORY_ALL = "SELECT id, payload FROM agent_history WHERE agent = ? ORDER BY id"
+SQL_INSERT_HISTORY = """
+INSERT INTO agent_history (agent, tipo_evento, mapa, score, xp_gained, checkpoints, tempo, data, payload)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+SQL_HISTORY_OWNER = "SELECT agent FROM agent_history WHERE id = ?"
+SQL_RENAME_AGENT = "UPDATE agents SET nome = ? WHERE nome = ?"
+SQL_TOP_XP = """
+SELECT a.nome, COALESCE(SUM(h.xp_gained), 0) AS xp
+FROM agents a LEFT JOIN agent_history h ON h.agent = a.nome
+GROUP BY a.nome ORDER BY xp DESC, a.position LIMIT ?
+"""
+SQL_RANKING = "SELECT key, payload FROM ranking"
+SQL_RANKING_KEYS = "SELECT key FROM ranking"
+SQL_UPSERT_RANKING = """
+INSERT INTO ranking (key, agent_type, map_type, score, speed, tempo, payload) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(key) DO UPDATE SET agent_type = excluded.agent_type, map_type = excluded.map_type,
+    score = excluded.score, speed = excluded.speed, tempo = excluded.tempo, payload = excluded.payload
+"""
+SQL_DELETE_RANKING = "DELETE FROM ranking WHERE key = ?"
+SQL_TOP_RANKING = "SELECT key, payload FROM ranking WHERE map_type = ? ORDER BY score DESC LIMIT ?"
+SQL_PHASE = "SELECT current_phase_id FROM phase_progress WHERE agent = ?"
+SQL_UPSERT_PHASE = """
+INSERT INTO phase_progress (agent, current_phase_id) VALUES (?, ?)
+ON CONFLICT(agent) DO UPDATE SET current_phase_id = excluded.current_phase_id
+"""
+SQL_PHASE_EPISODES = "SELECT phase_id, reward, success, steps FROM phase_episodes WHERE agent = ? ORDER BY id"
+SQL_INSERT_PHASE_EPISODE = "INSERT INTO phase_episodes (agent, phase_id, reward, success, steps) VALUES (?, ?, ?, ?, ?)"
+SQL_SUCCESS_RATE = """
+SELECT AVG(success), COUNT(*) FROM (
+    SELECT success FROM phase_episodes WHERE agent = ? ORDER BY id DESC LIMIT ?)
+"""
+SQL_SUCCESS_RATE_PHASE = """
+SELECT AVG(success), COUNT(*) FROM (
+    SELECT success FROM phase_episodes WHERE agent = ? AND phase_id = ? ORDER BY id DESC LIMIT ?)
+"""
+
+_AGENT_KEYS = ("nome", "tipo", "historico")
+
+
+def _history_row(agent, entry):
+    payload = {k: v for k, v in entry.items() if k != "_rowid"}
+    return (agent, entry.get("tipo_evento"), entry.get("mapa"), entry.get("score"), int(entry.get("xp_gained", 0) or 0),
+            entry.get("checkpoints"), entry.get("tempo"), entry.get("data"), json.dumps(payload, ensure_ascii=False))
+
+
+class CorridaDB:
+    """Conexão com o banco SQLite do jogo.
+
+    Args:
+        path (str): Arquivo do banco (criado se não existir).
+    """
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.created = not os.path.exists(self.path)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.RLock()
+        self._agents_cache = None
+        self._cache_version = None
+
+    def close(self):
+        """Fecha a conexão (e a retira do registro de get_database)."""
+        with _DATABASES_LOCK:
+            if _DATABASES.get(self.path) is self:
+                del _DATABASES[self.path]
+        with self._lock:
+            self.conn.close()
+
+    def _transaction(self):
+        return _Transaction(self)
+
+    def _data_version(self):
+        # Muda quando outra conexão (ou processo) altera o banco
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _invalidate(self):
+        self._agents_cache = None
+
+    # ----------------------------------------------------------------- agentes
+    def _agent_dict(self, nome, tipo, payload, history_limit):
+        record = {"nome": nome, "tipo": tipo}
+        record.update(json.loads(payload))
+        if history_limit is None:
+            rows = self.conn.execute(SQL_HISTORY_ALL, (nome,)).fetchall()
+        else:
+            rows = self.conn.execute(SQL_HISTORY_VIEW, (nome, history_limit)).fetchall()[::-1]
+        record["historico"] = [dict(json.loads(p), _rowid=rowid) for rowid, p in rows]
+        if "agregados" not in record:
+            # Agente anterior aos agregados: calcula do histórico completo, não só da visão
+            full = record["historico"] if history_limit is None else self.agent_history(nome)
+            record["agregados"] = AgentAggregates.from_history(full).to_dict()
+        return record
+
+    def load_agents(self, history_limit=None):
+        """Lista de agentes (dicts de AgentInfo), com as últimas history_limit entradas do historico.
+
+        Args:
+            history_limit (int): Entradas do historico por agente (padrão config.DB_HISTORY_VIEW).
+        Returns:
+            list: Cópias dos registros (alterá-las não afeta o banco).
+        """
+        limit = config.DB_HISTORY_VIEW if history_limit is None else history_limit
+        with self._lock:
+            version = self._data_version()
+            if self._agents_cache is None or self._cache_version != (version, limit):
+                rows = self.conn.execute(SQL_AGENTS).fetchall()
+                self._agents_cache = [self._agent_dict(n, t, p, limit) for n, t, p in rows]
+                self._cache_version = (version, limit)
+            return copy.deepcopy(self._agents_cache)
+
+    def find_agent(self, nome, history_limit=None):
+        """Registro do agente nome (ou None); history_limit=None usa config.DB_HISTORY_VIEW."""
+        limit = config.DB_HISTORY_VIEW if history_limit is None else history_limit
+        with self._lock:
+            row = self.conn.execute(SQL_AGENT, (nome,)).fetchone()
+            return self._agent_dict(*row, limit) if row else None
+
+    def agent_history(self, nome):
+        """Histórico completo do agente, do mais antigo ao mais recente."""
+        with self._lock:
+            return [dict(json.loads(p), _rowid=rowid) for rowid, p in self.conn.execute(SQL_HISTORY_ALL, (nome,))]
+
+    def _insert_new_history(self, nome, historico):
+        for entry in historico:
+            if "_rowid" in entry:
+                continue
+            cursor = self.conn.execute(SQL_INSERT_HISTORY, _history_row(nome, entry))
+            entry["_rowid"] = cursor.lastrowid
+
+    def save_agents(self, agents):
+        """Substitui o conjunto de agentes (semântica de save_agents).
+
+        Agentes ausentes da lista são removidos com seu histórico; entradas do historico
+        sem "_rowid" são acrescentadas. Um agente cujo historico tem entradas de outro
+        agente que não está mais na lista foi renomeado: o registro (com todo o histórico)
+        passa para o novo nome. Entradas que saíram da lista continuam no banco.
+
+        Args:
+            agents (list): Dicts dos agentes.
+        """
+        with self._lock, self._transaction():
+            names = {record["nome"] for record in agents}
+            existing = {nome for (nome,) in self.conn.execute(SQL_AGENT_NAMES)}
+            for record in agents:
+                rowid = next((e["_rowid"] for e in record.get("historico") or [] if "_rowid" in e), None)
+                owner = self.conn.execute(SQL_HISTORY_OWNER, (rowid,)).fetchone() if rowid is not None else None
+                if owner and owner[0] not in names and record["nome"] not in existing:
+                    self.conn.execute(SQL_RENAME_AGENT, (record["nome"], owner[0]))
+                    existing.discard(owner[0])
+                    existing.add(record["nome"])
+            for position, record in enumerate(agents):
+                nome = record["nome"]
+                payload = {k: v for k, v in record.items() if k not in _AGENT_KEYS}
+                self.conn.execute(SQL_UPSERT_AGENT, (nome, record["tipo"], position, json.dumps(payload, ensure_ascii=False)))
+                self._insert_new_history(nome, record.get("historico") or [])
+            for (nome,) in self.conn.execute(SQL_AGENT_NAMES).fetchall():
+                if nome not in names:
+                    self.conn.execute(SQL_DELETE_AGENT, (nome,))
+            self._invalidate()
+
+    def update_agent(self, record):
+        """Atualiza (ou cria) um agente pelo nome, preservando os campos não informados.
+
+        As entradas novas do historico (sem "_rowid") são inseridas e marcadas com
+        "_rowid" no próprio dict recebido, para não serem inseridas de novo.
+
+        Args:
+            record (dict): Campos do agente; precisa de "nome".
+        """
+        nome = record["nome"]
+        with self._lock, self._transaction():
+            row = self.conn.execute(SQL_AGENT, (nome,)).fetchone()
+            fields = {k: v for k, v in record.items() if k not in _AGENT_KEYS}
+            if row is None:
+                position = self.conn.execute(SQL_NEXT_POSITION).fetchone()[0]
+                self.conn.execute(SQL_UPSERT_AGENT, (nome, record.get("tipo", ""), position,
+                                                     json.dumps(fields, ensure_ascii=False)))
+            else:
+                payload = json.loads(row[2])
+                payload.update(fields)
+                self.conn.execute(SQL_UPDATE_AGENT, (record.get("tipo", row[1]), json.dumps(payload, ensure_ascii=False), nome))
+            self._insert_new_history(nome, record.get("historico") or [])
+            self._invalidate()
+
+    def add_history(self, nome, entry):
+        """Acrescenta uma entrada ao histórico do agente.
+
+        Returns:
+            int: _rowid da entrada.
+        """
+        with self._lock, self._transaction():
+            cursor = self.conn.execute(SQL_INSERT_HISTORY, _history_row(nome, entry))
+            self._invalidate()
+            return cursor.lastrowid
+
+    def top_agents_by_xp(self, n=10):
+        """Os n agentes com mais XP (soma de xp_gained de todo o histórico).
+
+        Returns:
+            list: Tuplas (nome, xp) em ordem decrescente.
+        """
+        with self._lock:
+            return self.conn.execute(SQL_TOP_XP, (n,)).fetchall()
+
+    # ----------------------------------------------------------------- ranking
+    def load_ranking(self):
+        """Ranking como dict "tipo|mapa" -> {"score", "speed", "tempo", ...}."""
+        with self._lock:
+            return {key: json.loads(payload) for key, payload in self.conn.execute(SQL_RANKING)}
+
+    def save_ranking(self, ranking_data):
+        """Substitui o ranking (semântica de save_ranking), numa única transação."""
+        with self._lock, self._transaction():
+            rows = []
+            for key, entry in ranking_data.items():
+                agent_type, _, map_type = key.partition("|")
+                rows.append((key, agent_type, map_type, entry.get("score"), entry.get("speed"), entry.get("tempo"),
+                             json.dumps(entry, ensure_ascii=False)))
+            self.conn.executemany(SQL_UPSERT_RANKING, rows)
+            stale = [(key,) for (key,) in self.conn.execute(SQL_RANKING_KEYS).fetchall() if key not in ranking_data]
+            self.conn.executemany(SQL_DELETE_RANKING, stale)
+
+    def top_ranking(self, map_type, n=10):
+        """Os n melhores resultados de um mapa: lista de (chave, entrada)."""
+        with self._lock:
+            return [(key, json.loads(p)) for key, p in self.conn.execute(SQL_TOP_RANKING, (map_type, n))]
+
+    # ---------------------------------------------------------- progresso de fases
+    def load_phase_progress(self, agent):
+        """Progresso do PhaseManager.
+
+        Returns:
+            tuple | None: (current_phase_id, episode_stats) ou None se não houver registro.
+        """
+        with self._lock:
+            row = self.conn.execute(SQL_PHASE, (agent,)).fetchone()
+            if row is None:
+                return None
+            stats = [{"phase_id": p, "reward": r, "success": bool(s), "steps": n}
+                     for p, r, s, n in self.conn.execute(SQL_PHASE_EPISODES, (agent,))]
+            return row[0], stats
+
+    def save_phase_progress(self, agent, current_phase_id, new_stats=()):
+        """Grava a fase atual e acrescenta os episódios novos.
+
+        Args:
+            agent (str): Nome do agente.
+            current_phase_id (int): Fase atual.
+            new_stats (list): Episódios ainda não gravados (dicts de PhaseManager.episode_stats).
+        """
+        with self._lock, self._transaction():
+            self.conn.execute(SQL_UPSERT_PHASE, (agent, int(current_phase_id)))
+            self.conn.executemany(SQL_INSERT_PHASE_EPISODE, [
+                (agent, int(s["phase_id"]), float(s["reward"]), int(bool(s["success"])), int(s["steps"]))
+                for s in new_stats])
+
+    def success_rate(self, agent, last_n, phase_id=None):
+        """Taxa de sucesso dos últimos last_n episódios do agente (opcionalmente de uma fase).
+
+        Returns:
+            float: Fração de sucessos (0.0 sem episódios).
+        """
+        with self._lock:
+            if phase_id is None:
+                rate, count = self.conn.execute(SQL_SUCCESS_RATE, (agent, last_n)).fetchone()
+            else:
+                rate, count = self.conn.execute(SQL_SUCCESS_RATE_PHASE, (agent, phase_id, last_n)).fetchone()
+            return float(rate) if count else 0.0
+
+    # ---------------------------------------------------------------- importação
+    def import_json(self, agents_file="agents.json", ranking_file="ranking.json", models_dir="models"):
+        """Importa os arquivos JSON existentes (agentes com histórico, ranking e progressos).
+
+        Returns:
+            dict: Quantidade importada de cada tipo.
+        """
+        counts = {"agents": 0, "ranking": 0, "progress": 0}
+        if os.path.exists(agents_file):
+            with open(agents_file, encoding="utf-8") as f:
+                agents = json.load(f)
+            self.save_agents(agents)
+            counts["agents"] = len(agents)
+        if os.path.exists(ranking_file):
+            try:
+                with open(ranking_file, encoding="utf-8") as f:
+                    ranking = json.load(f)
+            except ValueError:
+                ranking = {}
+            self.save_ranking(ranking)
+            counts["ranking"] = len(ranking)
+        for path in sorted(glob.glob(os.path.join(models_dir, "*_progress.json"))):
+            agent = os.path.basename(path)[:-len("_progress.json")]
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.save_phase_progress(agent, data.get("current_phase_id", 0), data.get("episode_stats", []))
+            counts["progress"] += 1
+        return counts
+
+
+class _Transaction:
+    """BEGIN/COMMIT (ROLLBACK em erro) aninhável: só a transação mais externa é efetivada."""
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        db = self.db
+        depth = getattr(db, "_depth", 0)
+        if depth == 0:
+            db.conn.execute("BEGIN")
+        db._depth = depth + 1
+
+    def __exit__(self, exc_type, exc, tb):
+        db = self.db
+        db._depth -= 1
+        if db._depth == 0:
+            db.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+            if exc_type:
+                db._invalidate()
+        return False
+
+
+class SQLiteAgentStore:
+    """Adaptador com a interface de agent_store.AgentStore sobre o CorridaDB."""
+    def __init__(self, db):
+        self.db = db
+        self.dirty = 0
+
+    def load(self):
+        return self.db.load_agents()
+
+    def find(self, nome):
+        return self.db.find_agent(nome)
+
+    def save(self, agents):
+        self.db.save_agents(agents)
+
+    def update(self, record):
+        self.db.update_agent(record)
+
+    def flush(self):
+        """Nada a fazer: cada alteração já é uma transação efetivada."""
+
+
+_DATABASES = {}
+_DATABASES_LOCK = threading.Lock()
+
+
+def get_database(path=None):
+    """CorridaDB compartilhado do caminho (padrão config.DB_PATH).
+
+    Na criação do arquivo, importa agents.json, ranking.json e models/*_progress.json do
+    diretório atual.
+    """
+    path = os.path.abspath(path or config.DB_PATH)
+    with _DATABASES_LOCK:
+        db = _DATABASES.get(path)
+        if db is None:
+            db = _DATABASES[path] = CorridaDB(path)
+            if db.created:
+                counts = db.import_json()
+                logger.info(f"[CorridaDB] Banco criado em {path}; importados: {counts}")
+        return db
@@ -5,23 +5,68 @@ Define o ambiente CorridaEnv compatível com OpenAI Gym, incluindo lógica de ch
 import numpy as np
 import gymnasium as gym
 from gymnasium import spaces
-from config import ENV_SCALE, CAR_LENGTH, CAR_WIDTH, TIME_STEP, RANDOMIZE_START, OBS_NOISE_STD, MAX_STEPS, MAX_EPISODE_TIME, REWARD_SCHEME
+from config import ENV_SCALE, CAR_LENGTH, CAR_WIDTH, TIME_STEP, RANDOMIZE_START, OBS_NOISE_STD, MAX_STEPS, MAX_EPISODE_TIME, REWARD_SCHEME, LIDAR_MODE, TRACK_RASTER, TRACK_RASTER_CELL, FAST_PATH, NOISE_BLOCK_STEPS, REWARD_TRACE
+import logging
 import math
-from logger import setup_logger
+from logger import setup_logger, log_rate_limited
 import os
 from core.reward_shaper import RewardShapeFactory
-from loop_detector import LoopDetector
+from loop_detector import IncrementalLoopDetector
+import lidar
+from track_raster import get_track_raster
 
 logger = setup_logger()
 
+
+def default_reward_config(reward_shaper_type):
+    """Retorna a configuração padrão do RewardShaper para o tipo informado.
+
+    Args:
+        reward_shaper_type (str): 'balanced', 'speed' ou 'safety'.
+    Returns:
+        dict: Parâmetros do shaper.
+    """
+    if reward_shaper_type == 'speed':
+        return {
+            'speed_reward_factor': 2.0,
+            'collision_penalty': -100.0,
+            'checkpoint_bonus': 50.0
+        }
+    elif reward_shaper_type == 'safety':
+        return {
+            'collision_penalty': -200.0,
+            'out_of_bounds_penalty': -150.0,
+            'smooth_driving_reward': 2.0,
+            'checkpoint_bonus': 100.0
+        }
+    # balanced (default)
+    return {
+        'checkpoint_reward': 100.0,
+        'collision_penalty': -50.0,
+        'speed_reward_factor': 0.5,
+        'progress_reward_factor': 1.0,
+        'out_of_bounds_penalty': -100.0,
+        'stability_reward': 1.0
+    }
+
+
 class CorridaEnv(gym.Env):
     """Ambiente de corrida customizado para RL.
 
     Args:
         map_type (str): Tipo de mapa ('corridor' ou 'curve').
         car_stats (dict): Stats do carro {'accel': 0.5, 'turn_speed': 5.0, 'max_speed': 20.0}
+        lidar_mode (str): 'march' (20 amostras, original) ou 'exact' (ray casting analítico).
+            Se None, usa LIDAR_MODE do config.
+        use_raster (bool): Se True, colisões e Lidar consultam o raster pré-computado do mapa
+            (ver track_raster). Se None, usa TRACK_RASTER do config.
+        fast_path (bool): Se True, step/reset escrevem em buffers pré-alocados e não alocam
+            objetos em regime (ver _step_fast). Se None, usa FAST_PATH do config.
+        reward_trace (bool): Se True, acumula cada componente da recompensa no episódio e o
+            devolve em info["reward_components"] ao final. Se None, usa REWARD_TRACE do config.
     """
-    def __init__(self, map_type="corridor", car_stats=None, reward_shaper_type='balanced', reward_config=None):
+    def __init__(self, map_type="corridor", car_stats=None, reward_shaper_type='balanced', reward_config=None, lidar_mode=None,
+                 use_raster=None, fast_path=None, reward_trace=None):
         self.width = int(800 * ENV_SCALE)
         self.height = int(600 * ENV_SCALE)
         self.map_type = map_type
@@ -40,7 +85,13 @@ class CorridaEnv(gym.Env):
         self.last_angle = None
         self.last_angle_pos = None
         self.n_lidar = 8  # 8 sensores Lidar a cada 45 graus
+        self.lidar_mode = lidar_mode or LIDAR_MODE
+        if self.lidar_mode not in lidar.LIDAR_MODES:
+            raise ValueError(f"Modo de Lidar desconhecido: {self.lidar_mode}. Opções: {list(lidar.LIDAR_MODES)}")
         self.randomize_checkpoint = False  # Garante que sempre existe
+        self.use_raster = TRACK_RASTER if use_raster is None else use_raster
+        self.track_raster = None
+        self.fast_path = FAST_PATH if fast_path is None else fast_path
         
         # NOVO: Mecanismos anti-loop
         self.position_history = []  # Track das últimas posições
@@ -56,33 +107,17 @@ class CorridaEnv(gym.Env):
         self.MAX_SPEED = self.car_stats["max_speed"]
         
         # Inicializa RewardShaper
-        if reward_shaper_type == 'speed':
-            config = reward_config or {
-                'speed_reward_factor': 2.0,
-                'collision_penalty': -100.0,
-                'checkpoint_bonus': 50.0
-            }
-        elif reward_shaper_type == 'safety':
-            config = reward_config or {
-                'collision_penalty': -200.0,
-                'out_of_bounds_penalty': -150.0,
-                'smooth_driving_reward': 2.0,
-                'checkpoint_bonus': 100.0
-            }
-        else:  # balanced (default)
-            config = reward_config or {
-                'checkpoint_reward': 100.0,
-                'collision_penalty': -50.0,
-                'speed_reward_factor': 0.5,
-                'progress_reward_factor': 1.0,
-                'out_of_bounds_penalty': -100.0,
-                'stability_reward': 1.0
-            }
+        config = reward_config or default_reward_config(reward_shaper_type)
         self.reward_shaper = RewardShapeFactory.create(reward_shaper_type, **config)
         self.last_velocity = 0.0
+        # Contadores por componente do episódio atual (None = rastreio desligado); o shaper soma
+        # seus termos no mesmo dict e o step acrescenta as penalidades do ambiente
+        self.reward_trace = {} if (REWARD_TRACE if reward_trace is None else reward_trace) else None
+        if self.reward_trace is not None:
+            self.reward_shaper.trace_components(self.reward_trace)
         
         # Inicializa loop detector
-        self.loop_detector = LoopDetector(history_size=100, threshold=0.7)
+        self.loop_detector = IncrementalLoopDetector(history_size=100, threshold=0.7)
 
         # Ações: [acelerar, frear, virar_esquerda, virar_direita]
         self.action_space = spaces.Discrete(4)
@@ -93,6 +128,30 @@ class CorridaEnv(gym.Env):
         self.observation_space = spaces.Box(low=low, high=high, dtype=np.float32)
 
         self._setup_map()
+        if self.fast_path:
+            self._init_fast_path()
+
+    def _init_fast_path(self):
+        """Pré-aloca buffers de observação, blocos de ruído e o dict de info do fast path.
+
+        São dois buffers de observação alternados: a observação terminal devolvida por step
+        continua válida depois do reset automático feito pelo DummyVecEnv.
+        """
+        obs_dim = self.observation_space.shape[0]
+        self._obs_bufs = (np.zeros(obs_dim, dtype=np.float32), np.zeros(obs_dim, dtype=np.float32))
+        self._obs_slot = 0
+        self._noise_rng = np.random.default_rng()
+        self._noise_block = np.empty((NOISE_BLOCK_STEPS, obs_dim), dtype=np.float32)
+        self._noise_rows = list(self._noise_block)  # Visões fixas de cada linha do bloco
+        self._noise_row = NOISE_BLOCK_STEPS  # Força a geração do primeiro bloco
+        self._lidar_max_dist = 100 * ENV_SCALE
+        self._lidar_samples = [float(d) for d in np.linspace(5, self._lidar_max_dist, num=20)]
+        self._info = {}
+        # Histórico de posições em anel (mesmo limite de 20 do step padrão), com entradas reaproveitadas
+        self._history_ring = [[0.0, 0.0] for _ in range(20)]
+        self._history_start = 0
+        self._history_len = 0
+        self._history_distance = 0.0
 
     def setup_checkpoints(self, map_type, randomize=False):
         """Centraliza a lógica de inicialização de checkpoints.
@@ -172,6 +231,8 @@ class CorridaEnv(gym.Env):
             self.barriers = []
         if self.map_type != "circle":
             self.checkpoints = self.setup_checkpoints(self.map_type)
+        # Compila a geometria em raster (em cache, compartilhado entre ambientes)
+        self.track_raster = get_track_raster(self, TRACK_RASTER_CELL) if self.use_raster else None
 
     def reset(self, randomize_checkpoint: bool = False, seed=None, options=None):
         """Reseta o ambiente para o início de um novo episódio.
@@ -213,14 +274,27 @@ class CorridaEnv(gym.Env):
         # Reset do reward shaper
         self.reward_shaper.reset()
         self.last_velocity = 0.0
+        if self.reward_trace is not None:
+            self.reward_trace.clear()
         # Reset do loop detector
         self.loop_detector.reset()
+        if self.fast_path:
+            if seed is not None:
+                self._noise_rng = np.random.default_rng(seed)
+                self._noise_row = NOISE_BLOCK_STEPS
+            self._history_start = 0
+            self._history_len = 0
+            self._history_distance = 0.0
+            return self._write_obs_fast(), {}
         # Sempre retorna observação completa (core + lidar) para compatibilidade com DummyVecEnv
         obs = self._get_obs(only_core=False)
         return np.array(obs, dtype=np.float32), {}
 
     def get_lidar_readings(self) -> np.ndarray:
         """Simula sensores Lidar em 8 direções (0, 45, ..., 315 graus)."""
+        if self.lidar_mode == "exact":
+            return lidar.lidar_readings(self, [self.car1_pos[0]], [self.car1_pos[1]], [self.car1_angle],
+                                        mode="exact", n_lidar=self.n_lidar)[0]
         max_dist = 100 * ENV_SCALE
         readings = []
         for i in range(self.n_lidar):
@@ -270,6 +344,8 @@ class CorridaEnv(gym.Env):
 
     def step(self, action: int):
          """Executa uma ação no ambiente e retorna o próximo estado."""
+         if self.fast_path:
+             return self._step_fast(action)
          self.current_step += 1
          self.episode_time += TIME_STEP
          
@@ -329,11 +405,13 @@ class CorridaEnv(gym.Env):
              if dist < 30 * ENV_SCALE and self.checkpoint_index not in self.checkpoints_reached:
                  self.checkpoints_reached.add(self.checkpoint_index)
                  success = True
-                 logger.info(f"[CHECKPOINT] Agente atingiu checkpoint {self.checkpoint_index + 1}/{len(self.checkpoints)} em dist={dist:.2f}")
+                 log_rate_limited(logger, logging.INFO, "checkpoint", "[CHECKPOINT] Agente atingiu checkpoint %d/%d em dist=%.2f",
+                                  self.checkpoint_index + 1, len(self.checkpoints), dist)
                  self.checkpoint_index += 1
                  
                  if self.checkpoint_index >= len(self.checkpoints):
-                     logger.info(f"[SUCESSO] Todos os {len(self.checkpoints)} checkpoints alcançados!")
+                     log_rate_limited(logger, logging.INFO, "sucesso", "[SUCESSO] Todos os %d checkpoints alcançados!",
+                                      len(self.checkpoints))
                      done = True
          
          # Usa RewardShaper para computar recompensa
@@ -356,18 +434,22 @@ class CorridaEnv(gym.Env):
              reward -= 50.0
              done = True
              collisions = 1
+             if self.reward_trace is not None:
+                 self._add_trace('off_track', -50.0)
          
          # ===== DETECÇÃO DE LOOP/INATIVIDADE (com FFT-based detection) =====
          if self.current_step % 10 == 0:
              self.position_history.append(self.car1_pos.copy())
-             self.loop_detector.add_position(tuple(self.car1_pos))
              if len(self.position_history) > 20:
                  self.position_history.pop(0)
          
-         # Detecção de loop usando múltiplos métodos
+         # Detecção de loop usando múltiplos métodos (o detector incremental só reavalia
+         # quando position_history ganha uma nova posição)
          if self.loop_detector.detect_loop(self.position_history):
              self.progress_counter += 2  # Contagem mais agressiva
              reward -= 5.0  # Penalidade forte por loop detectado
+             if self.reward_trace is not None:
+                 self._add_trace('loop', -5.0)
          elif len(self.position_history) >= 2:
              total_distance = 0
              for i in range(1, len(self.position_history)):
@@ -377,12 +459,16 @@ class CorridaEnv(gym.Env):
              if total_distance < self.min_progress_distance:
                  self.progress_counter += 1
                  reward -= 0.2  # Penalidade crescente por inatividade
+                 if self.reward_trace is not None:
+                     self._add_trace('idle', -0.2)
              else:
                  self.progress_counter = 0
          
          if self.progress_counter > self.max_steps_without_progress:
              reward -= 10.0
              done = True
+             if self.reward_trace is not None:
+                 self._add_trace('stall', -10.0)
          
          # ===== LIMITE DE TEMPO =====
          if self.episode_time >= MAX_EPISODE_TIME or self.current_step >= self.max_steps:
@@ -397,8 +483,216 @@ class CorridaEnv(gym.Env):
              "success": success,
              "progress": self.progress_counter
          }
+         if done and self.reward_trace is not None:
+             info["reward_components"] = dict(self.reward_trace)
          return obs, reward, done, False, info
 
+    def _add_trace(self, name, value):
+        """Acumula value no contador do componente name do episódio atual."""
+        self.reward_trace[name] = self.reward_trace.get(name, 0.0) + value
+
+    def _on_corridor_xy(self, x, y):
+        """is_on_corridor para floats Python, sem criar listas nem escalares NumPy."""
+        if self.track_raster is not None:
+            return self.track_raster.contains(x, y)
+        if self.map_type == "circle":
+            cx, cy = self.circle_center
+            dist = math.sqrt((x - cx)**2 + (y - cy)**2)
+            # Mesma tolerância de np.isclose(dist, r_out, atol=1e-6) (rtol padrão 1e-5)
+            if abs(dist - self.circle_r_out) <= 1e-6 + 1e-5 * abs(self.circle_r_out):
+                return False
+            return self.circle_r_in <= dist < self.circle_r_out
+        for bx, by, bw, bh in self.barriers:
+            if bx <= x <= bx + bw and by <= y <= by + bh:
+                return False
+        if self.corridor_rect:
+            x0, y0, w, h = self.corridor_rect
+            if not (x0 <= x <= x0 + w and y0 <= y <= y0 + h):
+                return False
+        return True
+
+    def _write_obs_fast(self):
+        """Escreve a observação no próximo buffer pré-alocado e o retorna.
+
+        Returns:
+            np.ndarray: Buffer float32 reutilizado a cada duas chamadas (copie se for guardar).
+        """
+        self._obs_slot ^= 1
+        obs = self._obs_bufs[self._obs_slot]
+        if not self.checkpoints:
+            cx, cy = 0, 0
+        elif self.checkpoint_index >= len(self.checkpoints):
+            cx, cy = self.checkpoints[-1]
+        else:
+            cx, cy = self.checkpoints[self.checkpoint_index]
+        x, y = self.car1_pos
+        rad = math.radians(self.car1_angle)
+        obs[0] = x * self.width_norm
+        obs[1] = y * self.height_norm
+        obs[2] = self.car1_speed / 2.0
+        obs[3] = math.sin(rad)
+        obs[4] = math.cos(rad)
+        obs[5] = cx * self.width_norm
+        obs[6] = cy * self.height_norm
+        if self.lidar_mode == "exact":
+            obs[7:] = self.get_lidar_readings()
+        else:
+            max_dist = self._lidar_max_dist
+            for i in range(self.n_lidar):
+                rad = math.radians((self.car1_angle + i*45) % 360)
+                cos_a = math.cos(rad)
+                sin_a = math.sin(rad)
+                reading = 1.0
+                for d in self._lidar_samples:
+                    if not self._on_corridor_xy(x + d * cos_a, y + d * sin_a):
+                        reading = d / max_dist
+                        break
+                obs[7 + i] = reading
+        if OBS_NOISE_STD > 0:
+            if self._noise_row >= NOISE_BLOCK_STEPS:
+                self._noise_rng.standard_normal(out=self._noise_block, dtype=np.float32)
+                self._noise_block *= OBS_NOISE_STD
+                self._noise_row = 0
+            obs += self._noise_rows[self._noise_row]
+            self._noise_row += 1
+        return obs
+
+    def _push_history_fast(self):
+        """Empilha a posição atual no anel de histórico e recalcula a distância percorrida."""
+        ring = self._history_ring
+        size = len(ring)
+        if self._history_len < size:
+            entry = ring[(self._history_start + self._history_len) % size]
+            self._history_len += 1
+        else:
+            entry = ring[self._history_start]
+            self._history_start = (self._history_start + 1) % size
+        entry[0] = self.car1_pos[0]
+        entry[1] = self.car1_pos[1]
+        # Distância percorrida no histórico: só muda aqui, então fica em cache entre os pushes
+        total = 0.0
+        prev = ring[self._history_start]
+        i = 1
+        while i < self._history_len:
+            cur = ring[(self._history_start + i) % size]
+            dx = cur[0] - prev[0]
+            dy = cur[1] - prev[1]
+            total += math.sqrt(dx * dx + dy * dy)
+            prev = cur
+            i += 1
+        self._history_distance = total
+
+    def _step_fast(self, action):
+        """step sem alocações em regime, com a mesma dinâmica, recompensas e términos.
+
+        Diferenças em relação ao step padrão:
+            - A observação é escrita em um buffer pré-alocado e o dict de info é reutilizado;
+              ambos são sobrescritos nos passos seguintes.
+            - O RewardShaper recebe a própria lista car1_pos como position (somente leitura).
+            - O histórico de posições fica em um anel interno (position_history não é usado).
+              Ele tem no máximo 20 posições, abaixo de LoopDetector.MIN_HISTORY, então o
+              LoopDetector nunca detectaria loop e não é consultado.
+            - O ruído vem de blocos pré-gerados (float32) de um gerador próprio do ambiente.
+        """
+        self.current_step += 1
+        self.episode_time += TIME_STEP
+
+        # ===== FÍSICA DO CARRO =====
+        FRICTION = 0.98
+        if action == 0:
+            speed = self.car1_speed * FRICTION + self.ACCEL_FORCE
+        elif action == 1:
+            speed = self.car1_speed * FRICTION - self.ACCEL_FORCE
+        else:
+            speed = self.car1_speed * FRICTION
+        speed = max(-self.MAX_SPEED, min(speed, self.MAX_SPEED))
+        self.car1_speed = speed
+        if action == 2:
+            self.car1_angle = (self.car1_angle - self.TURN_SPEED) % 360
+        elif action == 3:
+            self.car1_angle = (self.car1_angle + self.TURN_SPEED) % 360
+        pos = self.car1_pos
+        if abs(speed) > 0.01:
+            rad = math.radians(self.car1_angle)
+            pos[0] += speed * math.cos(rad)
+            pos[1] += speed * math.sin(rad)
+
+        # ===== RECOMPENSAS =====
+        done = False
+        success = False
+        inside_corridor = self._on_corridor_xy(pos[0], pos[1])
+        progress = 0.0
+        if self.checkpoints and self.checkpoint_index < len(self.checkpoints):
+            checkpoint = self.checkpoints[self.checkpoint_index]
+            dist = math.sqrt((pos[0] - checkpoint[0])**2 + (pos[1] - checkpoint[1])**2)
+            if self.prev_dist_to_checkpoint is not None:
+                progress = (self.prev_dist_to_checkpoint - dist) / 100.0
+            self.prev_dist_to_checkpoint = dist
+            if dist < 30 * ENV_SCALE and self.checkpoint_index not in self.checkpoints_reached:
+                self.checkpoints_reached.add(self.checkpoint_index)
+                success = True
+                log_rate_limited(logger, logging.INFO, "checkpoint", "[CHECKPOINT] Agente atingiu checkpoint %d/%d em dist=%.2f",
+                                 self.checkpoint_index + 1, len(self.checkpoints), dist)
+                self.checkpoint_index += 1
+                if self.checkpoint_index >= len(self.checkpoints):
+                    log_rate_limited(logger, logging.INFO, "sucesso", "[SUCESSO] Todos os %d checkpoints alcançados!",
+                                     len(self.checkpoints))
+                    done = True
+
+        reward = self.reward_shaper.compute_reward(
+            position=pos,
+            velocity=speed,
+            angle=self.car1_angle,
+            checkpoint_idx=self.checkpoint_index,
+            total_checkpoints=len(self.checkpoints),
+            collision=not inside_corridor,
+            out_of_bounds=not inside_corridor,
+            progress=progress,
+            last_velocity=self.last_velocity
+        )
+        self.last_velocity = speed
+        collisions = 0
+        if not inside_corridor:
+            reward -= 50.0
+            done = True
+            collisions = 1
+            if self.reward_trace is not None:
+                self._add_trace('off_track', -50.0)
+
+        # ===== DETECÇÃO DE LOOP/INATIVIDADE =====
+        if self.current_step % 10 == 0:
+            self._push_history_fast()
+        if self._history_len >= 2:
+            if self._history_distance < self.min_progress_distance:
+                self.progress_counter += 1
+                reward -= 0.2
+                if self.reward_trace is not None:
+                    self._add_trace('idle', -0.2)
+            else:
+                self.progress_counter = 0
+        if self.progress_counter > self.max_steps_without_progress:
+            reward -= 10.0
+            done = True
+            if self.reward_trace is not None:
+                self._add_trace('stall', -10.0)
+
+        # ===== LIMITE DE TEMPO =====
+        if self.episode_time >= MAX_EPISODE_TIME or self.current_step >= self.max_steps:
+            done = True
+
+        # ===== RETORNO =====
+        info = self._info
+        if len(info) != 5:
+            info.clear()  # Wrappers (Monitor, DummyVecEnv) podem ter adicionado chaves
+        info["collisions"] = collisions
+        info["episode_time"] = self.episode_time
+        info["checkpoint"] = self.checkpoint_index
+        info["success"] = success
+        info["progress"] = self.progress_counter
+        if done and self.reward_trace is not None:
+            info["reward_components"] = dict(self.reward_trace)
+        return self._write_obs_fast(), reward, done, False, info
+
     def is_on_corridor(self, pos):
         """Verifica se uma posição está dentro do corredor e fora das barreiras.
 
@@ -408,6 +702,8 @@ class CorridaEnv(gym.Env):
             bool: True se está no corredor, False caso contrário.
         """
         x, y = pos
+        if self.track_raster is not None:
+            return self.track_raster.contains(x, y)
         if self.map_type == "circle":
             cx, cy = 400 * ENV_SCALE, 300 * ENV_SCALE
             dist = np.sqrt((x - cx)**2 + (y - cy)**2)
@@ -430,6 +726,43 @@ class CorridaEnv(gym.Env):
                 return False
         return True
 
+    def is_on_corridor_batch(self, xs, ys):
+        """Versão vetorizada de is_on_corridor para vários pontos de uma vez.
+
+        Args:
+            xs (np.ndarray): Coordenadas x (qualquer formato).
+            ys (np.ndarray): Coordenadas y (mesmo formato de xs).
+        Returns:
+            np.ndarray: Máscara booleana, True onde o ponto está no corredor.
+        """
+        if self.track_raster is not None:
+            return self.track_raster.lookup(xs, ys)
+        return self.is_on_corridor_exact(xs, ys)
+
+    def is_on_corridor_exact(self, xs, ys):
+        """Teste geométrico exato (sem raster) de vários pontos; usado para compilar o raster.
+
+        Args:
+            xs (np.ndarray): Coordenadas x (qualquer formato).
+            ys (np.ndarray): Coordenadas y (mesmo formato de xs).
+        Returns:
+            np.ndarray: Máscara booleana, True onde o ponto está no corredor.
+        """
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        if self.map_type == "circle":
+            cx, cy = 400 * ENV_SCALE, 300 * ENV_SCALE
+            dist = np.sqrt((xs - cx)**2 + (ys - cy)**2)
+            inside = (self.circle_r_in <= dist) & (dist < self.circle_r_out)
+            return inside & ~np.isclose(dist, self.circle_r_out, atol=1e-6)
+        inside = np.ones(np.broadcast(xs, ys).shape, dtype=bool)
+        for bx, by, bw, bh in self.barriers:
+            inside &= ~((bx <= xs) & (xs <= bx + bw) & (by <= ys) & (ys <= by + bh))
+        if self.corridor_rect:
+            x0, y0, w, h = self.corridor_rect
+            inside &= (x0 <= xs) & (xs <= x0 + w) & (y0 <= ys) & (ys <= y0 + h)
+        return inside
+
     def angle_to_checkpoint(self):
         """Calcula o menor ângulo entre o carro e o próximo checkpoint.
 
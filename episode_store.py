@@ -0,0 +1,274 @@
+"""Armazenamento colunar e binário dos episódios de uma sessão de treino.
+
+Cada episódio finalizado vira uma entrada do índice (ambiente, sucesso, tempo, score,
+tamanho de cada coluna) e seus arrays por passo (recompensas, colisões, ações,
+checkpoints) são concatenados, já tipados, em chunks .npz. A escrita é em lote: os
+episódios ficam em memória até completar um chunk (ou passar o intervalo de flush),
+o chunk é gravado num .tmp e renomeado (leitores nunca veem arquivo parcial), com
+fsync periódico; os stores ainda abertos são fechados (gravando o chunk pendente) ao
+encerrar o processo. O leitor monta o índice em pandas e os arrays em NumPy sem parsear
+texto; convert_text_logs importa os antigos treinados_sucesso_*.txt / incompletos_*.txt.
+"""
+import argparse
+import atexit
+import glob
+import os
+import re
+import time
+import numpy as np
+import pandas as pd
+from config import EPISODE_CHUNK_EPISODES, EPISODE_FSYNC_CHUNKS, EPISODE_FLUSH_SECONDS
+
+# Colunas por passo e seus tipos no disco
+EPISODE_COLUMNS = {
+    "rewards": np.float32,
+    "collisions": np.int32,
+    "actions": np.int16,
+    "checkpoints": np.int32,
+}
+CHUNK_PATTERN = "chunk_*.npz"
+
+
+def _chunk_paths(directory):
+    return sorted(glob.glob(os.path.join(directory, CHUNK_PATTERN)))
+
+
+class EpisodeStore:
+    """Escritor em lote de episódios para um diretório de chunks colunares.
+
+    Args:
+        directory (str): Diretório dos chunks (criado se não existir). Se já tiver
+            chunks, a numeração de chunks e episódios continua de onde parou.
+        chunk_episodes (int): Episódios por chunk.
+        fsync_every (int): Faz fsync a cada N chunks gravados (e sempre no close).
+        flush_interval (float): Grava o chunk pendente se o último flush foi há mais
+            que estes segundos, mesmo incompleto (limita a perda num crash).
+    """
+    def __init__(self, directory, chunk_episodes=EPISODE_CHUNK_EPISODES, fsync_every=EPISODE_FSYNC_CHUNKS,
+                 flush_interval=EPISODE_FLUSH_SECONDS):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.chunk_episodes = chunk_episodes
+        self.fsync_every = max(1, fsync_every)
+        self.flush_interval = flush_interval
+        existing = _chunk_paths(directory)
+        self.chunks = len(existing)
+        self.episodes = 0
+        for path in existing:
+            with np.load(path) as chunk:
+                self.episodes += len(chunk["episode"])
+        self._pending = []
+        self._last_flush = time.monotonic()
+        _open_stores.add(self)
+
+    def add(self, env_idx, rewards, collisions, actions=None, checkpoints=None, episode_time=None, success=True):
+        """Enfileira um episódio finalizado (copia os arrays).
+
+        Args:
+            env_idx (int): Ambiente que gerou o episódio.
+            rewards (array-like): Recompensa de cada passo.
+            collisions (array-like): Colisões de cada passo.
+            actions (array-like): Ações de cada passo (opcional).
+            checkpoints (array-like): Checkpoint de cada passo (opcional).
+            episode_time (float): Tempo do episódio em segundos (opcional).
+            success (bool): Se o episódio foi bem-sucedido.
+        Returns:
+            int: Número do episódio na sessão.
+        """
+        values = {"rewards": rewards, "collisions": collisions, "actions": actions, "checkpoints": checkpoints}
+        columns = {name: np.array(values[name] if values[name] is not None else (), dtype=dtype).ravel()
+                   for name, dtype in EPISODE_COLUMNS.items()}
+        episode = self.episodes
+        self._pending.append((episode, int(env_idx), bool(success),
+                              np.nan if episode_time is None else float(episode_time),
+                              float(np.sum(columns["rewards"], dtype=np.float64)), columns))
+        self.episodes += 1
+        if (len(self._pending) >= self.chunk_episodes
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+        return episode
+
+    def flush(self, sync=False):
+        """Grava os episódios pendentes como um novo chunk.
+
+        Args:
+            sync (bool): Força o fsync deste chunk.
+        """
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        episodes, envs, successes, times, scores, columns = zip(*self._pending)
+        payload = {
+            "episode": np.array(episodes, dtype=np.int64),
+            "env": np.array(envs, dtype=np.int32),
+            "success": np.array(successes, dtype=bool),
+            "episode_time": np.array(times, dtype=np.float32),
+            "score": np.array(scores, dtype=np.float64),
+        }
+        for name, dtype in EPISODE_COLUMNS.items():
+            arrays = [c[name] for c in columns]
+            payload[name] = np.concatenate(arrays) if arrays else np.zeros(0, dtype=dtype)
+            payload[f"{name}_len"] = np.array([len(a) for a in arrays], dtype=np.int64)
+        path = os.path.join(self.directory, f"chunk_{self.chunks:06d}.npz")
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **payload)
+            f.flush()
+            if sync or (self.chunks + 1) % self.fsync_every == 0:
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+        self.chunks += 1
+        self._pending = []
+
+    def close(self):
+        """Grava o que estiver pendente, com fsync."""
+        self.flush(sync=True)
+        _open_stores.discard(self)
+
+
+# Stores não fechados: close_stores grava o chunk pendente de cada um ao encerrar o processo
+_open_stores = set()
+
+
+def close_stores():
+    """Fecha todos os EpisodeStore ainda abertos."""
+    for store in list(_open_stores):
+        store.close()
+
+
+atexit.register(close_stores)
+
+
+class EpisodeLog:
+    """Episódios de uma sessão carregados dos chunks.
+
+    Attributes:
+        index (pd.DataFrame): Uma linha por episódio: episode, env, success,
+            episode_time, score e o tamanho de cada coluna (<coluna>_len).
+        columns (dict): Nome da coluna -> array concatenado de todos os episódios.
+    """
+    def __init__(self, index, columns):
+        self.index = index
+        self.columns = columns
+        self._offsets = {name: np.concatenate(([0], np.cumsum(index[f"{name}_len"].to_numpy())))
+                         for name in columns}
+
+    def __len__(self):
+        return len(self.index)
+
+    def episode(self, i):
+        """Arrays por passo do i-ésimo episódio (posição no índice).
+
+        Returns:
+            dict: Nome da coluna -> np.ndarray (visão dos arrays concatenados).
+        """
+        return {name: values[self._offsets[name][i]:self._offsets[name][i + 1]]
+                for name, values in self.columns.items()}
+
+    def step_frame(self, column="rewards"):
+        """DataFrame longo (episode, step, <column>) com todos os passos de uma coluna."""
+        lengths = self.index[f"{column}_len"].to_numpy()
+        episodes = np.repeat(self.index["episode"].to_numpy(), lengths)
+        steps = np.arange(len(episodes)) - np.repeat(self._offsets[column][:-1], lengths)
+        return pd.DataFrame({"episode": episodes, "step": steps, column: self.columns[column]})
+
+
+def load_episodes(directory):
+    """Carrega todos os chunks de um diretório de episódios.
+
+    Args:
+        directory (str): Diretório do EpisodeStore (ou o diretório da sessão que o contém
+            em "episodes").
+    Returns:
+        EpisodeLog: Índice e colunas (vazios se não houver chunks).
+    """
+    if not _chunk_paths(directory) and os.path.isdir(os.path.join(directory, "episodes")):
+        directory = os.path.join(directory, "episodes")
+    index_parts = []
+    column_parts = {name: [] for name in EPISODE_COLUMNS}
+    for path in _chunk_paths(directory):
+        with np.load(path) as chunk:
+            part = {key: chunk[key] for key in ("episode", "env", "success", "episode_time", "score")}
+            for name in EPISODE_COLUMNS:
+                part[f"{name}_len"] = chunk[f"{name}_len"]
+                column_parts[name].append(chunk[name])
+            index_parts.append(pd.DataFrame(part))
+    if index_parts:
+        index = pd.concat(index_parts, ignore_index=True)
+    else:
+        index = pd.DataFrame({key: [] for key in ("episode", "env", "success", "episode_time", "score")}
+                             | {f"{name}_len": np.zeros(0, dtype=np.int64) for name in EPISODE_COLUMNS})
+    columns = {name: np.concatenate(parts) if parts else np.zeros(0, dtype=EPISODE_COLUMNS[name])
+               for name, parts in column_parts.items()}
+    return EpisodeLog(index, columns)
+
+
+_TEXT_FIELDS = {"Recompensas": "rewards", "Colisões": "collisions", "Ações": "actions", "Checkpoints": "checkpoints"}
+_NUMBER = re.compile(r"nan|-?inf|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?|True|False")
+_NUMPY_REPR = re.compile(r"np\.\w+\(")
+
+
+def _parse_numbers(text):
+    """Números de uma lista em repr Python (aceita reprs np.float32(...) do NumPy 2)."""
+    text = _NUMPY_REPR.sub("", text)
+    return [float(t == "True") if t in ("True", "False") else float(t) for t in _NUMBER.findall(text)]
+
+
+def parse_text_log(path):
+    """Lê um log de texto do TrainingLogger antigo.
+
+    Args:
+        path (str): treinados_sucesso_*.txt ou incompletos_*.txt.
+    Returns:
+        list: Um dict por episódio, com os argumentos de EpisodeStore.add.
+    """
+    episodes = []
+    current = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            match = re.match(r"Episódio (\d+):$", line)
+            if match:
+                current = {"env_idx": int(match.group(1)), "rewards": [], "collisions": []}
+                continue
+            if current is None:
+                continue
+            key, _, value = line.partition(": ")
+            if key in _TEXT_FIELDS:
+                current[_TEXT_FIELDS[key]] = _parse_numbers(value)
+            elif key == "Tempo do episódio":
+                current["episode_time"] = float(value.rstrip("s"))
+            elif key == "Sucesso":
+                current["success"] = value.strip() == "True"
+            elif line.startswith("-" * 10):
+                episodes.append(current)
+                current = None
+    return episodes
+
+
+def convert_text_logs(session_dir, store_dir=None):
+    """Converte os logs de texto de uma sessão para o formato colunar.
+
+    Args:
+        session_dir (str): Diretório sessao_* com os arquivos .txt.
+        store_dir (str): Destino dos chunks (padrão: session_dir/episodes).
+    Returns:
+        int: Episódios convertidos.
+    """
+    store = EpisodeStore(store_dir or os.path.join(session_dir, "episodes"))
+    count = 0
+    for pattern in ("treinados_sucesso_*.txt", "incompletos_*.txt"):
+        for path in sorted(glob.glob(os.path.join(session_dir, pattern))):
+            for episode in parse_text_log(path):
+                store.add(**episode)
+                count += 1
+    store.close()
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converte logs de texto de sessões para o formato colunar")
+    parser.add_argument("sessions", nargs="+", help="Diretórios logs/sessao_*")
+    args = parser.parse_args()
+    for session in args.sessions:
+        print(f"{session}: {convert_text_logs(session)} episódios convertidos")
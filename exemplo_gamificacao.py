@@ -94,13 +94,14 @@ def exemplo_4_sistema_de_upgrades():
     agente = AgentInfo(nome="SpeedBot", tipo="DQN")
     
     # Simular histórico com XP
-    agente.historico = [
+    for entry in [
         {"xp_gained": 100, "tipo_evento": "treino"},
         {"xp_gained": 150, "tipo_evento": "simulacao"},
         {"xp_gained": 80, "tipo_evento": "simulacao"},
-    ]
+    ]:
+        agente.add_history(entry)
     
-    total_xp = sum(h.get('xp_gained', 0) for h in agente.historico)
+    total_xp = agente.total_xp
     print(f"Agente: {agente.nome}")
     print(f"Total XP: {total_xp}")
     print(f"Nível: {GamificationSystem.calculate_level(total_xp)}")
@@ -132,10 +133,11 @@ def exemplo_5_achievements():
     print("="*60)
     
     agente = AgentInfo(nome="AchievementHunter", tipo="SAC", level=10)
-    agente.historico = [
+    for entry in [
         {"checkpoints": 1, "mapa": "corridor", "tempo": 8.5},  # Speedrun
         {"checkpoints": 2, "mapa": "corridor"},
-    ]
+    ]:
+        agente.add_history(entry)
     
     print(f"Agente: {agente.nome} (Nível {agente.level})")
     print("\nAchievements desbloqueados:")
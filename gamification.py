@@ -8,7 +8,8 @@ Implementa:
 """
 
 import math
-from interface_agents import AgentInfo, load_agents, save_agents
+from interface_agents import AgentInfo
+from agent_store import get_agent_store
 
 class GamificationSystem:
     """Sistema completo de gamificação para agentes RL."""
@@ -92,7 +93,7 @@ class GamificationSystem:
             return False, "Upgrade não encontrado"
         
         upgrade_config = GamificationSystem.UPGRADES[upgrade_name]
-        total_xp = sum(h.get('xp_gained', 0) for h in agent_info.historico)
+        total_xp = agent_info.total_xp
         
         # Verifica XP
         if total_xp < upgrade_config["custo_xp"]:
@@ -150,22 +151,18 @@ class GamificationSystem:
         
         Isso é chamado ao final de cada corrida/treino.
         """
-        agents = [AgentInfo.from_dict(a) for a in load_agents()]
-        agent = next((a for a in agents if a.nome == agent_name), None)
+        store = get_agent_store()
+        record = store.find(agent_name)
         
-        if not agent:
+        if not record:
             return None
+        agent = AgentInfo.from_dict(record)
         
-        # Calcula XP total
-        total_xp = sum(h.get('xp_gained', 0) for h in agent.historico)
-        agent.level = GamificationSystem.calculate_level(total_xp)
+        # XP total vem dos agregados (O(1), independente do tamanho do histórico)
+        agent.level = GamificationSystem.calculate_level(agent.total_xp)
         
-        # Salva atualização
-        agents_dicts = [a.to_dict() for a in agents]
-        agent_dict = next((a for a in agents_dicts if a["nome"] == agent_name), None)
-        if agent_dict:
-            agent_dict["level"] = agent.level
-            save_agents(agents_dicts)
+        # Salva atualização (só o campo alterado; gravação adiada pelo AgentStore)
+        store.update({"nome": agent_name, "level": agent.level})
         
         return agent
 
@@ -206,14 +203,14 @@ class Achievement:
         if achievement_id not in Achievement.ACHIEVEMENTS:
             return False
         
-        total_xp = sum(h.get('xp_gained', 0) for h in agent_info.historico)
+        agregados = agent_info.agregados
         
         if achievement_id == "primeiro_checkpoint":
-            return any(h.get("checkpoints", 0) > 0 for h in agent_info.historico)
+            return agregados.max_checkpoints > 0
         elif achievement_id == "perfeito_corridor":
-            return any(h.get("checkpoints", 0) >= 1 and h.get("mapa") == "corridor" for h in agent_info.historico)
+            return agregados.map_best("corridor").get("max_checkpoints", 0) >= 1
         elif achievement_id == "speedrun":
-            return any(h.get("tempo", float('inf')) < 10 for h in agent_info.historico)
+            return agregados.best_time is not None and agregados.best_time < 10
         elif achievement_id == "nivel_10":
             return agent_info.level >= 10
         elif achievement_id == "upgrade_completo":
@@ -0,0 +1,128 @@
+"""Históricos por ambiente em buffers circulares NumPy, de tamanho fixo.
+
+Substitui as listas que cresciam sem limite no loop de treino: cada ambiente grava
+uma amostra por passo numa linha de um array [n_envs, capacity], com somas correntes
+do episódio atual e janelas baratas das últimas amostras.
+"""
+import numpy as np
+from config import HISTORY_CAPACITY
+
+
+class EpisodeHistory:
+    """Histórico circular de uma grandeza, uma linha por ambiente.
+
+    As amostras antigas são sobrescritas quando a capacidade é atingida; a soma e a
+    contagem do episódio atual continuam exatas (são acumuladas à parte) até
+    end_episode.
+
+    Args:
+        n_envs (int): Número de ambientes (linhas).
+        capacity (int): Amostras guardadas por ambiente.
+        dtype (np.dtype): Tipo das amostras.
+
+    Attributes:
+        totals (np.ndarray): int64 [n_envs], amostras gravadas desde a criação ou clear.
+        sums (np.ndarray): float64 [n_envs], soma das amostras do episódio atual.
+        counts (np.ndarray): int64 [n_envs], amostras do episódio atual.
+    """
+    def __init__(self, n_envs, capacity=HISTORY_CAPACITY, dtype=np.float64):
+        self.n_envs = int(n_envs)
+        self.capacity = int(capacity)
+        self._data = np.zeros((self.n_envs, self.capacity), dtype=dtype)
+        self._rows = np.arange(self.n_envs)
+        self.totals = np.zeros(self.n_envs, dtype=np.int64)
+        self.sums = np.zeros(self.n_envs, dtype=np.float64)
+        self.counts = np.zeros(self.n_envs, dtype=np.int64)
+
+    def __len__(self):
+        return self.n_envs
+
+    def append(self, values):
+        """Grava uma amostra de cada ambiente (O(1) por ambiente, vetorizado).
+
+        Args:
+            values (array-like): [n_envs] valores do passo.
+        """
+        values = np.asarray(values)
+        self._data[self._rows, self.totals % self.capacity] = values
+        self.sums += values
+        self.counts += 1
+        self.totals += 1
+
+    def append_env(self, idx, value):
+        """Grava uma amostra só do ambiente idx."""
+        self._data[idx, self.totals[idx] % self.capacity] = value
+        self.sums[idx] += value
+        self.counts[idx] += 1
+        self.totals[idx] += 1
+
+    def end_episode(self, idx):
+        """Encerra o episódio do ambiente idx: zera soma e contagem (as amostras ficam no anel)."""
+        self.sums[idx] = 0.0
+        self.counts[idx] = 0
+
+    def clear(self):
+        """Descarta todas as amostras e episódios."""
+        self.totals[:] = 0
+        self.sums[:] = 0.0
+        self.counts[:] = 0
+
+    def window(self, idx, n=None):
+        """Últimas n amostras do ambiente idx, da mais antiga para a mais recente.
+
+        Args:
+            idx (int): Ambiente.
+            n (int): Tamanho da janela (None = tudo o que o anel guarda).
+        Returns:
+            np.ndarray: Visão (sem cópia) quando a janela é contígua no anel; cópia caso contrário.
+        """
+        total = int(self.totals[idx])
+        available = min(total, self.capacity)
+        n = available if n is None else max(0, min(int(n), available))
+        start = (total - n) % self.capacity
+        if start + n <= self.capacity:
+            return self._data[idx, start:start + n]
+        return np.concatenate((self._data[idx, start:], self._data[idx, :start + n - self.capacity]))
+
+    def episode(self, idx):
+        """Amostras do episódio atual do ambiente idx (as últimas capacity, se for mais longo)."""
+        return self.window(idx, self.counts[idx])
+
+    def episode_sum(self, idx):
+        """Soma exata das amostras do episódio atual do ambiente idx."""
+        return float(self.sums[idx])
+
+    def episode_mean(self, idx):
+        """Média das amostras do episódio atual do ambiente idx (0.0 se vazio)."""
+        count = self.counts[idx]
+        return float(self.sums[idx] / count) if count else 0.0
+
+    def last(self, idx, default=0):
+        """Amostra mais recente do episódio atual do ambiente idx (default se vazio)."""
+        if not self.counts[idx]:
+            return default
+        return self._data[idx, (self.totals[idx] - 1) % self.capacity].item()
+
+    def mean_range(self, start, stop):
+        """Média entre ambientes das amostras de índice absoluto [start, stop).
+
+        Amostras que um ambiente ainda não gravou (ou que já saíram do anel) contam como 0,
+        como na média dos históricos em lista.
+
+        Returns:
+            np.ndarray: float64 [stop - start].
+        """
+        steps = np.arange(start, stop)
+        totals = self.totals[:, None]
+        valid = (steps[None, :] < totals) & (steps[None, :] >= totals - self.capacity)
+        values = self._data[:, steps % self.capacity]
+        return np.where(valid, values, 0).sum(axis=0) / self.n_envs
+
+    def recent_mean(self, n):
+        """Média das últimas n amostras de todos os ambientes juntos (0.0 se vazio)."""
+        n = min(int(n), self.capacity)
+        steps = np.arange(n)
+        valid = steps[None, :] < np.minimum(self.totals, n)[:, None]
+        cols = (self.totals[:, None] - 1 - steps[None, :]) % self.capacity
+        count = valid.sum()
+        return float(np.where(valid, self._data[self._rows[:, None], cols], 0).sum() / count) if count else 0.0
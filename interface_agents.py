@@ -1,10 +1,12 @@
 import pygame
 import os
-import json
 from interface_assets import load_icon, play_sound
+from agent_store import get_agent_store
+from agent_stats import AgentAggregates, record_total_xp
 
 class AgentInfo:
-    def __init__(self, nome, tipo, tempo_acumulado=0.0, modelo_path=None, historico=None, cor=(120,180,255), stats=None, level=1):
+    def __init__(self, nome, tipo, tempo_acumulado=0.0, modelo_path=None, historico=None, cor=(120,180,255), stats=None, level=1,
+                 agregados=None):
         self.nome = nome
         self.tipo = tipo
         self.tempo_acumulado = tempo_acumulado
@@ -14,6 +16,18 @@ class AgentInfo:
         self.level = level
         # Stats padrão: Aceleração, Turn, MaxSpeed
         self.stats = stats or {"accel": 0.5, "turn_speed": 5.0, "max_speed": 20.0}
+        # Agregados do histórico completo (agentes antigos: recalculados do historico salvo)
+        self.agregados = agregados or AgentAggregates.from_history(self.historico)
+
+    @property
+    def total_xp(self):
+        """XP acumulado em todo o histórico (O(1))."""
+        return self.agregados.total_xp
+
+    def add_history(self, entry):
+        """Acrescenta uma entrada ao historico e atualiza os agregados."""
+        self.historico.append(entry)
+        self.agregados.add(entry)
     
     def to_dict(self):
         return {
@@ -24,7 +38,8 @@ class AgentInfo:
             "historico": self.historico,
             "cor": self.cor,
             "level": self.level,
-            "stats": self.stats
+            "stats": self.stats,
+            "agregados": self.agregados.to_dict()
         }
     
     @staticmethod
@@ -34,7 +49,8 @@ class AgentInfo:
             d.get("modelo_path"), d.get("historico",[]), 
             tuple(d.get("cor",(120,180,255))),
             d.get("stats"),
-            d.get("level", 1)
+            d.get("level", 1),
+            AgentAggregates.from_dict(d["agregados"]) if "agregados" in d else None
         )
     
     def upgrade(self, stat_name):
@@ -48,14 +64,12 @@ class AgentInfo:
         self.level += 1
 
 def save_agents(agents, filename="agents.json"):
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(agents, f, ensure_ascii=False, indent=2)
+    """Salva a lista de agentes (dicts) via AgentStore: a escrita no disco é adiada e atômica."""
+    get_agent_store(filename).save(agents)
 
 def load_agents(filename="agents.json"):
-    if os.path.exists(filename):
-        with open(filename, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
+    """Lista de agentes (dicts) a partir do AgentStore em memória, sem reler o JSON a cada chamada."""
+    return get_agent_store(filename).load()
 
 # Agent management UI methods moved from interface.py
 
@@ -118,7 +132,7 @@ def draw_gestao_agentes(screen, width, height, agents, gestao_btn_novo, gestao_a
         card.blit(tipo_font.render(tempo, True, (60,60,60)), (200, 45))
         
         # XP total (gamificação)
-        total_xp = sum(h.get('xp_gained', 0) for h in ag_dict.get('historico', []))
+        total_xp = record_total_xp(ag_dict)
         level = max(1, int(total_xp / 100) + 1)  # 1 nível a cada 100 XP
         xp_display = f"Nível {level} ({total_xp} XP)"
         card.blit(tipo_font.render(xp_display, True, (180,120,60)), (380, 12))
@@ -237,13 +251,12 @@ def treinar_agente(agents, idx, map_type="corridor"):
      
      # 3. Carrega/cria modelo
      model_path_base = ag.modelo_path.replace(".zip", "")
-     agent = Agent(env, model_path=model_path_base, learning_rate=0.0003, gamma=0.98)
-     
      if os.path.exists(ag.modelo_path):
          print(f"[TREINO] Carregando cérebro existente")
-         agent.load(ag.modelo_path)
+         agent = Agent.from_saved(ag.modelo_path, env, model_path=model_path_base)
      else:
          print(f"[TREINO] Criando novo cérebro")
+         agent = Agent(env, model_path=model_path_base, learning_rate=0.0003, gamma=0.98)
      
      # 4. Treina com feedback de progresso
      print("\n[TREINO] Executando episódios de treinamento...")
@@ -293,7 +306,7 @@ def treinar_agente(agents, idx, map_type="corridor"):
      ag.tempo_acumulado += elapsed
      xp_gained = int(episode_count * 10)  # 10 XP por episódio
      
-     ag.historico.append({
+     ag.add_history({
          "timestamp": time.time(),
          "duration": elapsed,
          "map": current_phase.map_type,
@@ -597,7 +610,7 @@ def excluir_agente(ag):
 def draw_comprar_upgrade_dialog(screen, width, height, agent_dict, upgrades, selected_idx, message):
     """Desenha o diálogo de compra de upgrades (sem loop bloqueante)."""
     agent = AgentInfo.from_dict(agent_dict)
-    total_xp = sum(h.get('xp_gained', 0) for h in agent.historico)
+    total_xp = agent.total_xp
     
     # Fundo
     screen.fill((240, 240, 250))
@@ -1,6 +1,10 @@
 import pygame
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_agg import FigureCanvasAgg
+from sparkline import MeanSeries, Sparkline
+
+DASHBOARD_WINDOW = 100  # Passos exibidos no gráfico do Dashboard
+SERIES_COLORS = [(31, 119, 180), (214, 39, 40), (255, 127, 14)]
+SERIES_LABELS = ["Recompensa", "Colisões", "Penalização"]
+
 
 class Dashboard:
     def __init__(self, screen, sim_width, dash_width, height):
@@ -8,44 +12,43 @@ class Dashboard:
         self.sim_width = sim_width
         self.dash_width = dash_width
         self.height = height
-        self.fig, self.ax = plt.subplots(figsize=(3, 2))
         self.update_counter = 0
+        # Séries agregadas (média entre ambientes) em anéis; o gráfico só é redesenhado com dados novos
+        self.series = [MeanSeries(DASHBOARD_WINDOW) for _ in SERIES_COLORS]
+        self.plot = Sparkline((280, 200), SERIES_COLORS, title="Desempenho Geral", labels=SERIES_LABELS)
+        self.grid_series = [MeanSeries(DASHBOARD_WINDOW) for _ in SERIES_COLORS]
+        self.grid_plot = Sparkline((300, 200), SERIES_COLORS, title="Desempenho Geral", labels=SERIES_LABELS)
+        self.metrics_plot = Sparkline((300, 200), SERIES_COLORS[:2], title="Performance",
+                                      labels=["Recompensa", "Colisões"])
+        self._font = None
+
+    def _get_font(self):
+        if self._font is None:
+            self._font = pygame.font.SysFont(None, 24)
+        return self._font
+
+    def _draw_graph(self, series, plot, hists, pos):
+        """Agrega as amostras novas dos históricos e desenha o gráfico em pos.
+
+        Args:
+            series (list): MeanSeries de cada curva.
+            plot (Sparkline): Painel reutilizado.
+            hists (tuple): Históricos por ambiente (ou SeriesTail) de cada curva.
+            pos (tuple): Posição do gráfico na tela.
+        """
+        for mean_series, hist in zip(series, hists):
+            mean_series.update(hist)
+        if len(series[0]):
+            self.screen.blit(plot.draw([s.ring for s in series]), pos)
 
     def draw_dashboard(self, rewards_hist, collisions_hist, penalties_hist, ciclo, avg_speed, n_dif, fase_desc, n_parallel, checkpoints):
         dash = pygame.Rect(self.sim_width, 0, self.dash_width, self.height)
         pygame.draw.rect(self.screen, (245,245,245), dash)
-        font = pygame.font.SysFont(None, 24)
-        # Gráfico matplotlib no topo do dashboard
+        font = self._get_font()
+        # Gráfico no topo do dashboard
         graph_y = 10
-        if rewards_hist and len(rewards_hist[0]) > 0:
-            n = len(rewards_hist)
-            maxlen = min(100, max(len(r) for r in rewards_hist))
-            avg_rewards = [sum([r[i] if i < len(r) else 0 for r in rewards_hist])/n for i in range(maxlen)]
-            avg_collisions = [sum([c[i] if i < len(c) else 0 for c in collisions_hist])/n for i in range(maxlen)]
-            fig, ax = plt.subplots(figsize=(2.8, 2.0), dpi=100)
-            ax.plot(avg_rewards, label="Recompensa média", color='tab:blue')
-            ax.plot(avg_collisions, label="Colisões médias", color='tab:red')
-            if penalties_hist:
-                avg_penalties = [sum([p[i] if i < len(p) else 0 for p in penalties_hist])/n for i in range(maxlen)]
-                ax.plot(avg_penalties, label="Penalização média", color='tab:orange')
-            ax.legend(fontsize=8, loc='upper right')
-            ax.set_title("Desempenho Geral", fontsize=10)
-            ax.set_xlabel("Ciclos")
-            ax.set_ylabel("Valor")
-            ax.grid(True, linestyle='--', alpha=0.3)
-            fig.tight_layout()
-            canvas = FigureCanvasAgg(fig)
-            canvas.draw()
-            renderer = canvas.get_renderer()
-            # Use buffer_rgba() instead of deprecated tostring_rgb()
-            raw_data = renderer.buffer_rgba()
-            size = canvas.get_width_height()
-            import numpy as np
-            data_array = np.frombuffer(raw_data, dtype=np.uint8).reshape((*size[::-1], 4))
-            rgb_array = data_array[:, :, :3]
-            surf = pygame.surfarray.make_surface(np.transpose(rgb_array, (1, 0, 2)))
-            self.screen.blit(surf, (self.sim_width+10, graph_y))
-            plt.close(fig)
+        self._draw_graph(self.series, self.plot, (rewards_hist, collisions_hist, penalties_hist),
+                         (self.sim_width+10, graph_y))
         # Info
         y = graph_y + 220
         lines = [
@@ -73,17 +76,7 @@ class Dashboard:
             rewards (list): Histórico de recompensas.
             collisions (list): Histórico de colisões.
         """
-        self.ax.clear()
-        self.ax.plot(rewards, label="Recompensa")
-        self.ax.plot(collisions, label="Colisões")
-        self.ax.legend()
-        self.ax.set_title("Performance")
-        canvas = FigureCanvasAgg(self.fig)
-        canvas.draw()
-        renderer = canvas.get_renderer()
-        raw_data = renderer.tostring_rgb()
-        size = canvas.get_width_height()
-        surf = pygame.image.fromstring(raw_data, size, "RGB")
+        surf = self.metrics_plot.draw([rewards, collisions])
         self.screen.blit(surf, (self.sim_width-250, 10))
 
     def draw_metrics_grid(self, rewards_hist, collisions_hist, penalties_hist=None):
@@ -94,41 +87,9 @@ class Dashboard:
             collisions_hist (list): Histórico de colisões.
             penalties_hist (list): Histórico de penalizações.
         """
-        n = len(rewards_hist)
-        if n == 0 or not any(rewards_hist):
-            return
-        # Filtra listas vazias
-        max_reward_len = max((len(r) for r in rewards_hist), default=0)
-        max_collision_len = max((len(c) for c in collisions_hist), default=0)
-        
-        if max_reward_len == 0:
-            return
-        
-        avg_rewards = [sum([r[i] if i < len(r) else 0 for r in rewards_hist])/n for i in range(max_reward_len)]
-        avg_collisions = [sum([c[i] if i < len(c) else 0 for c in collisions_hist])/n for i in range(max_collision_len)] if max_collision_len > 0 else []
-        self.ax.clear()
-        self.ax.plot(avg_rewards, label="Recompensa média", color='tab:blue')
-        if avg_collisions:
-            self.ax.plot(avg_collisions, label="Colisões médias", color='tab:red')
-        if penalties_hist and any(penalties_hist):
-            max_penalty_len = max((len(p) for p in penalties_hist), default=0)
-            if max_penalty_len > 0:
-                avg_penalties = [sum([p[i] if i < len(p) else 0 for p in penalties_hist])/n for i in range(max_penalty_len)]
-                self.ax.plot(avg_penalties, label="Penalização média", color='tab:orange')
-        self.ax.legend(fontsize=8, loc='upper right')
-        self.ax.set_title("Desempenho Geral", fontsize=10)
-        self.ax.set_xlabel("Ciclos")
-        self.ax.set_ylabel("Valor")
-        self.fig.set_size_inches(3, 2)
-        self.ax.grid(True, linestyle='--', alpha=0.3)
-        canvas = FigureCanvasAgg(self.fig)
-        canvas.draw()
-        renderer = canvas.get_renderer()
-        raw_data = renderer.tostring_rgb()
-        size = canvas.get_width_height()
-        surf = pygame.image.fromstring(raw_data, size, "RGB")
         # Blit do gráfico na área do dashboard à direita
-        self.screen.blit(surf, (self.sim_width+10, 30))
+        self._draw_graph(self.grid_series, self.grid_plot, (rewards_hist, collisions_hist, penalties_hist),
+                         (self.sim_width+10, 30))
 
     def draw_info(self, ciclo, avg_speed=0.0, n_dif=0):
         """Exibe informações textuais do episódio.
@@ -153,36 +114,11 @@ class Dashboard:
     def draw_dashboard_pygame(self, rewards_hist, collisions_hist, penalties_hist, ciclo, avg_speed, n_dif):
         dash = pygame.Rect(self.sim_width, 0, self.dash_width, self.height)
         pygame.draw.rect(self.screen, (245,245,245), dash)
-        font = pygame.font.SysFont(None, 24)
-        # Gráfico matplotlib no topo do dashboard
+        font = self._get_font()
+        # Gráfico no topo do dashboard
         graph_y = 10
-        if rewards_hist and len(rewards_hist[0]) > 0:
-            n = len(rewards_hist)
-            maxlen = min(100, max(len(r) for r in rewards_hist))
-            avg_rewards = [sum([r[i] if i < len(r) else 0 for r in rewards_hist])/n for i in range(maxlen)]
-            avg_collisions = [sum([c[i] if i < len(c) else 0 for c in collisions_hist])/n for i in range(maxlen)]
-            import matplotlib.pyplot as plt
-            from matplotlib.backends.backend_agg import FigureCanvasAgg
-            fig, ax = plt.subplots(figsize=(2.8, 2.0), dpi=100)
-            ax.plot(avg_rewards, label="Recompensa média", color='tab:blue')
-            ax.plot(avg_collisions, label="Colisões médias", color='tab:red')
-            if penalties_hist:
-                avg_penalties = [sum([p[i] if i < len(p) else 0 for p in penalties_hist])/n for i in range(maxlen)]
-                ax.plot(avg_penalties, label="Penalização média", color='tab:orange')
-            ax.legend(fontsize=8, loc='upper right')
-            ax.set_title("Desempenho Geral", fontsize=10)
-            ax.set_xlabel("Ciclos")
-            ax.set_ylabel("Valor")
-            ax.grid(True, linestyle='--', alpha=0.3)
-            fig.tight_layout()
-            canvas = FigureCanvasAgg(fig)
-            canvas.draw()
-            renderer = canvas.get_renderer()
-            raw_data = renderer.tostring_rgb()
-            size = canvas.get_width_height()
-            surf = pygame.image.fromstring(raw_data, size, "RGB")
-            self.screen.blit(surf, (self.sim_width+10, graph_y))
-            plt.close(fig)
+        self._draw_graph(self.series, self.plot, (rewards_hist, collisions_hist, penalties_hist),
+                         (self.sim_width+10, graph_y))
         # Botões logo abaixo do gráfico
         btn_y_start = graph_y + 210
         btn_gap = 15
@@ -18,6 +18,11 @@ from interface_dashboard import Dashboard
 
 logger = setup_logger()
 
+# Cores dos carros no grid (para diferenciar agentes)
+CAR_COLORS = [(255, 50, 50), (50, 50, 255), (50, 255, 50), (255, 255, 0),
+              (255, 0, 255), (0, 255, 255), (255, 128, 0), (128, 0, 255)]
+TRACK_CACHE_MAX = 64  # Camadas estáticas de pista guardadas (checkpoints aleatórios geram novas)
+
 class InterfaceDPG:
     """Interface gráfica com Pygame puro (sem Dear PyGui)."""
     def __init__(self, width=1280, height=720, fase_desc="", n_parallel=1):
@@ -62,6 +67,10 @@ class InterfaceDPG:
         self._restart_requested = False
         self.last_car_pos = None
         
+        # Cache das camadas estáticas das pistas (ver _track_layer)
+        self._track_cache = {}
+        self._track_cache_cell = (self.cell_width, self.cell_height)
+        
         self.adjust_resources()
         logger.info(f"Interface inicializada: {width}x{height}, {n_parallel} ambientes paralelos")
 
@@ -79,23 +88,41 @@ class InterfaceDPG:
             self.fps_limit = 45
             logger.info("Modo padrão: FPS=45")
 
-    def process_events(self):
-        """Processa eventos pygame."""
+    def poll_events(self):
+        """Lê os eventos pygame sem agir sobre a janela nem sobre as surfaces.
+
+        Returns:
+            tuple: (quit, escape): se a janela foi fechada e se ESC foi pressionado.
+        """
         if time.time() - self.last_resource_check > self.resource_check_interval:
             self.adjust_resources()
             self.last_resource_check = time.time()
         
+        quit_requested = escape = False
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
+                quit_requested = True
             if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-                self.change_state("menu_inicial")
+                escape = True
+        return quit_requested, escape
 
-    def update(self):
-        """Atualiza display."""
+    def process_events(self):
+        """Processa eventos pygame."""
+        quit_requested, escape = self.poll_events()
+        if quit_requested:
+            pygame.quit()
+            exit()
+        if escape:
+            self.change_state("menu_inicial")
+
+    def present(self):
+        """Copia a surface de desenho para a janela, sem limitar o FPS."""
         self.display.blit(self.pygame_screen, (0, 0))
         pygame.display.flip()
+
+    def update(self):
+        """Atualiza display."""
+        self.present()
         self.clock.tick(self.fps_limit)
 
     def clear(self):
@@ -196,19 +223,42 @@ class InterfaceDPG:
         """Desenha ambiente em grid (compatível com main.py chamadas)."""
         self.draw_env_grid_simple(env_single, idx)
     
-    def draw_env_grid_simple(self, env_single, idx):
-        """Desenha ambiente estilizado como pista de corrida."""
-        col = idx % self.grid_cols
-        row = idx // self.grid_cols
-        offset_x = col * self.cell_width
-        offset_y = row * self.cell_height
-        
+    def _track_layer(self, env_single):
+        """Superfície em cache com a parte estática de uma célula do grid.
+
+        Grama, borda, asfalto, faixas, barreiras e checkpoints inativos só dependem do
+        mapa e do tamanho da célula; são desenhados uma vez por (geometria, checkpoints,
+        célula). Mudar o tamanho da célula (resize ou outro grid) esvazia o cache.
+        """
+        cell = (self.cell_width, self.cell_height)
+        if cell != self._track_cache_cell or len(self._track_cache) >= TRACK_CACHE_MAX:
+            self._track_cache.clear()
+            self._track_cache_cell = cell
+        key = (
+            env_single.map_type, env_single.width, env_single.height,
+            tuple(env_single.corridor_rect) if env_single.corridor_rect else None,
+            tuple(tuple(b) for b in env_single.barriers),
+            tuple((cp[0], cp[1]) for cp in env_single.checkpoints),
+        )
+        layer = self._track_cache.get(key)
+        if layer is None:
+            layer = pygame.Surface(cell)
+            self._draw_track_static(layer, env_single, 0, 0)
+            self._track_cache[key] = layer
+        return layer
+
+    def clear_track_cache(self):
+        """Descarta as superfícies estáticas das pistas (ex.: após editar um mapa)."""
+        self._track_cache.clear()
+
+    def _draw_track_static(self, surface, env_single, offset_x, offset_y):
+        """Desenha a parte estática de uma célula: pista, barreiras e checkpoints inativos."""
         # Fundo da célula (Grama/Terra)
-        pygame.draw.rect(self.pygame_screen, (34, 139, 34), 
+        pygame.draw.rect(surface, (34, 139, 34), 
                         (offset_x, offset_y, self.cell_width, self.cell_height))
         
         # Borda da célula (separador de telas)
-        pygame.draw.rect(self.pygame_screen, (20, 20, 20), 
+        pygame.draw.rect(surface, (20, 20, 20), 
                         (offset_x, offset_y, self.cell_width, self.cell_height), 4)
         
         # Fatores de escala
@@ -221,18 +271,18 @@ class InterfaceDPG:
             cx0, cy0, cw, ch = env_single.corridor_rect
             rect = pygame.Rect(offset_x + cx0*scale_x, offset_y + cy0*scale_y, 
                              cw*scale_x, ch*scale_y)
-            pygame.draw.rect(self.pygame_screen, (50, 50, 50), rect) # Asfalto cinza escuro
+            pygame.draw.rect(surface, (50, 50, 50), rect) # Asfalto cinza escuro
             
             # Linhas da pista (decorativo)
             line_y = offset_y + cy0*scale_y + (ch*scale_y)/2
             start_x = offset_x + cx0*scale_x
             end_x = start_x + cw*scale_x
             for lx in range(int(start_x), int(end_x), 40):
-                pygame.draw.line(self.pygame_screen, (255, 255, 255), (lx, line_y), (lx+20, line_y), 2)
+                pygame.draw.line(surface, (255, 255, 255), (lx, line_y), (lx+20, line_y), 2)
 
         elif env_single.map_type == "curve" or env_single.map_type == "circle":
             # Para curva/círculo, preenchemos tudo de asfalto e desenhamos barreiras por cima
-            pygame.draw.rect(self.pygame_screen, (50, 50, 50), 
+            pygame.draw.rect(surface, (50, 50, 50), 
                             (offset_x, offset_y, self.cell_width, self.cell_height))
         
         # Desenha barreiras (Muros/Obstáculos)
@@ -240,24 +290,38 @@ class InterfaceDPG:
             rect = pygame.Rect(offset_x + bx*scale_x, offset_y + by*scale_y,
                              bw*scale_x, bh*scale_y)
             # Muro vermelho e branco (estilo zebra de corrida)
-            pygame.draw.rect(self.pygame_screen, (200, 50, 50), rect)
-            pygame.draw.rect(self.pygame_screen, (255, 255, 255), rect, 2)
+            pygame.draw.rect(surface, (200, 50, 50), rect)
+            pygame.draw.rect(surface, (255, 255, 255), rect, 2)
         
-        # Desenha checkpoints (Alvos)
-        t = time.time()
-        for i, cp in enumerate(env_single.checkpoints):
+        # Checkpoints inativos (Alvos); o ativo pulsa e é desenhado por cima a cada quadro
+        for cp in env_single.checkpoints:
             pos_x = int(offset_x + cp[0] * scale_x)
             pos_y = int(offset_y + cp[1] * scale_y)
-            
-            # Checkpoint ativo pulsa
-            if i == env_single.checkpoint_index:
-                raio = 4 + math.sin(t * 10) * 2
-                color = (0, 255, 255) # Ciano brilhante
-            else:
-                raio = 3
-                color = (0, 100, 0) # Verde escuro (inativo)
-                
-            pygame.draw.circle(self.pygame_screen, color, (pos_x, pos_y), int(raio))
+            pygame.draw.circle(surface, (0, 100, 0), (pos_x, pos_y), 3) # Verde escuro (inativo)
+
+    def draw_env_grid_simple(self, env_single, idx):
+        """Desenha ambiente estilizado como pista de corrida.
+
+        A pista vem de uma superfície em cache (ver _track_layer); a cada quadro só o
+        checkpoint ativo e o carro são desenhados.
+        """
+        col = idx % self.grid_cols
+        row = idx // self.grid_cols
+        offset_x = col * self.cell_width
+        offset_y = row * self.cell_height
+        self.pygame_screen.blit(self._track_layer(env_single), (offset_x, offset_y))
+        
+        # Fatores de escala
+        scale_x = self.cell_width / env_single.width
+        scale_y = self.cell_height / env_single.height
+        
+        # Checkpoint ativo pulsa
+        if 0 <= env_single.checkpoint_index < len(env_single.checkpoints):
+            cp = env_single.checkpoints[env_single.checkpoint_index]
+            pos_x = int(offset_x + cp[0] * scale_x)
+            pos_y = int(offset_y + cp[1] * scale_y)
+            raio = 4 + math.sin(time.time() * 10) * 2
+            pygame.draw.circle(self.pygame_screen, (0, 255, 255), (pos_x, pos_y), int(raio)) # Ciano brilhante
         
         # Desenha Carro (Triângulo para mostrar direção)
         car_x = int(offset_x + env_single.car1_pos[0] * scale_x)
@@ -276,9 +340,7 @@ class InterfaceDPG:
         p3 = (car_x + math.cos(angle_rad - 2.5) * car_width, car_y + math.sin(angle_rad - 2.5) * car_width)
         
         # Cor baseada no índice (para diferenciar agentes)
-        colors = [(255, 50, 50), (50, 50, 255), (50, 255, 50), (255, 255, 0), 
-                  (255, 0, 255), (0, 255, 255), (255, 128, 0), (128, 0, 255)]
-        car_color = colors[idx % len(colors)]
+        car_color = CAR_COLORS[idx % len(CAR_COLORS)]
         
         pygame.draw.polygon(self.pygame_screen, car_color, [p1, p2, p3])
         pygame.draw.polygon(self.pygame_screen, (0,0,0), [p1, p2, p3], 1) # Borda preta
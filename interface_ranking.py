@@ -1,9 +1,13 @@
 import pygame
 import json
 import os
+import config
 
 def load_ranking(filename="ranking.json"):
     """CORREÇÃO: Carrega ranking com tratamento de erro."""
+    if config.STORAGE_BACKEND == "sqlite":
+        from corrida_db import get_database
+        return get_database().load_ranking()
     if not os.path.exists(filename):
         return {}
     try:
@@ -13,7 +17,11 @@ def load_ranking(filename="ranking.json"):
         return {}
 
 def save_ranking(ranking_data, filename="ranking.json"):
-    """Salva ranking em JSON."""
+    """Salva ranking em JSON (ou no banco, com STORAGE_BACKEND = "sqlite")."""
+    if config.STORAGE_BACKEND == "sqlite":
+        from corrida_db import get_database
+        get_database().save_ranking(ranking_data)
+        return
     with open(filename, "w") as f:
         json.dump(ranking_data, f, indent=2)
 
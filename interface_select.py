@@ -102,7 +102,7 @@ class SelectScreen:
             name_surf = font_name.render(ag.nome, True, (255,255,255))
             type_surf = font_info.render(f"Algoritmo: {ag.tipo}", True, (180,180,180))
             lvl_surf = font_info.render(f"Nível: {ag.level}", True, (255, 200, 50))
-            xp_surf = font_info.render(f"XP: {sum(h.get('xp_gained',0) for h in ag.historico)}", True, (150,150,150))
+            xp_surf = font_info.render(f"XP: {ag.total_xp}", True, (150,150,150))
 
             screen.blit(name_surf, (x + card_w//2 - name_surf.get_width()//2, y + 110))
             screen.blit(type_surf, (x + 15, y + 160))
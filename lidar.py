@@ -0,0 +1,158 @@
+"""Sensores Lidar do Corrida DRL: amostragem em passos e ray casting analítico.
+
+Os dois modos recebem lotes de carros e devolvem leituras normalizadas em [0, 1]
+(distância até sair da pista / alcance máximo):
+
+- "march": reproduz o CorridaEnv original, testando 20 pontos por raio com
+  is_on_corridor (leituras quantizadas em 20 níveis).
+- "exact": intersecta cada raio analiticamente com as barreiras retangulares,
+  o corridor_rect e o anel do mapa circular (distância exata).
+"""
+import numpy as np
+from config import ENV_SCALE
+
+LIDAR_MODES = ("march", "exact")
+MARCH_SAMPLES = 20
+
+
+def lidar_max_dist():
+    """Alcance máximo do Lidar em pixels."""
+    return 100 * ENV_SCALE
+
+
+def lidar_angles(car_angles, n_lidar=8):
+    """Ângulos (graus) dos raios: um a cada 45 graus a partir da direção do carro.
+
+    Args:
+        car_angles (np.ndarray): Ângulos dos carros [N].
+        n_lidar (int): Número de raios.
+    Returns:
+        np.ndarray: Ângulos [N, n_lidar].
+    """
+    car_angles = np.asarray(car_angles, dtype=np.float64)
+    return (car_angles[:, None] + np.arange(n_lidar)[None, :] * 45) % 360
+
+
+def march_readings(track, xs, ys, angles):
+    """Leituras por amostragem (20 pontos por raio), iguais ao CorridaEnv original.
+
+    Args:
+        track (CorridaEnv): Ambiente com a geometria do mapa.
+        xs (np.ndarray): Posições x dos carros [N].
+        ys (np.ndarray): Posições y dos carros [N].
+        angles (np.ndarray): Ângulos dos raios em graus [N, n_lidar].
+    Returns:
+        np.ndarray: Leituras float32 [N, n_lidar].
+    """
+    max_dist = lidar_max_dist()
+    samples = np.linspace(5, max_dist, num=MARCH_SAMPLES)
+    rad = np.radians(angles)[:, :, None]
+    px = np.asarray(xs, dtype=np.float64)[:, None, None] + samples * np.cos(rad)
+    py = np.asarray(ys, dtype=np.float64)[:, None, None] + samples * np.sin(rad)
+    blocked = ~track.is_on_corridor_batch(px, py)
+    first = blocked.argmax(axis=2)
+    readings = np.where(blocked.any(axis=2), samples[first] / max_dist, 1.0)
+    return readings.astype(np.float32)
+
+
+def _inverse(u):
+    """1/u com componentes nulas trocadas por um valor minúsculo (raio paralelo ao eixo)."""
+    return 1.0 / np.where(u == 0, 1e-300, u)
+
+
+def _boxes_entry(px, py, inv_x, inv_y, boxes):
+    """Distância até o raio entrar em cada retângulo (x, y, w, h); inf se não entra.
+
+    Todos os retângulos são testados de uma vez: entradas [N, n_lidar, 1] contra boxes [B, 4].
+    """
+    t1x = (boxes[:, 0] - px) * inv_x
+    t2x = (boxes[:, 0] + boxes[:, 2] - px) * inv_x
+    t1y = (boxes[:, 1] - py) * inv_y
+    t2y = (boxes[:, 1] + boxes[:, 3] - py) * inv_y
+    near = np.maximum(np.minimum(t1x, t2x), np.minimum(t1y, t2y))
+    far = np.minimum(np.maximum(t1x, t2x), np.maximum(t1y, t2y))
+    hit = (near <= far) & (far >= 0)
+    return np.where(hit, np.maximum(near, 0.0), np.inf)
+
+
+def _box_exit(px, py, inv_x, inv_y, box):
+    """Distância até o raio sair do retângulo; 0 se já começa fora."""
+    bx, by, bw, bh = box
+    far_x = np.maximum((bx - px) * inv_x, (bx + bw - px) * inv_x)
+    far_y = np.maximum((by - py) * inv_y, (by + bh - py) * inv_y)
+    inside = (bx <= px) & (px <= bx + bw) & (by <= py) & (py <= by + bh)
+    return np.where(inside, np.minimum(far_x, far_y), 0.0)
+
+
+def _annulus_exit(track, px, py, ux, uy):
+    """Distância até o raio sair do anel r_in <= r < r_out do mapa circular."""
+    cx, cy = track.circle_center
+    r_in, r_out = track.circle_r_in, track.circle_r_out
+    fx = px - cx
+    fy = py - cy
+    b = fx * ux + fy * uy
+    r2 = fx * fx + fy * fy
+    dist = np.sqrt(r2)
+    inside = (r_in <= dist) & (dist < r_out) & ~np.isclose(dist, r_out, atol=1e-6)
+    # Saída pelo círculo externo (sempre existe partindo de dentro)
+    t_out = -b + np.sqrt(np.maximum(b * b - (r2 - r_out * r_out), 0.0))
+    # Entrada no círculo interno (só se o raio o atinge à frente)
+    disc = b * b - (r2 - r_in * r_in)
+    t_in = -b - np.sqrt(np.maximum(disc, 0.0))
+    t_in = np.where((disc >= 0) & (t_in >= 0), t_in, np.inf)
+    return np.where(inside, np.minimum(t_out, t_in), 0.0)
+
+
+def exact_readings(track, xs, ys, angles):
+    """Leituras exatas por interseção analítica raio-geometria.
+
+    Args:
+        track (CorridaEnv): Ambiente com a geometria do mapa.
+        xs (np.ndarray): Posições x dos carros [N].
+        ys (np.ndarray): Posições y dos carros [N].
+        angles (np.ndarray): Ângulos dos raios em graus [N, n_lidar].
+    Returns:
+        np.ndarray: Leituras float32 [N, n_lidar].
+    """
+    max_dist = lidar_max_dist()
+    rad = np.radians(angles)
+    ux = np.cos(rad)
+    uy = np.sin(rad)
+    px = np.asarray(xs, dtype=np.float64)[:, None]
+    py = np.asarray(ys, dtype=np.float64)[:, None]
+    t = np.full(ux.shape, max_dist)
+    if track.map_type == "circle":
+        t = np.minimum(t, _annulus_exit(track, px, py, ux, uy))
+    else:
+        inv_x = _inverse(ux)
+        inv_y = _inverse(uy)
+        if track.barriers:
+            boxes = np.asarray(track.barriers, dtype=np.float64)
+            hits = _boxes_entry(px[..., None], py[..., None], inv_x[..., None], inv_y[..., None], boxes)
+            t = np.minimum(t, hits.min(axis=2))
+        if track.corridor_rect:
+            t = np.minimum(t, _box_exit(px, py, inv_x, inv_y, track.corridor_rect))
+    return (t / max_dist).astype(np.float32)
+
+
+def lidar_readings(track, xs, ys, car_angles, mode="march", n_lidar=8):
+    """Calcula o Lidar de um lote de carros no modo escolhido.
+
+    Args:
+        track (CorridaEnv): Ambiente com a geometria do mapa.
+        xs (np.ndarray): Posições x dos carros [N].
+        ys (np.ndarray): Posições y dos carros [N].
+        car_angles (np.ndarray): Ângulos dos carros em graus [N].
+        mode (str): 'march' (quantizado, original) ou 'exact' (analítico).
+        n_lidar (int): Número de raios.
+    Returns:
+        np.ndarray: Leituras float32 [N, n_lidar].
+    Raises:
+        ValueError: Se o modo não existir.
+    """
+    angles = lidar_angles(car_angles, n_lidar)
+    if mode == "march":
+        return march_readings(track, xs, ys, angles)
+    if mode == "exact":
+        return exact_readings(track, xs, ys, angles)
+    raise ValueError(f"Modo de Lidar desconhecido: {mode}. Opções: {list(LIDAR_MODES)}")
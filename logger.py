@@ -1,29 +1,165 @@
+"""Logger do projeto Corrida DRL.
+
+setup_logger é idempotente: a primeira chamada monta o pipeline e as seguintes
+devolvem o mesmo logger (antes cada import adicionava outro par de handlers e cada
+linha saía repetida). Quem loga só enfileira o LogRecord numa fila sem limite, sem
+formatar nem tocar em arquivo; um QueueListener numa thread de fundo formata e
+grava no arquivo e no console. Para eventos por passo do ambiente há log_sampled
+(1 a cada n chamadas) e log_rate_limited (no máximo 1 por intervalo).
+"""
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+import time
+from config import LOG_EVENT_INTERVAL
 
-def setup_logger():
-    """Configura o logger para o projeto Corrida DRL."""
-    logger = logging.getLogger("corrida_drl")
-    logger.setLevel(logging.DEBUG)
-    
-    # Cria diretório de logs se não existir
-    os.makedirs("logs", exist_ok=True)
-    
+LOGGER_NAME = "corrida_drl"
+LOG_FILE = "logs/corrida_drl.log"
+
+_listener = None
+_queue_handler = None
+_setup_lock = threading.Lock()
+
+
+class _RecordQueueHandler(logging.handlers.QueueHandler):
+    """Enfileira o LogRecord como está: a formatação fica para a thread do listener."""
+    def prepare(self, record):
+        return record
+
+
+def _build_handlers():
     # Formato do log
     formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
 
     # Handler para arquivo (DEBUG, INFO, ERROR)
-    file_handler = logging.FileHandler("logs/corrida_drl.log")
+    file_handler = logging.FileHandler(LOG_FILE)
     file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
 
     # Handler para console (apenas INFO e acima, sem DEBUG)
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    return file_handler, console_handler
+
 
-    # Evita logs duplicados
-    logger.propagate = False
+def _start_listener():
+    global _listener
+    _queue_handler.queue = queue.SimpleQueue()  # put() nunca bloqueia
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, *_build_handlers(), respect_handler_level=True)
+    _listener.start()
+
+
+def setup_logger():
+    """Configura (uma vez) e devolve o logger do projeto Corrida DRL."""
+    global _queue_handler
+    logger = logging.getLogger(LOGGER_NAME)
+    with _setup_lock:
+        if _queue_handler is not None:
+            return logger
+        logger.setLevel(logging.DEBUG)
+
+        # Cria diretório de logs se não existir
+        os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
+
+        _queue_handler = _RecordQueueHandler(queue.SimpleQueue())
+        _start_listener()
+        logger.addHandler(_queue_handler)
+
+        # Evita logs duplicados
+        logger.propagate = False
     return logger
+
+
+def flush_logs():
+    """Espera o listener gravar tudo o que já foi enfileirado."""
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        _listener.start()  # Mesma fila e handlers: o que chegou durante o stop não se perde
+
+
+def shutdown_logging():
+    """Para o listener (gravando o que estiver na fila) e fecha os handlers."""
+    global _listener
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def _after_fork_in_child():
+    # A thread do listener não existe no processo filho (start method "fork"): recria
+    global _listener
+    if _queue_handler is not None and _listener is not None:
+        _listener = None
+        _start_listener()
+
+
+atexit.register(shutdown_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+_sample_counts = {}
+_last_emit = {}
+_suppressed = {}
+
+
+def log_sampled(logger, level, key, every, msg, *args):
+    """Loga a 1ª e depois 1 a cada every chamadas com a mesma chave.
+
+    msg e args seguem o formato % do logging: nas chamadas descartadas nada é formatado.
+
+    Args:
+        logger (logging.Logger): Logger de destino.
+        level (int): Nível (logging.INFO, ...).
+        key (str): Identifica o evento (contagem separada por chave).
+        every (int): Intervalo de amostragem.
+        msg (str): Mensagem.
+    Returns:
+        bool: Se a mensagem foi logada.
+    """
+    count = _sample_counts.get(key, 0)
+    _sample_counts[key] = count + 1
+    if count % every or not logger.isEnabledFor(level):
+        return False
+    if count:
+        msg = f"{msg} (amostra 1/{every}, {count + 1} ocorrências)"
+    logger.log(level, msg, *args)
+    return True
+
+
+def log_rate_limited(logger, level, key, msg, *args, interval=None):
+    """Loga no máximo uma vez a cada interval segundos por chave.
+
+    A mensagem que passa informa quantas foram suprimidas desde a anterior.
+
+    Args:
+        logger (logging.Logger): Logger de destino.
+        level (int): Nível (logging.INFO, ...).
+        key (str): Identifica o evento.
+        msg (str): Mensagem no formato % do logging.
+        interval (float): Segundos entre mensagens (padrão config.LOG_EVENT_INTERVAL).
+    Returns:
+        bool: Se a mensagem foi logada.
+    """
+    now = time.monotonic()
+    if now - _last_emit.get(key, -float("inf")) < (LOG_EVENT_INTERVAL if interval is None else interval):
+        _suppressed[key] = _suppressed.get(key, 0) + 1
+        return False
+    _last_emit[key] = now
+    suppressed = _suppressed.pop(key, 0)
+    if not logger.isEnabledFor(level):
+        return False
+    if suppressed:
+        msg = f"{msg} (+{suppressed} suprimidas)"
+    logger.log(level, msg, *args)
+    return True
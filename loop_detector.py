@@ -7,7 +7,10 @@ from typing import List, Tuple
 
 class LoopDetector:
     """Detecta loops ou padrões repetitivos na trajetória do agente."""
-    
+
+    # Tamanho mínimo do histórico para qualquer método detectar um loop
+    MIN_HISTORY = 30
+
     def __init__(self, history_size: int = 100, threshold: float = 0.7):
         """Inicializa detector de loops.
         
@@ -66,7 +69,7 @@ class LoopDetector:
         Returns:
             bool: True se detectado padrão repetitivo.
         """
-        if len(self.position_history) < 30:
+        if len(self.position_history) < self.MIN_HISTORY:
             return False
         
         x_coords = np.array([pos[0] for pos in self.position_history])
@@ -99,7 +102,7 @@ class LoopDetector:
         Returns:
             bool: True se detectado movimento circular.
         """
-        if len(self.position_history) < 30:
+        if len(self.position_history) < self.MIN_HISTORY:
             return False
         
         # Calcula distância total percorrida
@@ -139,12 +142,12 @@ class LoopDetector:
             self.loop_count += 1
             return True
         
-        if len(self.position_history) >= 30:
+        if len(self.position_history) >= self.MIN_HISTORY:
             if self.detect_loop_fft():
                 self.loop_count += 1
                 return True
         
-        if len(self.position_history) >= 30:
+        if len(self.position_history) >= self.MIN_HISTORY:
             if self.detect_loop_correlation():
                 self.loop_count += 1
                 return True
@@ -164,3 +167,294 @@ class LoopDetector:
             float: Valor entre 0 (sem loop) e 1 (loop forte).
         """
         return min(self.loop_count / 10.0, 1.0)
+
+
+class IncrementalLoopDetector(LoopDetector):
+    """LoopDetector com histórico em anel NumPy e atualizações O(1).
+
+    Mantém a soma corrida do comprimento do caminho, então o teste de distância é O(1).
+    FFT e autocorrelação são recalculadas apenas quando chega uma nova amostra e a decisão
+    fica em cache até a próxima. As decisões são as mesmas do LoopDetector: a normalização
+    dos métodos espectrais usa a média/desvio exatos da janela, porque picos de
+    autocorrelação podem cair exatamente no threshold (ex.: trajetórias em zigue-zague).
+    """
+
+    # A cada tantas remoções a soma corrida é recalculada do zero (limita o erro acumulado)
+    REFRESH_INTERVAL = 1000
+
+    def __init__(self, history_size: int = 100, threshold: float = 0.7):
+        """Inicializa detector incremental.
+
+        Args:
+            history_size: Número de posições a manter no histórico.
+            threshold: Threshold de correlação para detectar loop (0-1).
+        """
+        self.history_size = history_size
+        self.threshold = threshold
+        self._ring = np.zeros((history_size, 2), dtype=np.float64)
+        self._segments = np.zeros(history_size, dtype=np.float64)  # Trecho da posição anterior até esta
+        self.loop_count = 0
+        self._last_source = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Reseta o detector."""
+        self._start = 0
+        self._count = 0
+        self._segments[:] = 0.0
+        self._path_length = 0.0
+        self._removals = 0
+        self._decision = False
+        self._last_source = None
+        self.loop_count = 0
+
+    # ===== Histórico =====
+    @property
+    def position_history(self) -> List[Tuple[float, float]]:
+        """Histórico em ordem cronológica (cópia, como lista de tuplas)."""
+        return [tuple(p) for p in self._ordered()]
+
+    @position_history.setter
+    def position_history(self, positions) -> None:
+        self._rebuild(positions)
+
+    def _ordered(self) -> np.ndarray:
+        """Posições do anel em ordem cronológica [count, 2]."""
+        end = self._start + self._count
+        if end <= self.history_size:
+            return self._ring[self._start:end]
+        return np.concatenate([self._ring[self._start:], self._ring[:end - self.history_size]])
+
+    def _push(self, x: float, y: float) -> None:
+        """Adiciona uma posição ao anel atualizando as somas corridas."""
+        if self._count == self.history_size:
+            self._drop_oldest()
+        slot = (self._start + self._count) % self.history_size
+        if self._count:
+            newest = self._ring[(slot - 1) % self.history_size]
+            segment = np.sqrt((x - newest[0])**2 + (y - newest[1])**2)
+        else:
+            segment = 0.0
+        self._ring[slot] = (x, y)
+        self._segments[slot] = segment
+        self._path_length += segment
+        self._count += 1
+
+    def _drop_oldest(self) -> None:
+        """Remove a posição mais antiga do anel atualizando as somas corridas."""
+        self._start = (self._start + 1) % self.history_size
+        self._count -= 1
+        if self._count == 0:
+            self._path_length = 0.0
+            return
+        # O trecho que saía da posição removida deixa de fazer parte do caminho
+        self._path_length -= self._segments[self._start]
+        self._segments[self._start] = 0.0
+        self._removals += 1
+        if self._removals >= self.REFRESH_INTERVAL:
+            self._refresh_sums()
+
+    def _refresh_sums(self) -> None:
+        """Recalcula a soma corrida a partir dos trechos do anel."""
+        self._path_length = float(self._segments.sum())
+        self._removals = 0
+
+    def _rebuild(self, positions) -> None:
+        """Substitui o histórico pelas últimas history_size posições dadas."""
+        loop_count = self.loop_count
+        self.reset()
+        self.loop_count = loop_count
+        for x, y in list(positions)[-self.history_size:]:
+            self._push(x, y)
+        self._decision = self._evaluate()
+
+    def add_position(self, position: Tuple[float, float]) -> None:
+        """Adiciona uma nova posição ao histórico e reavalia os critérios.
+
+        Args:
+            position: Tupla (x, y) da posição.
+        """
+        self._push(position[0], position[1])
+        self._decision = self._evaluate()
+
+    def _sync(self, position_history) -> None:
+        """Alinha o anel com uma lista externa de posições (mesma semântica do LoopDetector).
+
+        Entradas novas no final da lista são reconhecidas pela identidade do último item já
+        visto; nesse caso a atualização é incremental, senão o anel é reconstruído.
+        """
+        n = min(len(position_history), self.history_size)
+        last = position_history[-1] if position_history else None
+        if n == self._count and last is self._last_source:
+            return
+        if n and len(position_history) >= 2 and self._count and position_history[-2] is self._last_source:
+            self._push(last[0], last[1])
+            while self._count > n:
+                self._drop_oldest()
+            self._decision = self._evaluate()
+        else:
+            self._rebuild(position_history)
+        self._last_source = last
+
+    # ===== Critérios =====
+    @property
+    def path_length(self) -> float:
+        """Comprimento do caminho no histórico (soma corrida)."""
+        return self._path_length
+
+    def _normalized(self):
+        """Coordenadas normalizadas pela média/desvio da janela, como no LoopDetector."""
+        ordered = self._ordered()
+        x_coords = np.ascontiguousarray(ordered[:, 0])
+        y_coords = np.ascontiguousarray(ordered[:, 1])
+        x_coords = (x_coords - np.mean(x_coords)) / (np.std(x_coords) + 1e-8)
+        y_coords = (y_coords - np.mean(y_coords)) / (np.std(y_coords) + 1e-8)
+        return x_coords, y_coords
+
+    def detect_loop_distance(self) -> bool:
+        """Teste de distância em O(1) a partir das somas corridas."""
+        if self._count < self.MIN_HISTORY:
+            return False
+        if self._path_length < 1e-6:
+            return False
+        oldest = self._ring[self._start]
+        newest = self._ring[(self._start + self._count - 1) % self.history_size]
+        straight_distance = np.sqrt((newest[0] - oldest[0])**2 + (newest[1] - oldest[1])**2)
+        return straight_distance / self._path_length < 0.1
+
+    def detect_loop_fft(self) -> bool:
+        """Teste de picos na FFT sobre o histórico normalizado."""
+        if self._count < 20:
+            return False
+        x_coords, y_coords = self._normalized()
+        fft_x = np.abs(np.fft.fft(x_coords))
+        fft_y = np.abs(np.fft.fft(y_coords))
+        peak_threshold = np.mean([np.max(fft_x[1:]), np.max(fft_y[1:])]) * 0.5
+        peaks_x = np.sum(fft_x[1:-1] > peak_threshold)
+        peaks_y = np.sum(fft_y[1:-1] > peak_threshold)
+        return (peaks_x > 3 or peaks_y > 3)
+
+    def detect_loop_correlation(self) -> bool:
+        """Teste de autocorrelação sobre o histórico normalizado."""
+        if self._count < self.MIN_HISTORY:
+            return False
+        x_coords, y_coords = self._normalized()
+        acf_x = np.correlate(x_coords, x_coords, mode='full')
+        acf_y = np.correlate(y_coords, y_coords, mode='full')
+        acf_x = acf_x / np.max(np.abs(acf_x))
+        acf_y = acf_y / np.max(np.abs(acf_y))
+        center = len(acf_x) // 2
+        half = len(acf_x) // 4
+        peaks_secondary = np.sum(np.abs(acf_x[center-half:center-5]) > self.threshold)
+        peaks_secondary += np.sum(np.abs(acf_y[center-half:center-5]) > self.threshold)
+        return peaks_secondary > 2
+
+    def _evaluate(self) -> bool:
+        """Decisão combinada (mesma ordem do LoopDetector.detect_loop)."""
+        if self.detect_loop_distance():
+            return True
+        if self._count >= self.MIN_HISTORY:
+            return self.detect_loop_fft() or self.detect_loop_correlation()
+        return False
+
+    def detect_loop(self, position_history: List[Tuple[float, float]] = None) -> bool:
+        """Retorna a decisão em cache (recalculada só quando chega uma nova amostra).
+
+        Args:
+            position_history: Lista opcional de posições. Se dada, o histórico passa a ser
+                suas últimas history_size posições (atualização incremental quando possível).
+
+        Returns:
+            bool: True se detectado um loop.
+        """
+        if position_history is not None:
+            self._sync(position_history)
+        if self._decision:
+            self.loop_count += 1
+            return True
+        self.loop_count = max(0, self.loop_count - 1)
+        return False
+
+
+class BatchLoopDetector:
+    """Detecção de loop vetorizada para muitos ambientes de uma vez.
+
+    Recebe históricos [n_envs, history, 2] (alinhados à esquerda, com o comprimento válido
+    de cada ambiente) e avalia razão de distância, picos da FFT e autocorrelação de todos em
+    uma passada, com np.fft.rfft ao longo do eixo do tempo. A autocorrelação é obtida pelo
+    espectro de potência (Wiener-Khinchin). As decisões são as do LoopDetector, a menos de
+    empates exatos com os thresholds (a FFT real arredonda diferente de np.correlate).
+    """
+
+    MIN_HISTORY = LoopDetector.MIN_HISTORY
+
+    def __init__(self, history_size: int = 100, threshold: float = 0.7):
+        """Inicializa detector em lote.
+
+        Args:
+            history_size: Janela máxima (últimas posições de cada ambiente).
+            threshold: Threshold de correlação para detectar loop (0-1).
+        """
+        self.history_size = history_size
+        self.threshold = threshold
+
+    def detect(self, histories: np.ndarray, lengths: np.ndarray = None) -> np.ndarray:
+        """Detecta loops em todos os ambientes.
+
+        Args:
+            histories: Posições [n_envs, history, 2].
+            lengths: Número de posições válidas de cada ambiente [n_envs]. Se None, todas.
+
+        Returns:
+            np.ndarray: Máscara booleana [n_envs], True onde há loop.
+        """
+        histories = np.asarray(histories, dtype=np.float64)
+        n_envs, size, _ = histories.shape
+        lengths = np.full(n_envs, size) if lengths is None else np.asarray(lengths)
+        loops = np.zeros(n_envs, dtype=bool)
+        # Ambientes com o mesmo comprimento compartilham a mesma FFT vetorizada
+        for length in np.unique(lengths):
+            window = min(int(length), self.history_size)
+            if window < self.MIN_HISTORY:
+                continue
+            rows = np.flatnonzero(lengths == length)
+            loops[rows] = self._detect_window(histories[rows, length - window:length])
+        return loops
+
+    def _detect_window(self, points: np.ndarray) -> np.ndarray:
+        """Os três critérios para janelas de mesmo comprimento [m, L, 2]."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            coords = (points - points.mean(axis=1, keepdims=True)) / (points.std(axis=1, keepdims=True) + 1e-8)
+            return self._distance_ratio(points) | self._fft_peaks(coords) | self._autocorrelation(coords)
+
+    @staticmethod
+    def _distance_ratio(points: np.ndarray) -> np.ndarray:
+        """Viajou muito para terminar perto do início: distância em linha reta / caminho < 0.1."""
+        total = np.sqrt((np.diff(points, axis=1) ** 2).sum(axis=2)).sum(axis=1)
+        straight = np.sqrt(((points[:, -1] - points[:, 0]) ** 2).sum(axis=1))
+        return (total >= 1e-6) & (straight < 0.1 * total)
+
+    @staticmethod
+    def _fft_peaks(coords: np.ndarray) -> np.ndarray:
+        """Mais de 3 picos no espectro de x ou de y (excluindo DC)."""
+        length = coords.shape[1]
+        spectrum = np.abs(np.fft.rfft(coords, axis=1))  # [m, L//2 + 1, 2]
+        peak_threshold = spectrum[:, 1:].max(axis=1).mean(axis=1) * 0.5
+        above = spectrum > peak_threshold[:, None, None]
+        # Espectro completo é simétrico: bins 1..L-2 = pares (k, L-k) da rfft, Nyquist uma vez,
+        # menos o bin L-1 (espelho do bin 1)
+        peaks = 2 * above[:, 1:(length + 1) // 2].sum(axis=1) - above[:, 1]
+        if length % 2 == 0:
+            peaks += above[:, length // 2]
+        return (peaks > 3).any(axis=1)
+
+    def _autocorrelation(self, coords: np.ndarray) -> np.ndarray:
+        """Mais de 2 picos secundários fortes na autocorrelação (lags 6 até L/2)."""
+        length = coords.shape[1]
+        n_fft = 1 << (2 * length - 1).bit_length()
+        power = np.abs(np.fft.rfft(coords, n=n_fft, axis=1)) ** 2
+        acf = np.fft.irfft(power, n=n_fft, axis=1)[:, :length]  # Lags 0..L-1
+        acf = acf / np.abs(acf).max(axis=1, keepdims=True)
+        half = (2 * length - 1) // 4
+        peaks_secondary = (np.abs(acf[:, 6:half + 1]) > self.threshold).sum(axis=(1, 2))
+        return peaks_secondary > 2
@@ -4,10 +4,16 @@ Gerencia o ciclo de treinamento, avaliação, logging e interface gráfica do ag
 """
 import sys
 from environment import CorridaEnv, MultiAgentEnv
+from batch_env import BatchCorridaEnv
+from shm_vec_env import SharedMemoryVecEnv, available_cores
 from agent import Agent
+from model_cache import get_model_cache
 from metrics import Metrics
+from history import EpisodeHistory
+from episode_store import EpisodeStore
 from interface_dpg import InterfaceDPG as Interface
-from config import PHASES, ENV_SCALE, SIM_SPEED, TIME_STEP
+from config import (PHASES, ENV_SCALE, SIM_SPEED, TIME_STEP, BATCH_ENV_MIN_PARALLEL, SHM_VEC_ENV_MIN_PARALLEL,
+                    EPISODE_TEXT_DUMPS)
 import argparse
 import time
 import psutil
@@ -17,8 +23,13 @@ from datetime import datetime
 from logger import setup_logger
 import pygame
 from interface_agents import AgentInfo, load_agents, save_agents
+from agent_store import get_agent_store
+from interface_ranking import load_ranking, save_ranking
+from render_thread import SnapshotBuffer, RenderThread, capture_snapshot, pump_events
+from core.reward_shaper import RewardComponentStats
 from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
 import gc
+import numpy as np
 import json
 from config import load_config
 
@@ -35,10 +46,16 @@ def check_resources():
 class TrainingLogger:
     """Logger de episódios de treinamento, salva métricas em arquivos.
 
+    Os arrays por passo de cada episódio vão para um EpisodeStore colunar em
+    <sessão>/episodes (ler com episode_store.load_episodes); os .txt da sessão
+    recebem só uma linha de resumo por episódio.
+
     Args:
         base_dir (str): Diretório base para logs.
+        text_dumps (bool): Se True, também escreve as listas completas nos .txt (formato
+            antigo). Padrão: config.EPISODE_TEXT_DUMPS.
     """
-    def __init__(self, base_dir="logs"):
+    def __init__(self, base_dir="logs", text_dumps=None):
         os.makedirs(base_dir, exist_ok=True)
         now = datetime.now()
         now_str = now.strftime("%Y%m%d_%H%M%S")
@@ -52,8 +69,12 @@ class TrainingLogger:
         self.incomplete_log = open(self.incomplete_file, "a", encoding="utf-8")
         self.start_mem = psutil.virtual_memory().percent
         self.start_cpu = psutil.cpu_percent(interval=0.05)
+        self.reward_components = RewardComponentStats()
+        self.text_dumps = EPISODE_TEXT_DUMPS if text_dumps is None else text_dumps
+        self.store = EpisodeStore(os.path.join(self.session_dir, "episodes"))
 
-    def log(self, ep_idx, rewards, collisions, actions=None, checkpoints=None, episode_time=None, success=True):
+    def log(self, ep_idx, rewards, collisions, actions=None, checkpoints=None, episode_time=None, success=True,
+            reward_components=None):
         """Registra um episódio no arquivo de log.
 
         Args:
@@ -64,20 +85,29 @@ class TrainingLogger:
             checkpoints (list): Lista de checkpoints.
             episode_time (float): Tempo do episódio.
             success (bool): Se o episódio foi bem-sucedido.
+            reward_components (dict): info["reward_components"] do episódio (rastreio ligado).
         """
+        episode = self.store.add(ep_idx, rewards, collisions, actions=actions, checkpoints=checkpoints,
+                                 episode_time=episode_time, success=success)
         log_file = self.success_log if success else self.incomplete_log
         log_file.write(f"Episódio {ep_idx}:\n")
-        log_file.write(f"Recompensas: {rewards}\n")
-        log_file.write(f"Colisões: {collisions}\n")
-        if actions is not None:
-            log_file.write(f"Ações: {actions}\n")
-        if checkpoints is not None:
-            log_file.write(f"Checkpoints: {checkpoints}\n")
+        if self.text_dumps:
+            log_file.write(f"Recompensas: {rewards}\n")
+            log_file.write(f"Colisões: {collisions}\n")
+            if actions is not None:
+                log_file.write(f"Ações: {actions}\n")
+            if checkpoints is not None:
+                log_file.write(f"Checkpoints: {checkpoints}\n")
+        else:
+            log_file.write(f"Registro: {episode} | Passos: {len(rewards)} | Recompensa total: {float(np.sum(rewards)):.2f}\n")
         if episode_time is not None:
             log_file.write(f"Tempo do episódio: {episode_time:.2f}s\n")
+        if reward_components:
+            self.reward_components.add(reward_components)
+            parts = ", ".join(f"{name}={value:.2f}" for name, value in reward_components.items())
+            log_file.write(f"Componentes da recompensa: {parts}\n")
         log_file.write(f"Sucesso: {success}\n")
         log_file.write("-"*40+"\n")
-        log_file.flush()
 
     def close(self):
         """Fecha os arquivos de log da sessão."""
@@ -89,8 +119,13 @@ class TrainingLogger:
         self.success_log.write(f"CPU inicial: {self.start_cpu:.1f}% | CPU final: {end_cpu:.1f}%\n")
         self.incomplete_log.write(f"Memória inicial: {self.start_mem:.1f}% | Memória final: {end_mem:.1f}%\n")
         self.incomplete_log.write(f"CPU inicial: {self.start_cpu:.1f}% | CPU final: {end_cpu:.1f}%\n")
+        means = self.reward_components.means()
+        if means:
+            parts = ", ".join(f"{name}={value:.2f}" for name, value in means.items())
+            self.success_log.write(f"Média dos componentes da recompensa ({self.reward_components.episodes} episódios): {parts}\n")
         self.success_log.close()
         self.incomplete_log.close()
+        self.store.close()
 
 import os
 import argparse
@@ -113,20 +148,18 @@ class RaceManager:
         self.agents_info = agents_info_list
         self.map_type = map_type
         self.n_parallel = n_parallel
-        self.models = []
+        self.models = []  # Um por agente carregado; agentes com o mesmo arquivo compartilham o objeto
         self.agent_stats = []
+        self._lane_groups = {}  # Número de raias -> [(modelo, índices das raias)]
         
-        # Carrega todos os modelos
+        # Modelos do registro do processo: cada arquivo é carregado uma vez (sem ambiente dummy)
+        cache = get_model_cache()
         for agent_info in agents_info_list:
             try:
-                # Carrega o modelo específico do agente
-                model_path = agent_info.modelo_path.replace(".zip", "")
-                agent_instance = Agent(None, model_path=model_path)
                 if os.path.exists(agent_info.modelo_path):
-                    agent_instance.load(agent_info.modelo_path)
-                    self.models.append(agent_instance)
-                    self.agent_stats.append(agent_info.stats)
+                    self.models.append(cache.get(agent_info.modelo_path, agent_info.tipo))
                     logger.info(f"[RaceManager] Modelo carregado: {agent_info.nome}")
+                    self.agent_stats.append(agent_info.stats)
             except Exception as e:
                 logger.warning(f"[RaceManager] Falha ao carregar {agent_info.nome}: {e}")
         
@@ -135,39 +168,345 @@ class RaceManager:
             self.models = [None]
             self.agent_stats = [{"accel": 0.5, "turn_speed": 5.0, "max_speed": 20.0}]
     
-    def get_actions(self, observations):
-        """Predições de múltiplos modelos de forma rotacionada.
+    def lane_groups(self, n_lanes):
+        """Raias agrupadas por modelo (a raia i usa self.models[i % len(self.models)]).
+        
+        Returns:
+            list: Pares (modelo, np.ndarray com os índices das raias), na ordem da primeira raia.
+        """
+        groups = self._lane_groups.get(n_lanes)
+        if groups is None:
+            by_model = {}
+            for lane in range(n_lanes):
+                model = self.models[lane % len(self.models)]
+                by_model.setdefault(id(model), (model, []))[1].append(lane)
+            groups = self._lane_groups[n_lanes] = [(model, np.array(lanes)) for model, lanes in by_model.values()]
+        return groups
+    
+    def get_actions(self, observations, deterministic=False):
+        """Ações de todas as raias, com um forward em lote por modelo distinto.
         
         Args:
             observations (array): Array de observações [n_parallel, obs_dim]
+            deterministic (bool): Política determinística
             
         Returns:
-            list: Ações [n_parallel] onde cada índice usa um modelo diferente
+            list: Ações [n_parallel], na ordem das raias
         """
-        actions = []
-        for i, obs in enumerate(observations):
-            model_idx = i % len(self.models)
+        observations = np.asarray(observations)
+        actions = np.zeros(len(observations), dtype=np.int64)  # Ação padrão se modelo não carregou
+        for model, lanes in self.lane_groups(len(observations)):
+            if model is None:
+                continue
             try:
-                if self.models[model_idx] is not None:
-                    action, _ = self.models[model_idx].predict(np.array([obs]), deterministic=False)
-                    actions.append(int(action[0]))
-                else:
-                    actions.append(0)  # Ação padrão se modelo não carregou
+                batch = observations if len(lanes) == len(observations) else observations[lanes]
+                group_actions, _ = model.predict(batch, deterministic=deterministic)
+                actions[lanes] = np.asarray(group_actions).reshape(len(lanes), -1)[:, 0]
             except Exception as e:
-                logger.warning(f"[RaceManager] Erro na predição do modelo {model_idx}: {e}")
-                actions.append(0)
-        return actions
+                logger.warning(f"[RaceManager] Erro na predição das raias {lanes.tolist()}: {e}")
+        return actions.tolist()
 
 def make_env(map_type, car_stats=None):
     """Factory function para criar ambientes com stats customizados."""
     return lambda: CorridaEnv(map_type=map_type, car_stats=car_stats)
 
+def make_vec_env(map_type, car_stats_list):
+    """Cria o VecEnv de treino/corrida com um carro por item de car_stats_list.
+
+    Acima de BATCH_ENV_MIN_PARALLEL carros usa o BatchCorridaEnv (arrays NumPy),
+    evitando o overhead de um CorridaEnv Python por carro do DummyVecEnv. Acima de
+    SHM_VEC_ENV_MIN_PARALLEL, havendo mais de um núcleo, divide os carros entre processos
+    com o SharedMemoryVecEnv.
+    """
+    if len(car_stats_list) > SHM_VEC_ENV_MIN_PARALLEL and available_cores() > 1:
+        return SharedMemoryVecEnv(len(car_stats_list), map_type=map_type, car_stats=list(car_stats_list))
+    if len(car_stats_list) > BATCH_ENV_MIN_PARALLEL:
+        return BatchCorridaEnv(len(car_stats_list), map_type=map_type, car_stats=list(car_stats_list))
+    return DummyVecEnv([make_env(map_type, car_stats=stats) for stats in car_stats_list])
+
+def setup_run(agent_info, selected_map, n_parallel, skip_training=False, learning_rate=None, gamma=None):
+    """Cria o VecEnv e o agente (treino) ou o RaceManager (corrida competitiva).
+
+    Args:
+        agent_info (AgentInfo): Agente selecionado.
+        selected_map (str): Tipo de mapa.
+        n_parallel (int): Execuções paralelas.
+        skip_training (bool): Se True, corrida competitiva com o agente e seus rivais.
+        learning_rate (float): Taxa de aprendizado do agente RL.
+        gamma (float): Fator de desconto RL.
+    Returns:
+        tuple: (env, agent, race_manager); agent ou race_manager é None conforme o modo.
+    """
+    race_manager = None
+    agent = None
+    
+    if not skip_training:
+        # MODO TREINO: 1 agente clonado (como era antes)
+        print("[MODO] Treino com um agente")
+        env = make_vec_env(selected_map, [agent_info.stats] * n_parallel)
+        
+        # Força algoritmo selecionado
+        os.environ["RL_ALGORITHM"] = agent_info.tipo
+        model_path = f"models/model_{selected_map}_{agent_info.tipo}"
+        agent = Agent(env, model_path=model_path, learning_rate=learning_rate, gamma=gamma)
+        model_file = model_path + "_step_10000.zip"
+        if os.path.exists(model_file):
+            agent.load(model_file)
+            logger.info(f"Loaded pre-trained model from {model_file}")
+    else:
+        # MODO CORRIDA COMPETITIVA: RaceManager com múltiplos agentes
+        print("[MODO] Corrida Competitiva com múltiplos agentes")
+        
+        # Carrega agentes para competição (o selecionado + rivais do JSON)
+        all_agents = [AgentInfo.from_dict(a) for a in load_agents()]
+        rivals = [a for a in all_agents if a.nome != agent_info.nome]
+        
+        # Cria lista de competidores (selecionado + rivais)
+        race_agents = [agent_info] + rivals[:n_parallel-1]
+        
+        # Preenche com clones do agente se faltar
+        while len(race_agents) < n_parallel:
+            race_agents.append(agent_info)
+        
+        # Cria ambientes com stats DIFERENTES para cada carro
+        # Isso permite visualmente carros com upgrades serem mais rápidos
+        env = make_vec_env(selected_map, [ag.stats for ag in race_agents])
+        
+        # Inicializa RaceManager com múltiplos modelos
+        race_manager = RaceManager(race_agents, selected_map, n_parallel)
+        print(f"[CORRIDA] Competição entre {len(race_agents)} agentes:")
+        for i, ag in enumerate(race_agents):
+            print(f"  Raia {i}: {ag.nome} (nível {ag.level}, acel {ag.stats['accel']:.2f})")
+    return env, agent, race_manager
+
+class RenderSchedule:
+    """Decide em quais passos do loop a simulação é desenhada.
+
+    Sem every_n nem fps, desenha todo passo e mantém o ritmo original do loop (pausa
+    de 0.05s, ~20 passos/s). Com every_n e/ou fps, desenha só uma amostra dos passos
+    e a simulação roda sem pausas.
+
+    Args:
+        every_n (int): Desenha a cada N passos.
+        fps (float): Desenha no máximo fps quadros por segundo.
+    """
+    def __init__(self, every_n=None, fps=None):
+        if every_n is not None and every_n < 1:
+            raise ValueError(f"render_every deve ser >= 1, recebido {every_n}")
+        if fps is not None and fps <= 0:
+            raise ValueError(f"render_fps deve ser > 0, recebido {fps}")
+        self.every_n = every_n
+        self.interval = 1.0 / fps if fps else None
+        self.next_time = 0.0
+
+    @property
+    def throttled(self):
+        """True no modo original (desenha todo passo, com pausa)."""
+        return self.every_n is None and self.interval is None
+
+    def due(self, step):
+        """Indica se o passo step deve ser desenhado.
+
+        Args:
+            step (int): Contador de passos do loop.
+        Returns:
+            bool: True se deve desenhar.
+        """
+        if self.throttled:
+            return True
+        if self.every_n is not None and step % self.every_n == 0:
+            return True
+        if self.interval is not None:
+            now = time.monotonic()
+            if now >= self.next_time:
+                self.next_time = now + self.interval
+                return True
+        return False
+
+class SimulationSession:
+    """Estado e contabilidade do loop de simulação: históricos, log, ranking e histórico do agente.
+
+    Usada pelo loop com interface (main) e pelo modo headless (run_headless); os dois
+    fazem a mesma contabilidade, só muda o que é desenhado.
+
+    Args:
+        env (VecEnv): Ambientes paralelos.
+        agent_name (str): Nome do agente (AgentInfo.nome) que acumula o histórico.
+        agent_type (str): Algoritmo do agente (chave do ranking).
+        map_type (str): Tipo de mapa.
+        agent (Agent): Agente em modo treino (ou None).
+        race_manager (RaceManager): Gerenciador em modo corrida (ou None).
+        training_logger (TrainingLogger): Logger de episódios. Se None, cria um novo.
+        ranking_file (str): Arquivo JSON do ranking.
+        collect_garbage (bool): Se True, roda gc.collect() ao fim de cada episódio.
+    """
+    def __init__(self, env, agent_name, agent_type, map_type, agent=None, race_manager=None, training_logger=None,
+                 ranking_file="ranking.json", collect_garbage=True):
+        self.env = env
+        self.n_parallel = env.num_envs
+        self.agent_type = agent_type
+        self.map_type = map_type
+        self.agent = agent
+        self.race_manager = race_manager
+        self.training_logger = training_logger or TrainingLogger()
+        self.ranking_file = ranking_file
+        self.collect_garbage = collect_garbage
+        # CORREÇÃO: Tratamento de erro para ranking.json
+        try:
+            self.ranking_data = load_ranking(ranking_file)
+        except FileNotFoundError:
+            self.ranking_data = {}
+        # OTIMIZAÇÃO: Carrega o agente UMA VEZ antes do loop principal (AgentStore em memória)
+        self.agent_store = get_agent_store()
+        record = self.agent_store.find(agent_name)
+        self.agent_info = AgentInfo.from_dict(record) if record else None
+        self.episodios = [0 for _ in range(self.n_parallel)]
+        self.obs = env.reset()  # CORREÇÃO: VecEnv.reset() retorna apenas obs
+        self.clear_history()
+
+    @property
+    def episodes_done(self):
+        """Total de episódios concluídos desde o início da sessão."""
+        return sum(self.episodios)
+
+    def clear_history(self):
+        """Zera os históricos por ambiente e os contadores do dashboard."""
+        n = self.n_parallel
+        # Buffers circulares de tamanho fixo: a memória não cresce em sessões longas
+        self.rewards_hist = EpisodeHistory(n)
+        self.collisions_hist = EpisodeHistory(n)
+        self.penalties_hist = EpisodeHistory(n)
+        self.actions_hist = EpisodeHistory(n, dtype=np.int64)
+        self.checkpoints_hist = EpisodeHistory(n, dtype=np.int64)
+        self.ciclo_total = 0
+        self.iter_count = 0
+        self.avg_speed = 0.0
+        self.n_dif = 0
+
+    def snapshot(self):
+        """RaceSnapshot imutável do estado atual, para a RenderThread."""
+        return capture_snapshot(self.env.envs, self.iter_count, *self.dashboard_args())
+
+    def dashboard_args(self):
+        """Argumentos de Interface.draw_dashboard para o estado atual."""
+        return (self.rewards_hist, self.collisions_hist, self.penalties_hist, self.ciclo_total, self.avg_speed, self.n_dif)
+
+    def select_actions(self):
+        """Ações para as observações atuais (RaceManager em corrida, modelo único em treino)."""
+        if self.race_manager:
+            # MODO CORRIDA: Múltiplos agentes com seus próprios cérebros
+            return self.race_manager.get_actions(self.obs)
+        # MODO TREINO: Um único agente clonado
+        actions_array, _ = self.agent.model.predict(self.obs, deterministic=False)
+        return [int(a) for a in actions_array]  # Converte array para list de ints
+
+    def step(self, actions):
+        """Avança todos os ambientes um passo e registra históricos e fins de episódio.
+
+        Args:
+            actions (list): Uma ação por ambiente.
+        """
+        if self.iter_count % 100 == 0:
+            check_resources()
+        # CORREÇÃO: VecEnv.step() sempre retorna 4 valores
+        obs_, rewards, dones, infos = self.env.step(actions)
+        dones = [bool(d) for d in dones]
+        self.obs = obs_
+        speeds = []
+        unique_states = set()
+        rewards = np.asarray(rewards, dtype=np.float64)
+        self.rewards_hist.append(rewards)
+        self.collisions_hist.append([info.get("collisions", 0) for info in infos])
+        self.penalties_hist.append(np.minimum(0, rewards))
+        self.actions_hist.append(actions)
+        self.checkpoints_hist.append([info.get("checkpoint", 0) for info in infos])
+        for idx in range(self.n_parallel):
+            speeds.append(abs(self.obs[idx][2]*2))
+            unique_states.add((round(self.obs[idx][0],1), round(self.obs[idx][1],1), round(self.obs[idx][3],1)))
+        self.ciclo_total += sum([1 for d in dones if d])
+        self.avg_speed = sum(speeds)/len(speeds) if speeds else 0.0
+        self.n_dif = len(unique_states)
+        self.iter_count += 1
+        # Mostra resumo no terminal a cada 20 iterações
+        if self.iter_count % 20 == 0:
+            avg_reward = self.rewards_hist.recent_mean(20)
+            print(f"[TREINO] Episódio {self.ciclo_total} | Média recompensa (20): {avg_reward:.2f} | Média velocidade: {self.avg_speed:.2f}")
+        for idx in range(self.n_parallel):
+            if dones[idx]:
+                self._finish_episode(idx, infos[idx])
+
+    def _finish_episode(self, idx, info):
+        """Log, ranking e histórico do agente ao fim do episódio do ambiente idx."""
+        is_success = info.get('success', False)
+        episode_time = info.get('episode_time', None)
+        self.training_logger.log(idx, self.rewards_hist.episode(idx).tolist(), self.collisions_hist.episode(idx).tolist(),
+                                 actions=self.actions_hist.episode(idx).tolist(),
+                                 checkpoints=self.checkpoints_hist.episode(idx).tolist(), episode_time=episode_time,
+                                 success=is_success, reward_components=info.get('reward_components'))
+        
+        # Atualiza ranking ao final de cada episódio
+        key = f"{self.agent_type}|{self.map_type}"
+        score = self.rewards_hist.episode_sum(idx)
+        speed = float(self.avg_speed)
+        tempo = episode_time or 0
+        prev = self.ranking_data.get(key, {"score": -float('inf')})
+        if score > prev["score"]:
+            self.ranking_data[key] = {"score": score, "speed": speed, "tempo": tempo}
+            save_ranking(self.ranking_data, self.ranking_file)
+        
+        # OTIMIZAÇÃO: Atualiza o cache em memória em vez de reler do disco
+        # Isso reduz I/O e melhora performance
+        agent_info_cache = self.agent_info
+        if agent_info_cache:
+            agent_info_cache.tempo_acumulado += episode_time or 0
+            
+            # Calcula XP baseado no score (gamificação)
+            xp_gained = max(0, int(score * 10))  # 10 XP por ponto de recompensa
+            
+            # Adiciona ao histórico (subjetivação)
+            agent_info_cache.add_history({
+                "mapa": self.map_type,
+                "score": score,
+                "velocidade": speed,
+                "tempo": tempo,
+                "xp_gained": xp_gained,
+                "checkpoints": self.checkpoints_hist.last(idx),
+                "data": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "tipo_evento": "simulacao"
+            })
+            
+            # Limita histórico para não pesar (últimas 30 corridas)
+            agent_info_cache.historico = agent_info_cache.historico[-30:]
+            
+            # Atualiza só este agente no AgentStore; a gravação do agents.json é adiada e agrupada
+            self.agent_store.update(agent_info_cache.to_dict())
+        
+        # CORREÇÃO: reset() sempre retorna tuple
+        obs_single, _ = self.env.envs[idx].reset()
+        self.obs[idx] = obs_single
+        self.episodios[idx] += 1
+        for hist in (self.rewards_hist, self.collisions_hist, self.penalties_hist, self.actions_hist, self.checkpoints_hist):
+            hist.end_episode(idx)
+        if self.collect_garbage:
+            gc.collect()
+
+    def restart(self):
+        """Reinicia todos os ambientes e zera os históricos (botão de restart da interface)."""
+        self.obs = self.env.reset()
+        self.clear_history()
+
+    def close(self):
+        """Fecha o logger de episódios da sessão e grava o agents.json pendente."""
+        self.training_logger.close()
+        self.agent_store.flush()
+
 def update_curriculum(current_performance: float):
     from config import PHASES
     difficulty_level = min(int(current_performance / 50), len(PHASES)-1)
     return PHASES[difficulty_level]
 
-def main(map_type="corridor", car_to_train=1, fase_idx=0, n_parallel=8, skip_training=False, learning_rate=None, gamma=None):
+def main(map_type="corridor", car_to_train=1, fase_idx=0, n_parallel=8, skip_training=False, learning_rate=None, gamma=None,
+         render_every=None, render_fps=None, render_thread=False):
     """Função principal de execução do treinamento e avaliação.
 
     Args:
@@ -178,6 +517,10 @@ def main(map_type="corridor", car_to_train=1, fase_idx=0, n_parallel=8, skip_tra
         skip_training (bool): Se True, apenas avalia modelo pré-treinado.
         learning_rate (float): Taxa de aprendizado do agente RL.
         gamma (float): Fator de desconto RL.
+        render_every (int): Desenha a simulação só a cada N passos, sem pausas (ver RenderSchedule).
+        render_fps (float): Desenha a simulação no máximo a render_fps quadros/s, sem pausas.
+        render_thread (bool): Se True, desenha em uma RenderThread a partir de snapshots e a
+            simulação roda sem desenhar nem esperar (render_fps limita os quadros, padrão 60).
     """
     from config import PHASES
     fase_desc = PHASES[fase_idx]["desc"] if fase_idx < len(PHASES) else map_type
@@ -318,7 +661,7 @@ def main(map_type="corridor", car_to_train=1, fase_idx=0, n_parallel=8, skip_tra
     agent_info = next((a for a in agents if a.nome == interface.selected_agent), None)
     if not agent_info:
         print("Agente não encontrado! Voltando ao menu.")
-        return main(map_type, car_to_train, fase_idx, n_parallel, skip_training, learning_rate, gamma)
+        return main(map_type, car_to_train, fase_idx, n_parallel, skip_training, learning_rate, gamma, render_every, render_fps, render_thread)
     selected_agent = agent_info.tipo
     selected_map = interface.selected_map or "corridor"
     print(f"Agente selecionado: {agent_info.nome} ({selected_agent}) | Mapa: {selected_map}")
@@ -326,50 +669,7 @@ def main(map_type="corridor", car_to_train=1, fase_idx=0, n_parallel=8, skip_tra
     print(f"[GAMIFICAÇÃO] Nível do agente: {agent_info.level}")
 
     # 2. Prepara ambiente, modelo e agente (NÃO treina antes do loop principal)
-    from stable_baselines3.common.vec_env import DummyVecEnv
-    
-    # ===== LÓGICA HÍBRIDA: TREINO vs CORRIDA COMPETITIVA =====
-    race_manager = None
-    agent = None
-    
-    if not skip_training:
-        # MODO TREINO: 1 agente clonado (como era antes)
-        print("[MODO] Treino com um agente")
-        env = DummyVecEnv([make_env(selected_map, car_stats=agent_info.stats) for _ in range(n_parallel)])
-        
-        # Força algoritmo selecionado
-        import os
-        os.environ["RL_ALGORITHM"] = selected_agent
-        model_path = f"models/model_{selected_map}_{selected_agent}"
-        agent = Agent(env, model_path=model_path, learning_rate=learning_rate, gamma=gamma)
-        model_file = model_path + "_step_10000.zip"
-        if os.path.exists(model_file):
-            agent.load(model_file)
-            logger.info(f"Loaded pre-trained model from {model_file}")
-    else:
-        # MODO CORRIDA COMPETITIVA: RaceManager com múltiplos agentes
-        print("[MODO] Corrida Competitiva com múltiplos agentes")
-        
-        # Carrega agentes para competição (o selecionado + rivais do JSON)
-        all_agents = [AgentInfo.from_dict(a) for a in load_agents()]
-        rivals = [a for a in all_agents if a.nome != agent_info.nome]
-        
-        # Cria lista de competidores (selecionado + rivais)
-        race_agents = [agent_info] + rivals[:n_parallel-1]
-        
-        # Preenche com clones do agente se faltar
-        while len(race_agents) < n_parallel:
-            race_agents.append(agent_info)
-        
-        # Cria ambientes com stats DIFERENTES para cada carro
-        # Isso permite visualmente carros com upgrades serem mais rápidos
-        env = DummyVecEnv([make_env(selected_map, car_stats=ag.stats) for ag in race_agents])
-        
-        # Inicializa RaceManager com múltiplos modelos
-        race_manager = RaceManager(race_agents, selected_map, n_parallel)
-        print(f"[CORRIDA] Competição entre {len(race_agents)} agentes:")
-        for i, ag in enumerate(race_agents):
-            print(f"  Raia {i}: {ag.nome} (nível {ag.level}, acel {ag.stats['accel']:.2f})")
+    env, agent, race_manager = setup_run(agent_info, selected_map, n_parallel, skip_training, learning_rate, gamma)
     
     for i in range(10, 101, 10):
         interface.draw_loading(f'Renderizando agentes... ({i}%)', progresso=i/100, animar=False)
@@ -383,149 +683,111 @@ def main(map_type="corridor", car_to_train=1, fase_idx=0, n_parallel=8, skip_tra
     time.sleep(1)
 
     # 4. Loop principal de treinamento
-    training_logger = TrainingLogger()
-    # CORREÇÃO: Tratamento de erro para ranking.json
-    try:
-        interface.load_ranking_data()
-    except FileNotFoundError:
-        interface.ranking_data = {}
-    
-    # OTIMIZAÇÃO: Carrega agentes UMA VEZ antes do loop principal
-    # Não recarrega a cada episódio (leitura de disco é lenta)
-    agents_current = [AgentInfo.from_dict(a) for a in load_agents()]
-    agent_info_cache = next((a for a in agents_current if a.nome == interface.selected_agent), None)
-    
+    session = SimulationSession(env, interface.selected_agent, selected_agent, selected_map,
+                                agent=agent, race_manager=race_manager)
+    interface.ranking_data = session.ranking_data
     logger.info(f"Treinando {n_parallel} execuções paralelas do agente {car_to_train} no mapa: {map_type} (Fase: {fase_desc})")
-    obs = env.reset()  # CORREÇÃO: DummyVecEnv.reset() retorna apenas obs
-    rewards_hist = [[] for _ in range(n_parallel)]
-    collisions_hist = [[] for _ in range(n_parallel)]
-    penalties_hist = [[] for _ in range(n_parallel)]
-    actions_hist = [[] for _ in range(n_parallel)]
-    checkpoints_hist = [[] for _ in range(n_parallel)]
-    episodios = [0 for _ in range(n_parallel)]
-    ciclo_total = 0
-    trajs = [[(obs[i][0], obs[i][1])] for i in range(n_parallel)]
-    iter_count = 0
     print("Loop principal iniciado!")
-    dones = [False for _ in range(n_parallel)]
-    avg_speed = 0.0  # Corrige UnboundLocalError
-    n_dif = 0        # Corrige UnboundLocalError
-    treino_start = time.time()
-    while True:
-        if iter_count % 100 == 0:
-            check_resources()
-        interface.process_events()
-        if interface.paused:
-            interface.draw_dashboard(rewards_hist, collisions_hist, penalties_hist, ciclo_total, avg_speed, n_dif)
-            interface.update()
-            time.sleep(0.05)
-            continue
-        interface.clear()
-        # CORREÇÃO: Desenha grid de ambientes simples
-        for idx, env_single in enumerate(env.envs):
-            interface.draw_env_grid_simple(env_single, idx)
-        speeds = []
-        unique_states = set()
-        
-        # ===== LÓGICA HÍBRIDA: TREINO vs CORRIDA =====
-        if race_manager:
-            # MODO CORRIDA: Múltiplos agentes com seus próprios cérebros
-            actions = race_manager.get_actions(obs)
-        else:
-            # MODO TREINO: Um único agente clonado
-            actions_array, _ = agent.model.predict(obs, deterministic=False)
-            actions = [int(a) for a in actions_array]  # Converte array para list de ints
-        
-        # CORREÇÃO: DummyVecEnv.step() sempre retorna 4 valores
-        obs_, rewards, dones, infos = env.step(actions)
-        terminateds = dones
-        truncateds = [False for _ in dones]
-        dones = [terminateds[i] or truncateds[i] for i in range(n_parallel)]
-        obs = obs_
-        for idx in range(n_parallel):
-            penalty = min(0, rewards[idx])
-            rewards_hist[idx].append(rewards[idx])
-            collisions_hist[idx].append(infos[idx]["collisions"] if "collisions" in infos[idx] else 0)
-            penalties_hist[idx].append(penalty)
-            actions_hist[idx].append(int(actions[idx]))
-            checkpoints_hist[idx].append(infos[idx].get("checkpoint", 0))
-            speeds.append(abs(obs[idx][2]*2))
-            unique_states.add((round(obs[idx][0],1), round(obs[idx][1],1), round(obs[idx][3],1)))
-        ciclo_total += sum([1 for d in dones if d])
-        avg_speed = sum(speeds)/len(speeds) if speeds else 0.0
-        n_dif = len(unique_states)
-        interface.draw_dashboard(rewards_hist, collisions_hist, penalties_hist, ciclo_total, avg_speed, n_dif)
-        interface.update()
-        iter_count += 1
-        time.sleep(0.05)
-        # Mostra resumo no terminal a cada 20 episódios
-        if iter_count % 20 == 0:
-            avg_reward = sum([sum(r[-20:]) for r in rewards_hist]) / (20 * n_parallel)
-            print(f"[TREINO] Episódio {ciclo_total} | Média recompensa (20): {avg_reward:.2f} | Média velocidade: {avg_speed:.2f}")
-        for idx in range(n_parallel):
-            if dones[idx]:
-                is_success = infos[idx].get('success', False)
-                episode_time = infos[idx].get('episode_time', None)
-                training_logger.log(idx, rewards_hist[idx], collisions_hist[idx], actions=actions_hist[idx], checkpoints=checkpoints_hist[idx], episode_time=episode_time, success=is_success)
-                
-                # Atualiza ranking ao final de cada episódio
-                key = f"{selected_agent}|{selected_map}"
-                score = sum(rewards_hist[idx])
-                speed = avg_speed
-                tempo = episode_time or 0
-                prev = interface.ranking_data.get(key, {"score": -float('inf')})
-                if score > prev["score"]:
-                    interface.ranking_data[key] = {"score": score, "speed": speed, "tempo": tempo}
-                    interface.save_ranking_data()
-                
-                # OTIMIZAÇÃO: Atualiza o cache em memória em vez de reler do disco
-                # Isso reduz I/O e melhora performance
-                if agent_info_cache:
-                    agent_info_cache.tempo_acumulado += episode_time or 0
-                    
-                    # Calcula XP baseado no score (gamificação)
-                    xp_gained = max(0, int(score * 10))  # 10 XP por ponto de recompensa
-                    
-                    # Adiciona ao histórico (subjetivação)
-                    agent_info_cache.historico.append({
-                        "mapa": selected_map,
-                        "score": score,
-                        "velocidade": speed,
-                        "tempo": tempo,
-                        "xp_gained": xp_gained,
-                        "checkpoints": checkpoints_hist[idx][-1] if checkpoints_hist[idx] else 0,
-                        "data": time.strftime("%Y-%m-%d %H:%M:%S"),
-                        "tipo_evento": "simulacao"
-                    })
-                    
-                    # Limita histórico para não pesar (últimas 30 corridas)
-                    agent_info_cache.historico = agent_info_cache.historico[-30:]
-                    
-                    # Salva APENAS AQUI (não a cada iteração, apenas ao fim do episódio)
-                    agents_all = [AgentInfo.from_dict(a) for a in load_agents()]
-                    agents_all = [a.to_dict() if a.nome != agent_info_cache.nome else agent_info_cache.to_dict() for a in agents_all]
-                    save_agents(agents_all)
-                
-                # CORREÇÃO: reset() sempre retorna tuple
-                obs_single, _ = env.envs[idx].reset()
-                obs[idx] = obs_single
-                dones[idx] = False
-                episodios[idx] += 1
-                actions_hist[idx] = []
-                checkpoints_hist[idx] = []
-                gc.collect()
-        if interface.should_restart():
-            obs, _ = env.reset()
-            for idx in range(n_parallel):
-                rewards_hist[idx] = []
-                collisions_hist[idx] = []
-                penalties_hist[idx] = []
-                actions_hist[idx] = []
-                checkpoints_hist[idx] = []
-            ciclo_total = 0
-            iter_count = 0
-            interface.clear_restart()
-    training_logger.close()
+    render = RenderSchedule(every_n=render_every, fps=render_fps)
+    renderer = None
+    if render_thread:
+        snapshots = SnapshotBuffer()
+        renderer = RenderThread(interface, snapshots, fps=render_fps or 60)
+        renderer.start()
+        next_events = 0.0
+    try:
+        while True:
+            if renderer is not None:
+                # Desenho na RenderThread: o loop só publica snapshots, sem desenhar nem esperar.
+                # Eventos e apresentação seguem nesta thread (dona da janela)
+                now = time.monotonic()
+                if now >= next_events or interface.paused:
+                    if pump_events(interface, renderer):
+                        break
+                    next_events = now + renderer.interval
+                renderer.present()
+                if interface.paused:
+                    time.sleep(0.05)
+                    continue
+                session.step(session.select_actions())
+                if snapshots.wants_snapshot():
+                    snapshots.publish(session.snapshot())
+            else:
+                draw = render.due(session.iter_count)
+                if draw or interface.paused:
+                    interface.process_events()
+                if interface.paused:
+                    interface.draw_dashboard(*session.dashboard_args())
+                    interface.update()
+                    time.sleep(0.05)
+                    continue
+                if draw:
+                    interface.clear()
+                    # CORREÇÃO: Desenha grid de ambientes simples
+                    for idx, env_single in enumerate(env.envs):
+                        interface.draw_env_grid_simple(env_single, idx)
+                session.step(session.select_actions())
+                if draw:
+                    interface.draw_dashboard(*session.dashboard_args())
+                    interface.update()
+                if render.throttled:
+                    time.sleep(0.05)
+            if interface.should_restart():
+                session.restart()
+                interface.clear_restart()
+    finally:
+        # Sai pelo fechamento da janela (exit() em process_events ou break após pump_events):
+        # grava os logs e o chunk de episódios pendente
+        if renderer is not None:
+            renderer.stop(timeout=None)
+        session.close()
+    interface.close()  # Só depois de parar a RenderThread
+    exit()
+
+def run_headless(agent_name=None, map_type="corridor", n_parallel=8, skip_training=False, learning_rate=None, gamma=None,
+                 max_steps=None, max_episodes=None):
+    """Executa o loop de simulação sem pygame, na velocidade máxima do hardware.
+
+    Faz a mesma contabilidade do main (log de episódios, ranking, histórico do agente),
+    mas sem menu, desenho nem pausas.
+
+    Args:
+        agent_name (str): Nome do agente em agents.json. Se None, usa o primeiro agente.
+        map_type (str): Tipo de mapa.
+        n_parallel (int): Execuções paralelas.
+        skip_training (bool): Se True, corrida competitiva com os agentes salvos.
+        learning_rate (float): Taxa de aprendizado do agente RL.
+        gamma (float): Fator de desconto RL.
+        max_steps (int): Para após este número de passos (None = sem limite).
+        max_episodes (int): Para após este número de episódios concluídos (None = sem limite).
+    Returns:
+        SimulationSession: Sessão encerrada, com históricos e contadores finais.
+    Raises:
+        ValueError: Se o agente não existir.
+    """
+    agents = [AgentInfo.from_dict(a) for a in load_agents()]
+    if agent_name is None:
+        agent_info = agents[0] if agents else None
+    else:
+        agent_info = next((a for a in agents if a.nome == agent_name), None)
+    if agent_info is None:
+        raise ValueError(f"Agente não encontrado: {agent_name}. Crie um agente pela interface ou em agents.json.")
+    print(f"[HEADLESS] Agente: {agent_info.nome} ({agent_info.tipo}) | Mapa: {map_type} | Paralelos: {n_parallel}")
+    env, agent, race_manager = setup_run(agent_info, map_type, n_parallel, skip_training, learning_rate, gamma)
+    session = SimulationSession(env, agent_info.nome, agent_info.tipo, map_type, agent=agent,
+                                race_manager=race_manager, collect_garbage=False)
+    start = time.time()
+    try:
+        while ((max_steps is None or session.iter_count < max_steps)
+               and (max_episodes is None or session.episodes_done < max_episodes)):
+            session.step(session.select_actions())
+    finally:
+        session.close()
+        env.close()
+    elapsed = max(time.time() - start, 1e-9)
+    print(f"[HEADLESS] {session.iter_count} passos, {session.episodes_done} episódios em {elapsed:.1f}s "
+          f"({session.iter_count / elapsed:.1f} passos/s)")
+    return session
 
 def run_curriculum(car_to_train=1, n_parallel=4):
     """Executa o currículo de fases para o agente RL.
@@ -589,7 +851,8 @@ def run_curriculum(car_to_train=1, n_parallel=4):
                         actions=None,
                         checkpoints=[episode_checkpoints[i][-1]] if episode_checkpoints[i] else [0],  # Sempre lista
                         episode_time=None,
-                        success=True
+                        success=True,
+                        reward_components=infos[i].get('reward_components')
                     )
                     # CORREÇÃO: reset() sempre retorna tuple
                     obs_reset, _ = env.envs[i].reset()
@@ -634,6 +897,13 @@ if __name__ == "__main__":
     parser.add_argument("--n_parallel", type=int, default=None, help="Número de execuções paralelas")
     parser.add_argument("--map_type", type=str, default=None, help="Tipo de mapa (corridor, curve, circle)")
     parser.add_argument("--config", type=str, default="config.json", help="Arquivo JSON de configuração de hiperparâmetros")
+    parser.add_argument("--headless", action="store_true", help="Simula sem pygame (sem menu, desenho nem pausas)")
+    parser.add_argument("--agent", type=str, default=None, help="Nome do agente no modo headless (padrão: o primeiro de agents.json)")
+    parser.add_argument("--steps", type=int, default=None, help="Modo headless: para após N passos")
+    parser.add_argument("--episodes", type=int, default=None, help="Modo headless: para após N episódios")
+    parser.add_argument("--render-every", type=int, default=None, help="Desenha só a cada N passos, sem limitar a simulação")
+    parser.add_argument("--render-fps", type=float, default=None, help="Desenha no máximo a X quadros/s, sem limitar a simulação")
+    parser.add_argument("--render-thread", action="store_true", help="Desenha em uma thread própria, a partir de snapshots da simulação")
     args = parser.parse_args()
 
     # Carrega config.json e mescla com argumentos
@@ -648,5 +918,11 @@ if __name__ == "__main__":
         cfg["map_type"] = args.map_type
 
     map_type, fase_idx, n_agents, car_to_train, n_parallel = cfg["map_type"], 0, 1, 1, cfg["n_parallel"]
-    main(map_type=map_type, car_to_train=car_to_train, fase_idx=fase_idx, n_parallel=n_parallel, skip_training=args.skip_training, learning_rate=cfg["learning_rate"], gamma=cfg["gamma"])
-    run_curriculum(car_to_train=car_to_train, n_parallel=n_parallel)
+    if args.headless:
+        run_headless(agent_name=args.agent, map_type=map_type, n_parallel=n_parallel, skip_training=args.skip_training,
+                     learning_rate=cfg["learning_rate"], gamma=cfg["gamma"], max_steps=args.steps, max_episodes=args.episodes)
+    else:
+        main(map_type=map_type, car_to_train=car_to_train, fase_idx=fase_idx, n_parallel=n_parallel, skip_training=args.skip_training,
+             learning_rate=cfg["learning_rate"], gamma=cfg["gamma"], render_every=args.render_every, render_fps=args.render_fps,
+             render_thread=args.render_thread)
+        run_curriculum(car_to_train=car_to_train, n_parallel=n_parallel)
@@ -4,52 +4,54 @@ Fornece classes e funções para registrar recompensas, colisões, checkpoints e
 """
 import pygame
 import numpy as np
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend to avoid tkinter issues
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_agg import FigureCanvasAgg
-import gc
 import time
 import pandas as pd
+from history import EpisodeHistory
+from sparkline import Sparkline
+
+METRICS_WINDOW = 100  # Últimos valores guardados de cada série
+_REWARDS, _COLLISIONS, _EPISODE_TIMES, _CHECKPOINTS = range(4)
 
 class Metrics:
     """Classe utilitária para registrar e calcular métricas de desempenho do agente.
 
+    As séries ficam num EpisodeHistory (uma linha por série) com os últimos
+    METRICS_WINDOW valores.
+
     Attributes:
-        rewards (list): Histórico de recompensas.
-        collisions (list): Histórico de colisões.
-        checkpoints (list): Histórico de checkpoints atingidos.
+        rewards (np.ndarray): Histórico de recompensas.
+        collisions (np.ndarray): Histórico de colisões.
+        checkpoints (np.ndarray): Histórico de checkpoints atingidos.
     """
     def __init__(self):
-        self.rewards = []
-        self.collisions = []
-        self.episode_times = []
-        self.checkpoints = []
-        self.fig, self.ax = plt.subplots(figsize=(3, 2))
+        self.history = EpisodeHistory(4, capacity=METRICS_WINDOW)
         self.update_counter = 0
+        self.plot = None  # Sparkline criado no primeiro render
+
+    @property
+    def rewards(self):
+        return self.history.window(_REWARDS)
+
+    @property
+    def collisions(self):
+        return self.history.window(_COLLISIONS)
+
+    @property
+    def episode_times(self):
+        return self.history.window(_EPISODE_TIMES)
+
+    @property
+    def checkpoints(self):
+        return self.history.window(_CHECKPOINTS)
 
     def update(self, reward, collisions, episode_time=None, checkpoint=None):
-        self.rewards.append(reward)
-        self.collisions.append(collisions)
+        self.history.append_env(_REWARDS, reward)
+        self.history.append_env(_COLLISIONS, collisions)
         if episode_time is not None:
-            self.episode_times.append(episode_time)
+            self.history.append_env(_EPISODE_TIMES, episode_time)
         if checkpoint is not None:
-            self.checkpoints.append(checkpoint)
-        if len(self.rewards) > 100:
-            self.rewards.pop(0)
-            self.collisions.pop(0)
-            if self.episode_times:
-                self.episode_times.pop(0)
-            if self.checkpoints:
-                self.checkpoints.pop(0)
+            self.history.append_env(_CHECKPOINTS, checkpoint)
         self.update_counter += 1
-        # Limpa listas a cada 1000 updates para evitar uso excessivo de memória
-        if self.update_counter % 1000 == 0:
-            self.rewards = self.rewards[-100:]
-            self.collisions = self.collisions[-100:]
-            self.episode_times = self.episode_times[-100:]
-            self.checkpoints = self.checkpoints[-100:]
-            gc.collect()
 
     def compute_moving_average(self, data, window=10):
         """Calcula a média móvel de uma lista de dados.
@@ -67,30 +69,15 @@ class Metrics:
         # Só atualiza o gráfico a cada N frames
         if self.update_counter % render_interval != 0:
             return
-        self.ax.clear()
-        # Gráficos de média móvel
-        if len(self.rewards) >= 10:
-            self.ax.plot(self.compute_moving_average(self.rewards), label="Recompensa (média)")
-        if len(self.collisions) >= 10:
-            self.ax.plot(self.compute_moving_average(self.collisions), label="Colisões (média)")
-        if self.checkpoints and len(self.checkpoints) >= 10:
-            self.ax.plot(self.compute_moving_average(self.checkpoints), label="Checkpoint (média)")
-        self.ax.legend()
-        self.ax.set_title("Performance")
-        canvas = FigureCanvasAgg(self.fig)
-        canvas.draw()
-        renderer = canvas.get_renderer()
-        # Use buffer_rgba() instead of deprecated tostring_rgb()
-        raw_data = renderer.buffer_rgba()
-        size = canvas.get_width_height()
-        # Convert RGBA to RGB by converting to string then using RGB
-        import numpy as np
-        data_array = np.frombuffer(raw_data, dtype=np.uint8).reshape((*size[::-1], 4))
-        # Drop alpha channel, keep only RGB
-        rgb_array = data_array[:, :, :3]
-        # Create surface from RGB array
-        surf = pygame.surfarray.make_surface(np.transpose(rgb_array, (1, 0, 2)))
-        screen.blit(surf, (550, 10))
+        if self.plot is None:
+            self.plot = Sparkline((300, 200), [(31, 119, 180), (214, 39, 40), (44, 160, 44)], title="Performance (média móvel)",
+                                  labels=["Recompensa", "Colisões", "Checkpoint"])
+        # Gráficos de média móvel, recalculados só quando chegaram dados novos
+        if not self.plot.is_current(self.update_counter):
+            series = [self.compute_moving_average(self.rewards), self.compute_moving_average(self.collisions),
+                      self.compute_moving_average(self.checkpoints)]
+            self.plot.draw(series, key=self.update_counter)
+        screen.blit(self.plot.surface, (550, 10))
 
     def export_metrics(self, filename="metrics.csv"):
         """Exporta métricas para um arquivo CSV usando pandas."""
@@ -101,3 +88,19 @@ class Metrics:
             "checkpoints": self.checkpoints
         })
         df.to_csv(filename, index=False)
+
+    def export_plot(self, filename="metrics.png"):
+        """Exporta o gráfico das médias móveis como imagem (relatório) usando matplotlib."""
+        import matplotlib
+        matplotlib.use('Agg')  # Use non-interactive backend to avoid tkinter issues
+        import matplotlib.pyplot as plt
+        fig, ax = plt.subplots(figsize=(6, 4))
+        ax.plot(self.compute_moving_average(self.rewards), label="Recompensa (média)")
+        ax.plot(self.compute_moving_average(self.collisions), label="Colisões (média)")
+        if len(self.checkpoints):
+            ax.plot(self.compute_moving_average(self.checkpoints), label="Checkpoint (média)")
+        ax.legend()
+        ax.set_title("Performance")
+        fig.tight_layout()
+        fig.savefig(filename)
+        plt.close(fig)
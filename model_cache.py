@@ -0,0 +1,142 @@
+"""Registro de modelos do processo, compartilhado por corridas e avaliações.
+
+RaceManager, CompetitiveRaceManager e as avaliações pedem modelos por caminho; o
+ModelCache carrega cada .zip uma vez (chave: caminho absoluto + algoritmo,
+validada pelo mtime/tamanho do arquivo) e devolve o mesmo objeto enquanto o arquivo
+não mudar, então raias com o mesmo cérebro compartilham um único modelo. Os modelos
+são carregados só para inferência: policy_inference.InferencePolicy (só os pesos da
+política, sem otimizador nem buffers); políticas que ela não suporta caem no load do
+SB3 com replay/rollout buffer de um único elemento. Quando a soma
+estimada dos modelos passa de MODEL_CACHE_BYTES, os menos usados recentemente saem
+do registro (quem ainda os referencia continua funcionando).
+"""
+import os
+import threading
+from collections import OrderedDict
+from agent import ALGORITHMS
+from config import RL_ALGORITHM, MODEL_CACHE_BYTES
+from logger import setup_logger
+from policy_inference import InferencePolicy
+
+logger = setup_logger()
+
+# Campos salvos no .zip substituídos no load: estado só de treino com tamanho mínimo
+INFERENCE_OVERRIDES = {"buffer_size": 1, "n_steps": 1}
+
+
+def _file_stamp(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def model_nbytes(model):
+    """Memória estimada de um modelo: pesos da política + buffers de treino que existirem."""
+    if isinstance(model, InferencePolicy):
+        return model.nbytes
+    nbytes = sum(p.numel() * p.element_size() for p in model.policy.parameters())
+    for name in ("replay_buffer", "rollout_buffer"):
+        buffer = getattr(model, name, None)
+        if buffer is not None:
+            nbytes += sum(v.nbytes for v in vars(buffer).values() if hasattr(v, "nbytes"))
+    return nbytes
+
+
+def load_inference_model(path, algorithm=None):
+    """Carrega um modelo para inferência (sem ambiente, otimizador nem buffers de treino).
+
+    Args:
+        path (str): Arquivo .zip do modelo.
+        algorithm (str): "DQN", "PPO" ou "SAC" (padrão: RL_ALGORITHM); só usado se a
+            política não for suportada pela InferencePolicy.
+    Returns:
+        InferencePolicy | BaseAlgorithm: Objeto com predict(obs, deterministic=...).
+    """
+    try:
+        return InferencePolicy.load(path)
+    except ValueError as e:
+        logger.debug(f"[ModelCache] {e}; usando o load do SB3")
+    algorithm_class = ALGORITHMS.get(algorithm, ALGORITHMS[RL_ALGORITHM])
+    return algorithm_class.load(path, device="cpu", custom_objects=INFERENCE_OVERRIDES)
+
+
+class ModelCache:
+    """Cache LRU de modelos de inferência por arquivo.
+
+    Args:
+        max_bytes (int): Orçamento de memória estimada (model_nbytes); o modelo mais
+            recente fica sempre, mesmo acima do orçamento.
+        loader (callable): Função (path, algorithm) -> modelo.
+
+    Attributes:
+        nbytes (int): Memória estimada dos modelos no registro.
+        hits (int): Pedidos atendidos sem carregar.
+        loads (int): Arquivos carregados.
+        evictions (int): Modelos retirados pelo orçamento.
+    """
+    def __init__(self, max_bytes=MODEL_CACHE_BYTES, loader=load_inference_model):
+        self.max_bytes = max_bytes
+        self.loader = loader
+        self.nbytes = 0
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # (path, algorithm) -> (stamp, modelo, bytes)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, path, algorithm=None):
+        """Modelo do arquivo path, carregando-o se não estiver no registro ou se o arquivo mudou.
+
+        Args:
+            path (str): Arquivo .zip do modelo.
+            algorithm (str): Algoritmo do agente ("DQN", "PPO", "SAC").
+        Returns:
+            InferencePolicy | BaseAlgorithm: Modelo compartilhado (não treine nem altere).
+        """
+        key = (os.path.abspath(path), algorithm or RL_ALGORITHM)
+        stamp = _file_stamp(key[0])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._remove(key)
+            model = self.loader(key[0], key[1])
+            nbytes = model_nbytes(model)
+            self._entries[key] = (stamp, model, nbytes)
+            self.nbytes += nbytes
+            self.loads += 1
+            self._evict()
+            return model
+
+    def _remove(self, key):
+        self.nbytes -= self._entries.pop(key)[2]
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+            logger.debug(f"[ModelCache] Removido do cache: {key[0]}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_model_cache():
+    """ModelCache do processo."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ModelCache()
+        return _cache
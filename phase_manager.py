@@ -2,10 +2,18 @@
 
 Define as fases de aprendizado e critérios de sucesso/falha para progressão.
 """
+from collections import deque
 from dataclasses import dataclass
 from typing import Dict, List
 import json
 import os
+import config
+from config import PHASE_JOURNAL_COMPACT
+
+
+def _plain(value):
+    """Escalares NumPy como tipos Python (o diário e o snapshot são JSON)."""
+    return value.item() if hasattr(value, 'item') else value
 
 @dataclass
 class Phase:
@@ -92,30 +100,128 @@ class PhaseManager:
         self.agent_name = agent_name
         self.current_phase_id = 0
         self.episode_stats = []  # Lista de (phase_id, reward, success, steps)
+        self._saved_stats = 0  # Episódios já gravados no banco (STORAGE_BACKEND = "sqlite")
+        self._journal_lines = 0  # Linhas no diário desde a última compactação
+        self._phase_counts = {}  # phase_id -> episódios registrados na fase
+        self._windows = {}  # phase_id -> deque com os últimos min_episodes_success episódios
         self.load_progress()
     
+    @property
+    def progress_file(self):
+        return f"models/{self.agent_name}_progress.json"
+    
+    @property
+    def journal_file(self):
+        """Diário (JSON por linha) com o que aconteceu desde o último progress_file."""
+        return f"models/{self.agent_name}_progress.jsonl"
+    
+    def _track(self, stat):
+        """Atualiza contagem e janela deslizante da fase do episódio (O(1))."""
+        phase_id = stat['phase_id']
+        self._phase_counts[phase_id] = self._phase_counts.get(phase_id, 0) + 1
+        window = self._windows.get(phase_id)
+        if window is None:
+            phase = self.PHASES[min(phase_id, len(self.PHASES) - 1)]
+            window = self._windows[phase_id] = deque(maxlen=phase.min_episodes_success)
+        window.append(stat)
+    
+    def _reset_index(self):
+        self._phase_counts = {}
+        self._windows = {}
+        for stat in self.episode_stats:
+            self._track(stat)
+    
     def load_progress(self):
-        """Carrega progresso salvo do agente."""
-        progress_file = f"models/{self.agent_name}_progress.json"
-        if os.path.exists(progress_file):
+        """Carrega progresso salvo do agente (snapshot + replay do diário)."""
+        if config.STORAGE_BACKEND == "sqlite":
+            from corrida_db import get_database
+            saved = get_database().load_phase_progress(self.agent_name)
+            if saved is not None:
+                self.current_phase_id, self.episode_stats = saved
+            self._saved_stats = len(self.episode_stats)
+            self._reset_index()
+            return
+        if os.path.exists(self.progress_file):
             try:
-                with open(progress_file, 'r') as f:
+                with open(self.progress_file, 'r') as f:
                     data = json.load(f)
                     self.current_phase_id = data.get('current_phase_id', 0)
                     self.episode_stats = data.get('episode_stats', [])
             except Exception as e:
                 print(f"[PhaseManager] Erro ao carregar progresso: {e}")
+        self._replay_journal()
+        self._reset_index()
+    
+    def _replay_journal(self):
+        """Reaplica o diário sobre o snapshot.
+        
+        Cada linha traz "n" (quantos episódios existiam antes dela); linhas já
+        incorporadas ao snapshot (compactação interrompida antes de truncar o diário)
+        são ignoradas. Uma última linha incompleta (queda no meio da escrita) é cortada
+        do arquivo, para que as próximas linhas não sejam gravadas coladas nela.
+        """
+        self._journal_lines = 0
+        if not os.path.exists(self.journal_file):
+            return
+        good_bytes = 0
+        with open(self.journal_file, 'rb') as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("linha incompleta")
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                good_bytes += len(line)
+                self._journal_lines += 1
+                if 'episode' in entry:
+                    if entry['n'] == len(self.episode_stats):
+                        self.episode_stats.append(entry['episode'])
+                elif entry['n'] >= len(self.episode_stats):
+                    self.current_phase_id = entry['current_phase_id']
+            torn = f.tell() > good_bytes
+        if torn:
+            try:
+                os.truncate(self.journal_file, good_bytes)
+            except OSError as e:
+                print(f"[PhaseManager] Erro ao cortar o diário: {e}")
+    
+    def _append_journal(self, entry):
+        os.makedirs(os.path.dirname(self.journal_file) or '.', exist_ok=True)
+        try:
+            with open(self.journal_file, 'a') as f:
+                f.write(json.dumps(entry) + "\n")
+        except Exception as e:
+            print(f"[PhaseManager] Erro ao gravar diário: {e}")
+            return
+        self._journal_lines += 1
+        if self._journal_lines >= PHASE_JOURNAL_COMPACT:
+            self.save_progress()
     
     def save_progress(self):
-        """Salva progresso do agente."""
-        progress_file = f"models/{self.agent_name}_progress.json"
+        """Salva progresso do agente (no banco, só acrescenta os episódios novos).
+        
+        No backend JSON compacta: grava o snapshot completo (temporário + rename) e
+        esvazia o diário.
+        """
+        if config.STORAGE_BACKEND == "sqlite":
+            from corrida_db import get_database
+            get_database().save_phase_progress(self.agent_name, self.current_phase_id,
+                                               self.episode_stats[self._saved_stats:])
+            self._saved_stats = len(self.episode_stats)
+            return
+        progress_file = self.progress_file
         os.makedirs(os.path.dirname(progress_file) or '.', exist_ok=True)
         try:
-            with open(progress_file, 'w') as f:
+            with open(progress_file + '.tmp', 'w') as f:
                 json.dump({
                     'current_phase_id': self.current_phase_id,
                     'episode_stats': self.episode_stats,
-                }, f, indent=2)
+                }, f)
+            os.replace(progress_file + '.tmp', progress_file)
+            if os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
+            self._journal_lines = 0
         except Exception as e:
             print(f"[PhaseManager] Erro ao salvar progresso: {e}")
     
@@ -127,13 +233,18 @@ class PhaseManager:
             success: Se o agente completou com sucesso
             steps: Número de steps no episódio
         """
-        self.episode_stats.append({
+        stat = {
             'phase_id': self.current_phase_id,
-            'reward': reward,
-            'success': success,
-            'steps': steps,
-        })
-        self.save_progress()
+            'reward': _plain(reward),
+            'success': _plain(success),
+            'steps': _plain(steps),
+        }
+        self.episode_stats.append(stat)
+        self._track(stat)
+        if config.STORAGE_BACKEND == "sqlite":
+            self.save_progress()
+        else:
+            self._append_journal({'n': len(self.episode_stats) - 1, 'episode': stat})
     
     def get_current_phase(self) -> Phase:
         """Retorna a fase atual."""
@@ -141,6 +252,10 @@ class PhaseManager:
             return self.PHASES[-1]
         return self.PHASES[self.current_phase_id]
     
+    def _recent_stats(self) -> List[Dict]:
+        """Últimos min_episodes_success episódios da fase atual (janela deslizante)."""
+        return list(self._windows.get(self.current_phase_id, ()))
+    
     def check_phase_completion(self) -> bool:
         """Verifica se a fase atual foi completada.
         
@@ -150,17 +265,11 @@ class PhaseManager:
         """
         phase = self.get_current_phase()
         
-        # Pega estatísticas da fase atual
-        current_phase_stats = [
-            s for s in self.episode_stats 
-            if s['phase_id'] == self.current_phase_id
-        ]
-        
-        if len(current_phase_stats) < phase.min_episodes_success:
+        if self._phase_counts.get(self.current_phase_id, 0) < phase.min_episodes_success:
             return False
         
         # Últimos N episódios (janela deslizante)
-        recent_stats = current_phase_stats[-phase.min_episodes_success:]
+        recent_stats = self._recent_stats()[-phase.min_episodes_success:]
         success_count = sum(1 for s in recent_stats if s['success'])
         success_rate = success_count / len(recent_stats)
         
@@ -180,26 +289,24 @@ class PhaseManager:
             return False
         
         self.current_phase_id += 1
-        self.save_progress()
+        if config.STORAGE_BACKEND == "sqlite":
+            self.save_progress()
+        else:
+            self._append_journal({'n': len(self.episode_stats), 'current_phase_id': self.current_phase_id})
         print(f"\n[PhaseManager] ✓ {self.agent_name} AVANÇOU para: {self.get_current_phase().name}")
         return True
     
     def get_phase_progress(self) -> Dict:
         """Retorna progresso detalhado da fase atual."""
         phase = self.get_current_phase()
-        current_phase_stats = [
-            s for s in self.episode_stats 
-            if s['phase_id'] == self.current_phase_id
-        ]
-        
-        recent_stats = current_phase_stats[-phase.min_episodes_success:] if current_phase_stats else []
+        recent_stats = self._recent_stats()[-phase.min_episodes_success:]
         success_count = sum(1 for s in recent_stats if s['success'])
         success_rate = success_count / len(recent_stats) if recent_stats else 0
         avg_reward = sum(s['reward'] for s in recent_stats) / len(recent_stats) if recent_stats else 0
         
         return {
             'phase_name': phase.name,
-            'total_episodes': len(current_phase_stats),
+            'total_episodes': self._phase_counts.get(self.current_phase_id, 0),
             'recent_success_rate': success_rate,
             'success_rate_required': phase.success_rate_threshold,
             'avg_reward': avg_reward,
@@ -208,7 +315,6 @@ class PhaseManager:
             'completed': self.check_phase_completion(),
         }
 
-
 if __name__ == '__main__':
     # Teste
     pm = PhaseManager('test_agent')
@@ -0,0 +1,234 @@
+"""Política só de inferência lida direto do .zip do Stable Baselines3.
+
+Para corridas e avaliações só a rede da política importa. InferencePolicy.load lê do
+arquivo apenas as entradas de "data" que descrevem a política (classe, kwargs,
+espaços, exploration_rate) e os pesos em policy.pth — sem o estado do otimizador,
+sem replay/rollout buffer e sem ambiente — e guarda só o caminho observação ->
+logits/valores-Q como um nn.Sequential pequeno, executado em torch.inference_mode.
+
+Suporta políticas de ações discretas: DQN (Q-valores; epsilon-greedy com o
+exploration_rate salvo quando deterministic=False, como o DQN.predict) e
+actor-critic (PPO/A2C; amostra da Categorical quando deterministic=False).
+
+A MLP é pequena (15 entradas, 4 ações), então o custo por chamada é quase todo
+overhead. O forward pode rodar em três backends (POLICY_BACKEND no config):
+"torch" (nn.Sequential), "torchscript" (módulo traçado e congelado) e "numpy"
+(NumpyMLP: pesos em arrays float32 contíguos, sem tensores). predict_batch devolve
+as ações gulosas de um lote pelo backend escolhido.
+"""
+import copy
+import io
+import json
+import zipfile
+import numpy as np
+import torch
+from gymnasium import spaces
+from stable_baselines3.common.save_util import json_to_data
+from stable_baselines3.dqn.policies import DQNPolicy
+from stable_baselines3.common.policies import ActorCriticPolicy
+from config import POLICY_BACKEND
+
+# Entradas de "data" necessárias para reconstruir a política
+POLICY_DATA_KEYS = ("policy_class", "policy_kwargs", "observation_space", "action_space", "exploration_rate")
+BACKENDS = ("torch", "torchscript", "numpy")
+
+
+def read_policy_zip(path):
+    """Lê do .zip do SB3 só a descrição da política e os pesos.
+
+    Returns:
+        tuple: (data, state_dict) com data restrito a POLICY_DATA_KEYS.
+    """
+    with zipfile.ZipFile(path) as archive:
+        raw = json.loads(archive.read("data").decode())
+        data = json_to_data(json.dumps({k: raw[k] for k in POLICY_DATA_KEYS if k in raw}))
+        with archive.open("policy.pth") as f:
+            state_dict = torch.load(io.BytesIO(f.read()), map_location="cpu", weights_only=True)
+    return data, state_dict
+
+
+def _unused_lr_schedule(_progress):
+    return 0.0
+
+
+def _policy_net(policy):
+    """Caminho observação -> valores-Q/logits de uma política do SB3.
+
+    Returns:
+        tuple: (nn.Sequential, kind) com kind "dqn" ou "actor_critic".
+    Raises:
+        ValueError: Se a política ou o espaço de ações não forem suportados.
+    """
+    if not isinstance(policy.action_space, spaces.Discrete):
+        raise ValueError(f"Política de inferência só suporta ações discretas, não {policy.action_space}")
+    if isinstance(policy, DQNPolicy):
+        return torch.nn.Sequential(policy.q_net.features_extractor, policy.q_net.q_net), "dqn"
+    if isinstance(policy, ActorCriticPolicy):
+        extractor = policy.features_extractor if policy.share_features_extractor else policy.pi_features_extractor
+        return torch.nn.Sequential(extractor, policy.mlp_extractor.policy_net, policy.action_net), "actor_critic"
+    raise ValueError(f"Política não suportada para inferência: {type(policy).__name__}")
+
+
+class NumpyMLP:
+    """Forward de uma MLP (Flatten/Linear/ReLU/Tanh) só com NumPy.
+
+    Args:
+        layers (list): Itens ("linear", W [entrada, saída], b) ou ("relu",)/("tanh",);
+            W e b são float32 C-contíguos.
+    """
+    ACTIVATIONS = {torch.nn.ReLU: "relu", torch.nn.Tanh: "tanh"}
+
+    def __init__(self, layers):
+        self.layers = layers
+
+    @classmethod
+    def from_module(cls, net):
+        """Copia os pesos de um nn.Module feito só de Flatten, Linear, ReLU e Tanh.
+
+        Raises:
+            ValueError: Se houver outra camada.
+        """
+        layers = []
+        for module in net.modules():
+            if isinstance(module, torch.nn.Linear):
+                weight = module.weight.detach().cpu().numpy().T
+                layers.append(("linear", np.ascontiguousarray(weight, dtype=np.float32),
+                               np.ascontiguousarray(module.bias.detach().cpu().numpy(), dtype=np.float32)))
+            elif type(module) in cls.ACTIVATIONS:
+                layers.append((cls.ACTIVATIONS[type(module)],))
+            elif not isinstance(module, torch.nn.Flatten) and next(module.children(), None) is None:
+                raise ValueError(f"Camada não suportada no backend numpy: {type(module).__name__}")
+        return cls(layers)
+
+    def __call__(self, observations):
+        x = observations.reshape(len(observations), -1)
+        for layer in self.layers:
+            if layer[0] == "linear":
+                x = x @ layer[1]
+                x += layer[2]
+            elif layer[0] == "relu":
+                np.maximum(x, 0, out=x)
+            else:
+                np.tanh(x, out=x)
+        return x
+
+
+class InferencePolicy:
+    """Rede da política de um modelo salvo, com predict compatível com o do SB3.
+
+    Args:
+        net (torch.nn.Module): Observação (lote, float32) -> logits ou valores-Q.
+        observation_space (spaces.Box): Espaço de observações.
+        action_space (spaces.Discrete): Espaço de ações.
+        kind (str): "dqn" (argmax dos valores-Q) ou "actor_critic" (logits).
+        exploration_rate (float): Epsilon do DQN para deterministic=False.
+        backend (str): "torch", "torchscript" ou "numpy" (padrão: POLICY_BACKEND).
+    """
+    def __init__(self, net, observation_space, action_space, kind, exploration_rate=0.0, backend=None):
+        self.net = net.eval()
+        for p in self.net.parameters():
+            p.requires_grad_(False)
+        self.observation_space = observation_space
+        self.action_space = action_space
+        self.kind = kind
+        self.exploration_rate = exploration_rate
+        self.nbytes = sum(p.numel() * p.element_size() for p in self.net.parameters())
+        self._rng = np.random.default_rng()
+        self.set_backend(backend or POLICY_BACKEND)
+
+    @classmethod
+    def load(cls, path, backend=None):
+        """Carrega a política de um .zip salvo por model.save.
+
+        Raises:
+            ValueError: Se a política ou o espaço de ações não forem suportados.
+        """
+        data, state_dict = read_policy_zip(path)
+        policy_class = data["policy_class"]
+        if not issubclass(policy_class, (DQNPolicy, ActorCriticPolicy)):
+            raise ValueError(f"Política não suportada para inferência: {policy_class.__name__}")
+        if not isinstance(data["action_space"], spaces.Discrete):
+            raise ValueError(f"Política de inferência só suporta ações discretas, não {data['action_space']}")
+        policy = policy_class(data["observation_space"], data["action_space"], _unused_lr_schedule,
+                              **data.get("policy_kwargs", {}))
+        policy.load_state_dict(state_dict)
+        net, kind = _policy_net(policy)
+        return cls(net, data["observation_space"], data["action_space"], kind,
+                   data.get("exploration_rate", 0.0), backend=backend)
+
+    @classmethod
+    def from_model(cls, model, backend=None):
+        """Exporta a política de um modelo do SB3 em memória (cópia dos pesos atuais).
+
+        Raises:
+            ValueError: Se a política ou o espaço de ações não forem suportados.
+        """
+        net, kind = _policy_net(model.policy)
+        net = copy.deepcopy(net).cpu()  # O modelo continua treinável
+        return cls(net, model.observation_space, model.action_space, kind,
+                   getattr(model, "exploration_rate", 0.0), backend=backend)
+
+    def set_backend(self, backend):
+        """Escolhe o forward usado por forward/predict/predict_batch.
+
+        Args:
+            backend (str): "torch", "torchscript" ou "numpy".
+        Raises:
+            ValueError: Backend desconhecido.
+        """
+        if backend == "numpy":
+            self._forward = NumpyMLP.from_module(self.net)
+        elif backend == "torchscript":
+            self._forward = self._torch_forward(self.to_torchscript())
+        elif backend == "torch":
+            self._forward = self._torch_forward(self.net)
+        else:
+            raise ValueError(f"Backend desconhecido: {backend} (use um de {BACKENDS})")
+        self.backend = backend
+
+    @staticmethod
+    def _torch_forward(module):
+        def forward(observations):
+            with torch.inference_mode():
+                return module(torch.from_numpy(observations)).numpy()
+        return forward
+
+    def to_torchscript(self):
+        """Módulo TorchScript (traçado e congelado) da rede; salve com torch.jit.save."""
+        example = torch.zeros((1,) + self.observation_space.shape, dtype=torch.float32)
+        with torch.no_grad():
+            return torch.jit.freeze(torch.jit.trace(self.net, example))
+
+    def forward(self, observations):
+        """Logits/valores-Q de um lote de observações (np.ndarray [n, obs_dim])."""
+        return self._forward(np.ascontiguousarray(observations, dtype=np.float32))
+
+    def predict_batch(self, observations):
+        """Ações gulosas (deterministic=True) de um lote de observações.
+
+        Returns:
+            np.ndarray: Ações int64 [n].
+        """
+        return self.forward(observations).argmax(axis=1)
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=False):
+        """Ações para uma observação ou um lote, como BaseAlgorithm.predict.
+
+        Returns:
+            tuple: (ações, None); escalar (array 0-d) para uma observação só.
+        """
+        observation = np.asarray(observation, dtype=np.float32)
+        single = observation.ndim == len(self.observation_space.shape)
+        batch = observation.reshape(1, -1) if single else observation.reshape(len(observation), -1)
+        if deterministic:
+            actions = self.predict_batch(batch)
+        elif self.kind == "dqn":
+            if self._rng.random() < self.exploration_rate:
+                actions = self._rng.integers(0, self.action_space.n, size=len(batch))
+            else:
+                actions = self.predict_batch(batch)
+        else:
+            # Gumbel-max: argmax(logits + Gumbel) tem a mesma distribuição da Categorical(logits)
+            logits = self.forward(batch)
+            actions = (logits + self._rng.gumbel(size=logits.shape)).argmax(axis=1)
+        return (actions[0] if single else actions), None
@@ -5,44 +5,13 @@ com visualização de desempenho relativo e gamificação.
 """
 
 import os
-import numpy as np
 from interface_agents import AgentInfo, load_agents
-from agent import Agent
-from environment import CorridaEnv
+from model_cache import get_model_cache
+from tournament import Entrant, RaceResult, run_races, iter_tournament, round_robin, tournament_table
 from logger import setup_logger
 
 logger = setup_logger()
 
-class RaceResult:
-    """Resultado de uma corrida entre múltiplos agentes."""
-    def __init__(self, agent_names, scores, checkpoints, times):
-        self.agent_names = agent_names
-        self.scores = scores
-        self.checkpoints = checkpoints
-        self.times = times
-        
-        # Calcula ranking
-        self.ranking = sorted(
-            enumerate(self.agent_names),
-            key=lambda x: (self.checkpoints[x[0]], self.scores[x[0]]),
-            reverse=True
-        )
-    
-    def get_winner(self):
-        """Retorna o nome do agente vencedor."""
-        idx = self.ranking[0][0]
-        return self.agent_names[idx]
-    
-    def get_stats(self, agent_idx):
-        """Retorna stats de um agente específico."""
-        return {
-            "nome": self.agent_names[agent_idx],
-            "score": self.scores[agent_idx],
-            "checkpoints": self.checkpoints[agent_idx],
-            "tempo": self.times[agent_idx],
-            "posicao": next(i+1 for i, (idx, _) in enumerate(self.ranking) if idx == agent_idx)
-        }
-
 class CompetitiveRaceManager:
     """Gerenciador de corridas competitivas entre múltiplos agentes RL treinados.
     
@@ -71,7 +40,7 @@ class CompetitiveRaceManager:
         agents_list = load_agents()
         agents_sorted = sorted(
             [AgentInfo.from_dict(a) for a in agents_list],
-            key=lambda a: sum(h.get('xp_gained', 0) for h in a.historico),
+            key=lambda a: a.total_xp,
             reverse=True
         )
         
@@ -92,12 +61,10 @@ class CompetitiveRaceManager:
         self.agent_stats = [a.stats for a in selected]
         self.agents_data = selected
         
+        cache = get_model_cache()
         for agent in selected:
             try:
-                model_path = agent.modelo_path.replace(".zip", "")
-                agent_instance = Agent(None, model_path=model_path)
-                agent_instance.load(agent.modelo_path)
-                self.models.append(agent_instance)
+                self.models.append(cache.get(agent.modelo_path, agent.tipo))
                 logger.info(f"[CompetitiveRaceManager] Modelo carregado: {agent.nome}")
             except Exception as e:
                 logger.warning(f"[CompetitiveRaceManager] Falha ao carregar {agent.nome}: {e}")
@@ -105,12 +72,20 @@ class CompetitiveRaceManager:
         
         return len(self.models) > 0
     
-    def run_race(self, max_steps=500, verbose=True):
+    def entrants(self):
+        """Participantes carregados (Entrant), na ordem de agent_names."""
+        return [Entrant(a.nome, a.tipo, a.modelo_path, a.stats) for a in self.agents_data or []]
+
+    def run_race(self, max_steps=500, verbose=True, seed=None):
         """Executa uma corrida entre agentes carregados.
         
+        Todos os carros avançam juntos num BatchCorridaEnv headless, com um predict em
+        lote por modelo (ver tournament.run_races).
+        
         Args:
             max_steps (int): Máximo de passos por agente
-            verbose (bool): Se True, imprime progresso
+            verbose (bool): Se True, imprime o vencedor
+            seed (int): Seed do ambiente (None = aleatório)
             
         Returns:
             RaceResult: Resultado da corrida
@@ -119,91 +94,48 @@ class CompetitiveRaceManager:
             logger.error("[CompetitiveRaceManager] Nenhum modelo carregado!")
             return None
         
-        n_agents = len(self.models)
-        scores = [0.0] * n_agents
-        checkpoints = [0] * n_agents
-        times = [0.0] * n_agents
-        
-        # Cria ambientes para cada agente
-        envs = [CorridaEnv(map_type=self.map_type, car_stats=self.agent_stats[i]) 
-                for i in range(n_agents)]
-        
-        # Reset todos os ambientes
-        obs_list = [env.reset()[0] for env in envs]
-        dones = [False] * n_agents
-        
-        # Loop de simulação
-        step = 0
-        while not all(dones) and step < max_steps:
-            actions = []
-            for i, (model, obs) in enumerate(zip(self.models, obs_list)):
-                if not dones[i]:
-                    try:
-                        if model is not None:
-                            action, _ = model.predict(obs, deterministic=True)
-                            actions.append(int(action))
-                        else:
-                            actions.append(0)  # Ação padrão
-                    except Exception as e:
-                        logger.warning(f"[CompetitiveRaceManager] Erro em predição: {e}")
-                        actions.append(0)
-                else:
-                    actions.append(0)
-            
-            # Step em cada ambiente
-            for i, env in enumerate(envs):
-                if not dones[i]:
-                    obs, reward, terminated, truncated, info = env.step(actions[i])
-                    obs_list[i] = obs
-                    scores[i] += reward
-                    checkpoints[i] = info.get("checkpoint", 0)
-                    times[i] = info.get("episode_time", 0.0)
-                    dones[i] = terminated or truncated
-            
-            step += 1
-            
-            if verbose and step % 50 == 0:
-                print(f"[CORRIDA] Passo {step}/{max_steps}")
-        
-        return RaceResult(self.agent_names, scores, checkpoints, times)
+        result = run_races([self.entrants()], self.map_type, max_steps, seed)[0]
+        if verbose:
+            print(f"[CORRIDA] Vencedor: {result.get_winner()}")
+        return result
     
-    def run_tournament(self, races_per_pair=1, verbose=True):
+    def run_tournament(self, races_per_pair=1, verbose=True, max_steps=500, n_workers=None, seed=None):
         """Executa um torneio round-robin entre agentes.
         
+        As corridas (todos os pares × races_per_pair) rodam em paralelo num pool de
+        processos (ver tournament.iter_tournament); os resultados chegam à medida que
+        terminam.
+        
         Args:
             races_per_pair (int): Número de corridas por par de agentes
-            verbose (bool): Se True, imprime progresso
+            verbose (bool): Se True, imprime cada corrida concluída
+            max_steps (int): Máximo de passos por corrida
+            n_workers (int): Processos do pool (None = um por núcleo)
+            seed (int): Seed base das corridas (None = aleatório)
             
         Returns:
-            dict: Rankings e histórico de corridas
+            tuple: (tabela nome -> {"vitorias", "pontos", "corridas"} ordenada por pontos,
+                histórico de corridas ordenado por race_num)
         """
         if not self.models:
             logger.error("[CompetitiveRaceManager] Nenhum modelo carregado!")
             return None
         
-        tournament_results = {agent: {"vitorias": 0, "pontos": 0} for agent in self.agent_names}
+        total_races = len(round_robin(len(self.agent_names), races_per_pair))
         race_history = []
-        
-        n_agents = len(self.models)
-        total_races = (n_agents * (n_agents - 1) // 2) * races_per_pair
-        race_count = 0
-        
-        # Round-robin: cada agente contra todos os outros
-        for i in range(n_agents):
-            for j in range(i + 1, n_agents):
-                for _ in range(races_per_pair):
-                    race_count += 1
-                    if verbose:
-                        print(f"[TORNEIO] Corrida {race_count}/{total_races}: {self.agent_names[i]} vs {self.agent_names[j]}")
-                    
-                    # Simula corrida individual entre dois agentes
-                    # Por simplicidade, reutiliza run_race com apenas 2 agentes
-                    # Em produção, seria mais eficiente
-                    
-                    race_history.append({
-                        "agente1": self.agent_names[i],
-                        "agente2": self.agent_names[j],
-                        "race_num": race_count
-                    })
-        
+        for race_count, (race_num, (i, j), result) in enumerate(
+                iter_tournament(self.entrants(), races_per_pair, self.map_type, max_steps, n_workers, seed=seed), 1):
+            if verbose:
+                print(f"[TORNEIO] Corrida {race_count}/{total_races}: {self.agent_names[i]} vs "
+                      f"{self.agent_names[j]} -> {result.get_winner()}")
+            race_history.append({
+                "agente1": self.agent_names[i],
+                "agente2": self.agent_names[j],
+                "race_num": race_num,
+                "vencedor": result.get_winner(),
+                "resultado": result
+            })
+        race_history.sort(key=lambda race: race["race_num"])
+        
+        tournament_results = tournament_table(self.agent_names, (race["resultado"] for race in race_history))
         return tournament_results, race_history
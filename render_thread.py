@@ -0,0 +1,218 @@
+"""Renderização da corrida em thread própria, alimentada por snapshots imutáveis.
+
+O loop de simulação nunca desenha nem espera pelo desenho: a cada passo ele só
+verifica se o renderer já consumiu o último snapshot e, nesse caso, publica um novo
+(poses dos carros, checkpoints e agregados do dashboard, tudo em tuplas). O
+SnapshotBuffer funciona como buffer duplo: o snapshot em montagem é o buffer de trás
+e a troca de referência (atômica sob o GIL) o torna o buffer da frente, sem locks.
+A RenderThread monta sempre o snapshot mais recente no ritmo escolhido; a thread
+principal, dona da janela, processa os eventos e apresenta o quadro montado.
+"""
+import queue
+import threading
+import time
+from typing import NamedTuple, Optional, Tuple
+from logger import setup_logger
+from interface_dashboard import DASHBOARD_WINDOW
+from sparkline import mean_tail
+
+logger = setup_logger()
+
+
+class CarSnapshot(NamedTuple):
+    """Estado de um carro com os campos lidos por InterfaceDPG.draw_env_grid_simple.
+
+    A geometria (width, height, map_type, corridor_rect, barriers) é compartilhada
+    entre todos os carros do snapshot.
+    """
+    width: int
+    height: int
+    map_type: str
+    corridor_rect: Optional[Tuple[float, ...]]
+    barriers: Tuple[Tuple[float, ...], ...]
+    checkpoints: Tuple[Tuple[float, float], ...]
+    checkpoint_index: int
+    car1_pos: Tuple[float, float]
+    car1_angle: float
+
+
+class RaceSnapshot(NamedTuple):
+    """Quadro completo da corrida.
+
+    Attributes:
+        step (int): Contador de passos da simulação.
+        cars (tuple): CarSnapshot de cada ambiente.
+        dashboard (tuple): Argumentos de Interface.draw_dashboard, com SeriesTail (últimas
+            médias entre ambientes) no lugar dos históricos completos.
+    """
+    step: int
+    cars: Tuple[CarSnapshot, ...]
+    dashboard: tuple
+
+
+def capture_snapshot(envs, step, rewards_hist, collisions_hist, penalties_hist, ciclo, avg_speed, n_dif):
+    """Copia o estado visível da corrida para um RaceSnapshot imutável.
+
+    Args:
+        envs (list): Ambientes (ou visões) com car1_pos, car1_angle, checkpoints etc.
+        step (int): Contador de passos da simulação.
+        rewards_hist (list): Históricos de recompensa por ambiente.
+        collisions_hist (list): Históricos de colisão por ambiente.
+        penalties_hist (list): Históricos de penalização por ambiente.
+        ciclo (int): Episódios concluídos.
+        avg_speed (float): Velocidade média atual.
+        n_dif (int): Estados diferentes no último passo.
+    Returns:
+        RaceSnapshot: Snapshot sem referências a estado mutável da simulação.
+    """
+    cars = []
+    if envs:
+        track = envs[0]
+        corridor_rect = tuple(track.corridor_rect) if track.corridor_rect else None
+        barriers = tuple(tuple(b) for b in track.barriers)
+        for env in envs:
+            cars.append(CarSnapshot(
+                track.width, track.height, track.map_type, corridor_rect, barriers,
+                tuple((float(cp[0]), float(cp[1])) for cp in env.checkpoints),
+                int(env.checkpoint_index),
+                (float(env.car1_pos[0]), float(env.car1_pos[1])),
+                float(env.car1_angle),
+            ))
+    # Só a cauda já agregada de cada série; o Dashboard consome as amostras novas pelo total
+    dashboard = (mean_tail(rewards_hist, DASHBOARD_WINDOW), mean_tail(collisions_hist, DASHBOARD_WINDOW),
+                 mean_tail(penalties_hist, DASHBOARD_WINDOW), ciclo, avg_speed, n_dif)
+    return RaceSnapshot(step, tuple(cars), dashboard)
+
+
+class SnapshotBuffer:
+    """Buffer duplo sem locks entre a simulação (produtor) e o renderer (consumidor).
+
+    O produtor monta o snapshot fora do buffer e publica com uma troca de referência;
+    o consumidor lê a referência atual. Como os snapshots são imutáveis, nenhum dos
+    lados espera pelo outro.
+    """
+    def __init__(self):
+        self._front = None
+        self._version = 0
+        self._consumed = True
+
+    def wants_snapshot(self):
+        """True se o último snapshot já foi desenhado (evita montar quadros descartados)."""
+        return self._consumed
+
+    def publish(self, snapshot):
+        """Torna snapshot o quadro atual (nunca bloqueia).
+
+        Args:
+            snapshot (RaceSnapshot): Quadro imutável.
+        """
+        self._front = snapshot
+        self._version += 1
+        self._consumed = False
+
+    def latest(self):
+        """Snapshot mais recente e sua versão.
+
+        Returns:
+            tuple: (version, snapshot); snapshot é None antes da primeira publicação.
+        """
+        snapshot, version = self._front, self._version
+        self._consumed = True
+        return version, snapshot
+
+
+class RenderThread(threading.Thread):
+    """Thread que desenha o snapshot mais recente do SnapshotBuffer a até fps quadros/s.
+
+    A thread só desenha na surface de trás da interface. A janela fica com a thread
+    principal, que a criou: ela lê os eventos (pump_events) e copia cada quadro pronto
+    para a janela (present). As duas se revezam na surface: um quadro novo só é montado
+    depois que o anterior foi apresentado. Mudanças na surface pedidas pela thread
+    principal (submit) rodam aqui, entre dois quadros, e pygame.quit() só pode ser
+    chamado depois de stop().
+
+    Args:
+        interface (InterfaceDPG): Interface com clear, draw_env_grid_simple, draw_dashboard e present.
+        buffer (SnapshotBuffer): Origem dos snapshots.
+        fps (float): Taxa máxima de quadros.
+    """
+    def __init__(self, interface, buffer, fps=60):
+        super().__init__(name="RenderThread", daemon=True)
+        self.interface = interface
+        self.buffer = buffer
+        self.interval = 1.0 / fps
+        self.frames = 0
+        self._tasks = queue.SimpleQueue()
+        self._frame_ready = threading.Event()
+        self._stop_event = threading.Event()
+
+    def draw(self, snapshot):
+        """Monta um quadro completo a partir do snapshot e o deixa pronto para present."""
+        interface = self.interface
+        interface.clear()
+        for idx, car in enumerate(snapshot.cars):
+            interface.draw_env_grid_simple(car, idx)
+        interface.draw_dashboard(*snapshot.dashboard)
+        self.frames += 1
+        self._frame_ready.set()
+
+    def present(self):
+        """Copia o quadro pronto para a janela; chamar na thread dona da janela.
+
+        Returns:
+            bool: True se havia um quadro novo.
+        """
+        if not self._frame_ready.is_set():
+            return False
+        self.interface.present()
+        self._frame_ready.clear()
+        return True
+
+    def run(self):
+        drawn_version = 0
+        while not self._stop_event.is_set():
+            start = time.monotonic()
+            try:
+                # Com um quadro à espera de present, a surface é da thread principal
+                if not self._frame_ready.is_set():
+                    while not self._tasks.empty():
+                        func, args = self._tasks.get_nowait()
+                        func(*args)
+                    version, snapshot = self.buffer.latest()
+                    if snapshot is not None and version != drawn_version:
+                        self.draw(snapshot)
+                        drawn_version = version
+            except Exception as e:
+                logger.warning(f"[RenderThread] Erro ao desenhar quadro: {e}")
+            self._stop_event.wait(max(0.0, self.interval - (time.monotonic() - start)))
+
+    def submit(self, func, *args):
+        """Agenda func(*args) nesta thread, antes do próximo quadro (ex.: change_state)."""
+        self._tasks.put((func, args))
+
+    def stop(self, timeout=1.0):
+        """Pede o fim da thread e espera até timeout segundos (None = até terminar)."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+
+def pump_events(interface, renderer):
+    """Processa os eventos do pygame na thread principal enquanto a RenderThread desenha.
+
+    ESC vira um change_state executado pela RenderThread entre quadros. Ao fechar a
+    janela, a RenderThread é parada e aguardada antes de retornar, para que o chamador
+    possa chamar pygame.quit() sem um quadro em andamento.
+
+    Args:
+        interface (InterfaceDPG): Interface com poll_events e change_state.
+        renderer (RenderThread): Thread que desenha na janela da interface.
+    Returns:
+        bool: True se a janela foi fechada (renderer já parado).
+    """
+    quit_requested, escape = interface.poll_events()
+    if escape:
+        renderer.submit(interface.change_state, "menu_inicial")
+    if quit_requested:
+        renderer.stop(timeout=None)
+    return quit_requested
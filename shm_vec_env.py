@@ -0,0 +1,312 @@
+"""VecEnv multiprocesso com memória compartilhada para o Corrida DRL.
+
+Cada worker é um processo que possui uma fatia contígua de carros (um BatchCorridaEnv)
+e avança a fatia inteira a cada comando. Observações, recompensas, dones, campos de
+info e o estado dos carros voltam por um único bloco de multiprocessing.shared_memory;
+pelos pipes trafegam apenas comandos curtos (sem arrays serializados por passo).
+"""
+import os
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from stable_baselines3.common.vec_env.base_vec_env import VecEnv
+from config import SHM_ENVS_PER_WORKER
+from environment import CorridaEnv
+from batch_env import BatchCorridaEnv
+
+# Campos de info do CorridaEnv, guardados como float64 na memória compartilhada
+INFO_KEYS = ("collisions", "episode_time", "checkpoint", "success", "progress")
+_INFO_TYPES = (int, float, int, bool, int)
+
+
+def available_cores():
+    """Número de núcleos que este processo pode usar (respeita a afinidade de CPU)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def default_n_workers(n_envs, envs_per_worker=SHM_ENVS_PER_WORKER):
+    """Quantidade de workers para n_envs carros: um por núcleo, com fatias de pelo menos envs_per_worker.
+
+    Args:
+        n_envs (int): Número total de carros.
+        envs_per_worker (int): Tamanho mínimo desejado de cada fatia.
+    Returns:
+        int: Número de workers (>= 1).
+    """
+    wanted = -(-n_envs // envs_per_worker)
+    return max(1, min(available_cores(), wanted, n_envs))
+
+
+def _layout(n_envs, obs_dim, n_checkpoints):
+    """Layout (nome, dtype, formato, offset) dos arrays no bloco compartilhado e seu tamanho total."""
+    spec = [
+        ("obs", np.float32, (n_envs, obs_dim)),
+        ("terminal_obs", np.float32, (n_envs, obs_dim)),
+        ("rewards", np.float32, (n_envs,)),
+        ("dones", np.bool_, (n_envs,)),
+        ("actions", np.int64, (n_envs,)),
+        ("info", np.float64, (n_envs, len(INFO_KEYS))),
+        # Estado dos carros para desenho e para as visões de envs[idx]
+        ("car1_pos", np.float64, (n_envs, 2)),
+        ("car1_angle", np.float64, (n_envs,)),
+        ("car1_speed", np.float64, (n_envs,)),
+        ("checkpoint_index", np.int64, (n_envs,)),
+        ("checkpoints", np.float64, (n_envs, n_checkpoints, 2)),
+    ]
+    layout = []
+    offset = 0
+    for name, dtype, shape in spec:
+        offset = -(-offset // 8) * 8  # Alinha cada array em 8 bytes
+        layout.append((name, dtype, shape, offset))
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return layout, max(offset, 1)
+
+
+def _map_buffers(buf, layout):
+    """Cria as visões NumPy sobre o buffer compartilhado."""
+    return {name: np.ndarray(shape, dtype=dtype, buffer=buf, offset=offset)
+            for name, dtype, shape, offset in layout}
+
+
+def _publish_state(env, bufs, rows):
+    """Copia o estado dos carros da fatia para a memória compartilhada."""
+    bufs["car1_pos"][rows] = env.car1_pos
+    bufs["car1_angle"][rows] = env.car1_angle
+    bufs["car1_speed"][rows] = env.car1_speed
+    bufs["checkpoint_index"][rows] = env.checkpoint_index
+    bufs["checkpoints"][rows] = env.checkpoints
+
+
+def _worker(remote, parent_remote, shm_name, layout, start, stop, env_kwargs):
+    """Laço do processo worker: executa comandos sobre a fatia [start, stop) de carros."""
+    parent_remote.close()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    bufs = _map_buffers(shm.buf, layout)
+    rows = slice(start, stop)
+    env = BatchCorridaEnv(stop - start, **env_kwargs)
+    try:
+        while True:
+            cmd, data = remote.recv()
+            result = None
+            if cmd == "step":
+                obs, rewards, dones, infos = env.step(bufs["actions"][rows])
+                bufs["obs"][rows] = obs
+                bufs["rewards"][rows] = rewards
+                bufs["dones"][rows] = dones
+                bufs["info"][rows] = [[info[key] for key in INFO_KEYS] for info in infos]
+                for i in np.flatnonzero(dones):
+                    bufs["terminal_obs"][start + i] = infos[i]["terminal_observation"]
+            elif cmd == "reset":
+                if data is not None:
+                    env.seed(data)
+                bufs["obs"][rows] = env.reset()
+            elif cmd == "get_attr":
+                result = env.get_attr(*data)
+            elif cmd == "set_attr":
+                env.set_attr(*data)
+            elif cmd == "env_method":
+                name, args, kwargs, indices = data
+                result = env.env_method(name, *args, indices=indices, **kwargs)
+                bufs["obs"][rows] = env._obs
+            elif cmd == "close":
+                break
+            else:
+                raise NotImplementedError(f"Comando desconhecido: {cmd}")
+            _publish_state(env, bufs, rows)
+            remote.send(result)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        env.close()
+        del bufs
+        shm.close()
+        remote.close()
+
+
+class _SharedEnvView:
+    """Visão de um carro do SharedMemoryVecEnv com a interface do CorridaEnv.
+
+    O estado do carro é lido da memória compartilhada (atualizada a cada comando) e a
+    geometria do mapa vem do ambiente de referência do processo pai.
+    """
+    def __init__(self, vec, idx):
+        self._vec = vec
+        self._idx = idx
+
+    @property
+    def car1_pos(self):
+        return self._vec._bufs["car1_pos"][self._idx]
+
+    @property
+    def car1_angle(self):
+        return float(self._vec._bufs["car1_angle"][self._idx])
+
+    @property
+    def car1_speed(self):
+        return float(self._vec._bufs["car1_speed"][self._idx])
+
+    @property
+    def checkpoint_index(self):
+        return int(self._vec._bufs["checkpoint_index"][self._idx])
+
+    @property
+    def checkpoints(self):
+        return [tuple(cp) for cp in self._vec._bufs["checkpoints"][self._idx]]
+
+    def reset(self):
+        """Reseta apenas este carro (no worker dono dele).
+
+        Returns:
+            tuple: (obs, info) como CorridaEnv.reset.
+        """
+        return self._vec.env_method("reset", indices=[self._idx])[0]
+
+    def close(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._vec.track, name)
+
+
+class SharedMemoryVecEnv(VecEnv):
+    """VecEnv de processos: cada worker avança uma fatia de carros por comando.
+
+    Args:
+        n_envs (int): Número total de carros/ambientes.
+        map_type (str): Tipo de mapa ('corridor', 'curve' ou 'circle').
+        car_stats (dict ou list): Stats únicos ou lista com stats por carro.
+        n_workers (int): Número de processos. Se None, usa default_n_workers (núcleos disponíveis).
+        start_method (str): Método do multiprocessing ('fork', 'forkserver', 'spawn').
+            Se None, usa 'forkserver' quando disponível, senão 'spawn'.
+        reward_shaper_type (str): Tipo de RewardShaper.
+        reward_config (dict): Configuração customizada do RewardShaper.
+        lidar_mode (str): 'march' ou 'exact' (ver CorridaEnv).
+        use_raster (bool): Usa o raster pré-computado do mapa (ver CorridaEnv).
+    """
+    def __init__(self, n_envs, map_type="corridor", car_stats=None, n_workers=None, start_method=None,
+                 reward_shaper_type='balanced', reward_config=None, lidar_mode=None, use_raster=None):
+        # Ambiente de referência: geometria do mapa e espaços
+        self.track = CorridaEnv(map_type=map_type, reward_shaper_type=reward_shaper_type, reward_config=reward_config,
+                                lidar_mode=lidar_mode, use_raster=use_raster)
+        self.map_type = map_type
+        if car_stats is None or isinstance(car_stats, dict):
+            car_stats = [car_stats] * n_envs
+        car_stats = list(car_stats)
+        self.n_workers = min(n_workers or default_n_workers(n_envs), n_envs)
+        bounds = np.linspace(0, n_envs, self.n_workers + 1).astype(int)
+        self._slices = [(int(bounds[w]), int(bounds[w + 1])) for w in range(self.n_workers)]
+
+        obs_dim = self.track.observation_space.shape[0]
+        n_checkpoints = len(self.track.setup_checkpoints(map_type))
+        layout, size = _layout(n_envs, obs_dim, n_checkpoints)
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._bufs = _map_buffers(self._shm.buf, layout)
+
+        if start_method is None:
+            start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+        ctx = mp.get_context(start_method)
+        self.remotes, self.processes = [], []
+        for start, stop in self._slices:
+            remote, work_remote = ctx.Pipe()
+            env_kwargs = dict(map_type=map_type, car_stats=car_stats[start:stop], reward_shaper_type=reward_shaper_type,
+                              reward_config=reward_config, lidar_mode=lidar_mode, use_raster=use_raster)
+            process = ctx.Process(target=_worker, args=(work_remote, remote, self._shm.name, layout, start, stop, env_kwargs),
+                                  daemon=True)
+            process.start()
+            work_remote.close()
+            self.remotes.append(remote)
+            self.processes.append(process)
+        self.waiting = False
+        self.closed = False
+        self.envs = [_SharedEnvView(self, i) for i in range(n_envs)]
+        super().__init__(n_envs, self.track.observation_space, self.track.action_space)
+
+    # ===== API VecEnv =====
+    def reset(self):
+        """Reseta todos os carros (cada worker usa a seed do seu primeiro carro).
+
+        Returns:
+            np.ndarray: Observações [n_envs, obs_dim].
+        """
+        for remote, (start, _) in zip(self.remotes, self._slices):
+            remote.send(("reset", self._seeds[start]))
+        for remote in self.remotes:
+            remote.recv()
+        self._reset_seeds()
+        self._reset_options()
+        return self._bufs["obs"].copy()
+
+    def step_async(self, actions):
+        self._bufs["actions"][:] = np.asarray(actions).reshape(self.num_envs)
+        for remote in self.remotes:
+            remote.send(("step", None))
+        self.waiting = True
+
+    def step_wait(self):
+        """Espera todos os workers e monta o retorno a partir da memória compartilhada.
+
+        Returns:
+            tuple: (obs, rewards, dones, infos) no formato VecEnv.
+        """
+        for remote in self.remotes:
+            remote.recv()
+        self.waiting = False
+        bufs = self._bufs
+        dones = bufs["dones"].copy()
+        infos = []
+        for i, row in enumerate(bufs["info"].tolist()):
+            info = {key: cast(value) for key, cast, value in zip(INFO_KEYS, _INFO_TYPES, row)}
+            info["TimeLimit.truncated"] = False
+            if dones[i]:
+                info["terminal_observation"] = bufs["terminal_obs"][i].copy()
+            infos.append(info)
+        return bufs["obs"].copy(), bufs["rewards"].copy(), dones, infos
+
+    def close(self):
+        if self.closed:
+            return
+        if self.waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join()
+        self._bufs = None  # Libera as visões antes de fechar o bloco
+        self._shm.close()
+        self._shm.unlink()
+        self.closed = True
+
+    def get_attr(self, attr_name, indices=None):
+        return self._gather("get_attr", indices, lambda local: (attr_name, local))
+
+    def set_attr(self, attr_name, value, indices=None):
+        self._gather("set_attr", indices, lambda local: (attr_name, value, local))
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        return self._gather("env_method", indices, lambda local: (method_name, method_args, method_kwargs, local))
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
+
+    # ===== Internos =====
+    def _gather(self, cmd, indices, make_data):
+        """Envia cmd aos workers donos dos índices e devolve os resultados na ordem pedida."""
+        indices = list(self._get_indices(indices))
+        results = {}
+        for remote, (start, stop) in zip(self.remotes, self._slices):
+            owned = [i for i in indices if start <= i < stop]
+            if not owned:
+                continue
+            remote.send((cmd, make_data([i - start for i in owned])))
+            values = remote.recv()
+            if values is not None:
+                results.update(zip(owned, values))
+        return [results.get(i) for i in indices]
+
+    def __del__(self):
+        if not getattr(self, "closed", True):
+            self.close()
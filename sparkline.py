@@ -0,0 +1,267 @@
+"""Gráficos leves (sparklines) desenhados direto em superfícies pygame.
+
+Os painéis ao vivo guardam as séries já agregadas em anéis de tamanho fixo e
+desenham linhas simples numa pygame.Surface reutilizada, redesenhando apenas quando
+chegam dados novos. O matplotlib fica restrito aos relatórios exportados.
+"""
+from typing import NamedTuple, Tuple
+import numpy as np
+import pygame
+from history import EpisodeHistory
+
+
+class SeriesTail(NamedTuple):
+    """Cauda de uma série agregada, para transportar entre threads sem os históricos.
+
+    Attributes:
+        total (int): Quantidade de amostras já produzidas pela série.
+        values (tuple): Últimas amostras (no máximo a capacidade do anel de destino).
+    """
+    total: int
+    values: Tuple[float, ...]
+
+
+def _total(hist):
+    """Quantidade de amostras do histórico mais longo."""
+    if isinstance(hist, EpisodeHistory):
+        return int(hist.totals.max(initial=0))
+    return max((len(h) for h in hist), default=0)
+
+
+def _mean_block(hist, start, stop):
+    """Média entre ambientes das amostras [start, stop); históricos curtos contam como 0."""
+    if isinstance(hist, EpisodeHistory):
+        return hist.mean_range(start, stop)
+    block = np.zeros((len(hist), stop - start), dtype=np.float64)
+    for row, h in zip(block, hist):
+        segment = h[start:stop]
+        row[:len(segment)] = segment
+    return block.sum(axis=0) / len(hist)
+
+
+def mean_tail(hist, capacity):
+    """SeriesTail com as últimas capacity médias entre ambientes dos históricos.
+
+    Args:
+        hist (list | EpisodeHistory): Histórico (lista de valores) de cada ambiente.
+        capacity (int): Quantidade máxima de amostras na cauda.
+    Returns:
+        SeriesTail: Total de amostras e as últimas médias.
+    """
+    total = _total(hist)
+    start = max(0, total - capacity)
+    values = tuple(_mean_block(hist, start, total).tolist()) if total > start else ()
+    return SeriesTail(total, values)
+
+
+class RingSeries:
+    """Série numérica em anel de capacidade fixa (guarda só os valores mais recentes).
+
+    Attributes:
+        capacity (int): Quantidade máxima de valores guardados.
+        version (int): Incrementada a cada alteração; indica se há algo a redesenhar.
+    """
+    def __init__(self, capacity=100):
+        self.capacity = int(capacity)
+        self._data = np.zeros(self.capacity, dtype=np.float64)
+        self._start = 0
+        self._size = 0
+        self.version = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, value):
+        """Acrescenta um valor, descartando o mais antigo se o anel estiver cheio."""
+        self.extend((value,))
+
+    def extend(self, values):
+        """Acrescenta vários valores em ordem cronológica.
+
+        Args:
+            values (array-like): Valores novos.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        n = len(values)
+        if n == 0:
+            return
+        if n >= self.capacity:
+            self._data[:] = values[-self.capacity:]
+            self._start, self._size = 0, self.capacity
+        else:
+            end = self._start + self._size
+            self._data[(end + np.arange(n)) % self.capacity] = values
+            size = min(self.capacity, self._size + n)
+            self._start = (end + n - size) % self.capacity
+            self._size = size
+        self.version += 1
+
+    def clear(self):
+        """Descarta todos os valores."""
+        self._start = self._size = 0
+        self.version += 1
+
+    def values(self):
+        """Cópia dos valores do mais antigo para o mais recente.
+
+        Returns:
+            np.ndarray: float64 [len(self)].
+        """
+        return self._data[(self._start + np.arange(self._size)) % self.capacity]
+
+
+class MeanSeries:
+    """Média entre ambientes de históricos por ambiente, agregada de forma incremental.
+
+    A cada update só as amostras que surgiram desde a chamada anterior são agregadas
+    e empurradas para o anel; se os históricos encolherem (reinício), o anel é zerado.
+    Pressupõe que os ambientes avançam juntos (uma amostra por ambiente a cada passo),
+    como na simulação: uma amostra que chegue depois de sua média ser agregada é ignorada.
+
+    Args:
+        capacity (int): Tamanho do anel (amostras exibidas).
+    """
+    def __init__(self, capacity=100):
+        self.ring = RingSeries(capacity)
+        self._seen = 0
+        self._n_envs = None
+
+    def __len__(self):
+        return len(self.ring)
+
+    def _restart(self):
+        self.ring.clear()
+        self._seen = 0
+
+    def update(self, hist):
+        """Consome as amostras novas dos históricos.
+
+        Args:
+            hist (list | EpisodeHistory | SeriesTail): Históricos por ambiente ou cauda já agregada.
+        Returns:
+            bool: True se o anel mudou.
+        """
+        version = self.ring.version
+        if isinstance(hist, SeriesTail):
+            total, values = hist
+            if total < self._seen:
+                self._restart()
+            new = total - self._seen
+            if new > 0:
+                self.ring.extend(values[max(0, len(values) - new):])
+        else:
+            if hist is None:
+                hist = ()
+            total = _total(hist)
+            if total < self._seen or len(hist) != self._n_envs:
+                self._restart()
+                self._n_envs = len(hist)
+            start = max(self._seen, total - self.ring.capacity)
+            if total > start:
+                self.ring.extend(_mean_block(hist, start, total))
+        self._seen = total
+        return self.ring.version != version
+
+
+class Sparkline:
+    """Painel de linhas simples desenhado numa superfície pygame reutilizada.
+
+    Args:
+        size (tuple): (largura, altura) do painel em pixels.
+        colors (list): Cor RGB de cada série.
+        title (str): Título opcional no topo.
+        labels (list): Legenda opcional de cada série.
+        background (tuple): Cor de fundo.
+    """
+    MARGIN = 6
+
+    def __init__(self, size, colors, title=None, labels=None, background=(255, 255, 255)):
+        self.surface = pygame.Surface(size)
+        self.colors = list(colors)
+        self.title = title
+        self.labels = list(labels) if labels else []
+        self.background = background
+        self.redraws = 0
+        self._key = None
+        self._font = None
+        self._header = None
+
+    def _fonts(self):
+        """Fonte e cabeçalho (título + legenda) renderizados uma única vez."""
+        if self._font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            self._font = pygame.font.SysFont(None, 16)
+            # Uma linha com o título e outra com a legenda
+            rows = []
+            if self.title:
+                rows.append([self._font.render(self.title, True, (0, 0, 0))])
+            if self.labels:
+                rows.append([self._font.render(label, True, color) for label, color in zip(self.labels, self.colors)])
+            self._header = rows
+        return self._font
+
+    def is_current(self, key):
+        """True se a superfície já mostra o conteúdo identificado por key."""
+        return key is not None and key == self._key
+
+    def draw(self, series, key=None):
+        """Redesenha o painel se os dados mudaram e devolve a superfície.
+
+        Args:
+            series (list): RingSeries ou arrays; séries vazias são ignoradas.
+            key (hashable): Identifica o conteúdo; por padrão, as versões dos RingSeries.
+                Sem chave e com arrays comuns o painel é sempre redesenhado.
+        Returns:
+            pygame.Surface: Superfície do painel (a mesma a cada chamada).
+        """
+        if key is None and all(isinstance(s, RingSeries) for s in series):
+            key = tuple((id(s), s.version) for s in series)
+        if self.is_current(key):
+            return self.surface
+        self._key = key
+        self.redraws += 1
+        values = [s.values() if isinstance(s, RingSeries) else np.asarray(s, dtype=np.float64) for s in series]
+        self._render(values)
+        return self.surface
+
+    def _render(self, values):
+        font = self._fonts()
+        surface = self.surface
+        surface.fill(self.background)
+        width, height = surface.get_size()
+        margin = self.MARGIN
+        top = margin
+        for row in self._header:
+            x = margin
+            for part in row:
+                surface.blit(part, (x, top))
+                x += part.get_width() + margin
+            top += row[0].get_height() + 2
+        left, right, bottom = margin + 30, width - margin, height - margin
+        plot_w, plot_h = right - left, bottom - top
+        pygame.draw.rect(surface, (210, 210, 210), (left, top, plot_w, plot_h), 1)
+        filled = [v for v in values if len(v)]
+        if not filled or plot_w < 2 or plot_h < 2:
+            return
+        lo = min(float(v.min()) for v in filled)
+        hi = max(float(v.max()) for v in filled)
+        if hi - lo < 1e-9:
+            lo, hi = lo - 1.0, hi + 1.0
+        scale_y = (plot_h - 1) / (hi - lo)
+        if lo < 0 < hi:
+            zero_y = int(bottom - 1 - (0 - lo) * scale_y)
+            pygame.draw.line(surface, (225, 225, 225), (left, zero_y), (right - 1, zero_y))
+        surface.blit(font.render(f"{hi:.1f}", True, (90, 90, 90)), (margin, top))
+        surface.blit(font.render(f"{lo:.1f}", True, (90, 90, 90)), (margin, bottom - 10))
+        step_x = (plot_w - 1) / max(max(len(v) for v in filled) - 1, 1)
+        for v, color in zip(values, self.colors):
+            if not len(v):
+                continue
+            xs = left + np.arange(len(v)) * step_x
+            ys = bottom - 1 - (v - lo) * scale_y
+            points = np.column_stack((xs, ys)).astype(np.int32).tolist()
+            if len(points) == 1:
+                surface.set_at(points[0], color)
+            else:
+                pygame.draw.lines(surface, color, False, points)
@@ -104,7 +104,7 @@ def test_agent_persistence():
     # Testa historico em agents.json
     print(f"\n3. Testando historico em agents.json...")
     ag = AgentInfo(test_agent_name, "DQN", tempo_acumulado=elapsed, modelo_path=f"{test_model_path}.zip")
-    ag.historico.append({
+    ag.add_history({
         "timestamp": time.time(),
         "duration": elapsed,
         "map": "corridor",
@@ -149,7 +149,7 @@ def test_competitive_tracking():
     print(f"\n1. Simulando {len(scores)} corridas do agente '{test_agent_name}'...")
     for i, score in enumerate(scores):
         xp = max(0, int(score * 10))
-        ag.historico.append({
+        ag.add_history({
             "mapa": "corridor",
             "score": score,
             "velocidade": 5.0 + i*0.5,
@@ -162,7 +162,7 @@ def test_competitive_tracking():
         print(f"   Corrida {i+1}: score={score}, xp={xp}")
     
     # Calcula nível
-    total_xp = sum(h.get('xp_gained', 0) for h in ag.historico)
+    total_xp = ag.total_xp
     level = max(1, int(total_xp / 100) + 1)
     
     print(f"\n2. Estatisticas acumuladas:")
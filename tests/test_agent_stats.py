@@ -0,0 +1,59 @@
+import numpy as np
+from agent_stats import AgentAggregates, record_total_xp
+from interface_agents import AgentInfo
+from gamification import GamificationSystem, Achievement
+from race_manager import CompetitiveRaceManager
+
+
+def make_entries(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{"mapa": ["corridor", "curve", None][i % 3], "score": float(rng.normal()), "xp_gained": int(rng.integers(0, 50)),
+             "tempo": float(rng.uniform(5, 30)), "checkpoints": np.int64(rng.integers(0, 4))} for i in range(n)]
+
+
+def test_incremental_matches_recompute_and_survives_truncation():
+    entries = make_entries(200)
+    agent = AgentInfo("Turbo", "PPO")
+    for entry in entries:
+        agent.add_history(entry)
+        agent.historico = agent.historico[-30:]  # Como no SimulationSession
+    assert agent.total_xp == sum(e["xp_gained"] for e in entries)
+    assert agent.agregados.to_dict() == AgentAggregates.from_history(entries).to_dict()
+    curve = [e for e in entries if e["mapa"] == "curve"]
+    best = agent.agregados.map_best("curve")
+    assert best["episodes"] == len(curve)
+    assert best["best_score"] == max(e["score"] for e in curve)
+    assert best["best_time"] == min(e["tempo"] for e in curve)
+    assert agent.agregados.max_checkpoints == max(int(e["checkpoints"]) for e in entries)
+
+    restored = AgentInfo.from_dict(agent.to_dict())
+    assert restored.total_xp == agent.total_xp and len(restored.historico) == 30
+    assert record_total_xp(agent.to_dict()) == agent.total_xp
+
+
+def test_legacy_agent_and_gamification_checks():
+    legacy = {"nome": "Velho", "tipo": "DQN", "historico": [{"xp_gained": 600, "mapa": "corridor", "checkpoints": 1},
+                                                            {"xp_gained": 100, "tempo": 8.0}]}
+    agent = AgentInfo.from_dict(legacy)
+    assert agent.total_xp == record_total_xp(legacy) == 700
+    assert GamificationSystem.can_upgrade(agent, "accel")[0]
+    assert {a["id"] for a in Achievement.get_unlocked_achievements(agent)} == {
+        "primeiro_checkpoint", "perfeito_corridor", "speedrun"}
+    assert not Achievement.check_achievement(AgentInfo("Novo", "PPO"), "speedrun")
+
+
+def test_top_agents_sorted_by_aggregate_xp(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "models").mkdir()
+    agents = []
+    for nome, xp in (("A", 10), ("B", 300), ("C", 50), ("SemModelo", 999)):
+        ag = AgentInfo(nome, "PPO")
+        ag.add_history({"xp_gained": xp})
+        ag.historico = []  # O XP continua nos agregados
+        if nome != "SemModelo":
+            (tmp_path / "models" / f"{nome}_PPO.zip").write_bytes(b"")
+        agents.append(ag.to_dict())
+    monkeypatch.setattr("race_manager.load_agents", lambda: agents)
+    manager = CompetitiveRaceManager("corridor", top_n=2)
+    manager.load_top_agents()  # Os .zip vazios não carregam; só a seleção importa aqui
+    assert manager.agent_names == ["B", "C"]
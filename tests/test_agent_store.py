@@ -0,0 +1,65 @@
+import json
+import os
+import time
+import pytest
+from agent_store import AgentStore, get_agent_store, flush_agents
+from interface_agents import AgentInfo, load_agents, save_agents
+from gamification import GamificationSystem
+
+
+def read_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_store_defers_and_coalesces_writes(tmp_path):
+    path = tmp_path / "agents.json"
+    path.write_text(json.dumps([{"nome": "A", "tipo": "PPO", "pontos": 7}]), encoding="utf-8")
+    store = AgentStore(str(path), flush_interval=None, dirty_threshold=3)
+    loaded = store.load()
+    loaded[0]["nome"] = "mudado"
+    assert store.find("A")["pontos"] == 7  # load devolve cópias
+
+    store.update({"nome": "A", "level": 2})
+    store.update({"nome": "B", "tipo": "DQN"})
+    assert read_json(path) == [{"nome": "A", "tipo": "PPO", "pontos": 7}]
+    assert store.dirty == 2 and store.flushes == 0
+    store.update({"nome": "A", "level": 3})  # Limite de alterações: grava uma vez só
+    assert store.flushes == 1 and store.dirty == 0
+    assert read_json(path) == [{"nome": "A", "tipo": "PPO", "pontos": 7, "level": 3}, {"nome": "B", "tipo": "DQN"}]
+    assert sorted(os.listdir(tmp_path)) == ["agents.json"]  # Sem temporários sobrando
+
+
+def test_store_timer_flush_and_external_reload(tmp_path):
+    path = tmp_path / "agents.json"
+    store = AgentStore(str(path), flush_interval=0.05, dirty_threshold=100)
+    assert store.load() == []
+    store.save([{"nome": "A", "tipo": "PPO"}])
+    assert not path.exists()
+    deadline = time.monotonic() + 2.0
+    while store.dirty and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert read_json(path) == [{"nome": "A", "tipo": "PPO"}]
+    # Alterado por fora e sem pendências: a próxima leitura relê o arquivo
+    path.write_text(json.dumps([{"nome": "Outro", "tipo": "SAC", "x": 1}]), encoding="utf-8")
+    assert store.find("Outro")["x"] == 1
+
+
+def test_load_save_agents_use_shared_store(tmp_path):
+    filename = str(tmp_path / "agents.json")
+    save_agents([AgentInfo("Turbo", "PPO").to_dict()], filename)
+    assert get_agent_store(filename) is get_agent_store(filename)
+    assert load_agents(filename)[0]["nome"] == "Turbo"
+    flush_agents()
+    assert read_json(filename)[0]["modelo_path"] == "models/Turbo_PPO.zip"
+
+
+def test_update_agent_stats_uses_store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    agent = AgentInfo("Nivel", "PPO", historico=[{"xp_gained": 5000}])
+    save_agents([agent.to_dict()])
+    updated = GamificationSystem.update_agent_stats("Nivel")
+    assert updated.level == GamificationSystem.calculate_level(5000) > 1
+    assert load_agents()[0]["level"] == updated.level
+    assert GamificationSystem.update_agent_stats("Fantasma") is None
+    flush_agents()
@@ -0,0 +1,90 @@
+import pytest
+import numpy as np
+import environment
+import batch_env
+from environment import CorridaEnv
+from batch_env import BatchCorridaEnv
+from stable_baselines3 import PPO
+from stable_baselines3.common.vec_env import VecEnv
+
+
+@pytest.fixture
+def deterministic(monkeypatch):
+    """Desliga ruído e largada aleatória para comparar os dois ambientes passo a passo."""
+    for module in (environment, batch_env):
+        monkeypatch.setattr(module, "OBS_NOISE_STD", 0)
+        monkeypatch.setattr(module, "RANDOMIZE_START", False)
+
+
+@pytest.mark.parametrize("map_type", ["corridor", "curve"])
+def test_batch_env_matches_corrida_env(deterministic, map_type):
+    n = 4
+    rng = np.random.default_rng(0)
+    envs = [CorridaEnv(map_type=map_type) for _ in range(n)]
+    for env in envs:
+        env.reset()
+    batch = BatchCorridaEnv(n, map_type=map_type)
+    obs = batch.reset()
+    assert np.allclose(obs, [env._get_obs() for env in envs])
+    for _ in range(300):
+        actions = rng.integers(0, 4, size=n)
+        obs, rewards, dones, infos = batch.step(actions)
+        for i, env in enumerate(envs):
+            o, r, done, _, info = env.step(int(actions[i]))
+            assert dones[i] == done
+            assert rewards[i] == pytest.approx(r, abs=1e-3)
+            for key, value in info.items():
+                assert infos[i][key] == pytest.approx(value)
+            if done:
+                assert np.allclose(infos[i]["terminal_observation"], o, atol=1e-6)
+                o, _ = env.reset()
+            assert np.allclose(obs[i], o, atol=1e-6)
+
+
+def test_batch_env_vec_env_api():
+    batch = BatchCorridaEnv(3, map_type="corridor")
+    assert isinstance(batch, VecEnv)
+    obs = batch.reset()
+    assert obs.shape == (3, 15)
+    assert obs.dtype == np.float32
+    obs, rewards, dones, infos = batch.step(np.array([0, 1, 2]))
+    assert rewards.shape == (3,)
+    assert dones.dtype == bool
+    assert all({"collisions", "episode_time", "checkpoint", "success", "progress"} <= set(info) for info in infos)
+    assert batch.get_attr("car1_speed") == [float(s) for s in batch.car1_speed]
+    assert batch.get_attr("width", indices=[0]) == [batch.width]
+
+
+def test_batch_env_per_car_stats_and_views():
+    stats = [{"accel": 0.5, "turn_speed": 5.0, "max_speed": 20.0},
+             {"accel": 1.0, "turn_speed": 10.0, "max_speed": 30.0}]
+    batch = BatchCorridaEnv(2, map_type="corridor", car_stats=stats)
+    batch.reset()
+    batch.step(np.array([0, 0]))
+    assert batch.car1_speed[1] > batch.car1_speed[0]
+    view = batch.envs[1]
+    assert view.barriers == batch.track.barriers
+    assert view.checkpoint_index == 0
+    obs, info = view.reset()
+    assert obs.shape == (15,)
+    assert view.car1_speed == 1.0
+
+
+def test_batch_env_auto_reset_on_collision():
+    batch = BatchCorridaEnv(2, map_type="corridor")
+    batch.reset()
+    batch.car1_pos[0] = (95.0, 300.0)  # Dentro da barreira esquerda após o passo
+    batch.car1_speed[0] = -1.0
+    obs, rewards, dones, infos = batch.step(np.array([1, 0]))
+    assert dones[0] and not dones[1]
+    assert infos[0]["collisions"] == 1
+    assert "terminal_observation" in infos[0]
+    assert batch.current_step[0] == 0
+    assert batch.current_step[1] == 1
+
+
+def test_batch_env_trains_with_sb3():
+    batch = BatchCorridaEnv(4, map_type="corridor")
+    model = PPO("MlpPolicy", batch, n_steps=16, batch_size=32, n_epochs=1, verbose=0)
+    model.learn(total_timesteps=64)
+    assert model.num_timesteps >= 64
@@ -5,6 +5,7 @@ import os
 import tempfile
 import json
 import yaml
+import numpy as np
 from pathlib import Path
 
 from core.config_manager import (
@@ -224,6 +225,79 @@ class TestRewardShaper:
         shaper.reset()
         assert shaper.last_checkpoint == 0
 
+    @pytest.mark.parametrize("shaper_type", ["balanced", "speed", "safety"])
+    def test_compute_reward_batch_matches_scalar(self, shaper_type):
+        """Testa que a versão em lote reproduz compute_reward carro a carro."""
+        rng = np.random.default_rng(0)
+        n = 6
+        batch = RewardShapeFactory.create_batch(shaper_type, n)
+        scalars = [RewardShapeFactory.create(shaper_type) for _ in range(n)]
+        checkpoint_idx = np.zeros(n, dtype=np.int64)
+        last_velocities = None
+        for _ in range(20):
+            checkpoint_idx += rng.integers(0, 2, size=n)
+            arrays = dict(
+                positions=rng.uniform(0, 800, size=(n, 2)),
+                velocities=rng.uniform(-5, 30, size=n),
+                angles=rng.uniform(0, 360, size=n),
+                checkpoint_idx=checkpoint_idx.copy(),
+                total_checkpoints=5,
+                collisions=rng.random(n) < 0.2,
+                out_of_bounds=rng.random(n) < 0.2,
+                progress=rng.uniform(-1, 1, size=n),
+                last_velocities=last_velocities,
+            )
+            rewards = RewardShapeFactory.compute_reward_batch(batch, **arrays)
+            for i, shaper in enumerate(scalars):
+                expected = shaper.compute_reward(
+                    position=tuple(arrays["positions"][i]),
+                    velocity=arrays["velocities"][i],
+                    angle=arrays["angles"][i],
+                    checkpoint_idx=int(checkpoint_idx[i]),
+                    total_checkpoints=5,
+                    collision=bool(arrays["collisions"][i]),
+                    out_of_bounds=bool(arrays["out_of_bounds"][i]),
+                    progress=arrays["progress"][i],
+                    last_velocity=None if last_velocities is None else last_velocities[i],
+                )
+                assert rewards[i] == expected
+            assert list(batch.last_checkpoints) == [s.last_checkpoint for s in scalars]
+            last_velocities = arrays["velocities"]
+
+        batch.reset_batch(n, indices=np.array([0, 2]))
+        assert batch.last_checkpoints[0] == 0 and batch.last_checkpoints[2] == 0
+        assert batch.last_checkpoints[1] == checkpoint_idx[1]
+
+    def test_compute_reward_batch_custom_shaper(self, monkeypatch):
+        """Testa que shapers customizados (só escalares) funcionam em lote."""
+        class CheckpointOnlyShaper(BaseRewardShaper):
+            def __init__(self, bonus=10.0):
+                self.bonus = bonus
+                self.seen = 0
+
+            def compute_reward(self, position, velocity, angle, checkpoint_idx,
+                               total_checkpoints, collision, out_of_bounds, progress, **kwargs):
+                reward = self.bonus * max(checkpoint_idx - self.seen, 0)
+                self.seen = max(self.seen, checkpoint_idx)
+                return reward
+
+            def reset(self):
+                self.seen = 0
+
+        monkeypatch.setattr(RewardShapeFactory, '_shapers', dict(RewardShapeFactory._shapers))
+        RewardShapeFactory.register('checkpoint_only', CheckpointOnlyShaper)
+        shaper = RewardShapeFactory.create_batch('checkpoint_only', 3, bonus=2.0)
+        arrays = dict(positions=np.zeros((3, 2)), velocities=np.zeros(3), angles=np.zeros(3),
+                      total_checkpoints=5, collisions=np.zeros(3, bool), out_of_bounds=np.zeros(3, bool),
+                      progress=np.zeros(3))
+        rewards = shaper.compute_reward_batch(checkpoint_idx=np.array([0, 1, 2]), **arrays)
+        assert list(rewards) == [0.0, 2.0, 4.0]
+        rewards = shaper.compute_reward_batch(checkpoint_idx=np.array([1, 1, 2]), **arrays)
+        assert list(rewards) == [2.0, 0.0, 0.0]
+        shaper.reset_batch(3, indices=[2])
+        rewards = shaper.compute_reward_batch(checkpoint_idx=np.array([1, 1, 2]), **arrays)
+        assert list(rewards) == [0.0, 0.0, 4.0]
+
 
 class TestAlgorithmConfig:
     """Testes para AlgorithmConfig."""
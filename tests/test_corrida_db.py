@@ -0,0 +1,88 @@
+import json
+import pytest
+import config
+from corrida_db import CorridaDB, get_database
+from agent_store import get_agent_store
+from interface_agents import AgentInfo, load_agents, save_agents
+from interface_ranking import load_ranking, save_ranking
+from phase_manager import PhaseManager
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "STORAGE_BACKEND", "sqlite")
+    monkeypatch.setattr(config, "DB_PATH", str(tmp_path / "corrida.db"))
+    db = get_database()
+    yield db
+    db.close()
+
+
+def test_schema_uses_wal(tmp_path):
+    db = CorridaDB(str(tmp_path / "x.db"))
+    assert db.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    tables = {r[0] for r in db.conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert {"agents", "agent_history", "ranking", "phase_progress", "phase_episodes"} <= tables
+    db.close()
+
+
+def test_agents_keep_full_history(sqlite_backend, monkeypatch):
+    monkeypatch.setattr(config, "DB_HISTORY_VIEW", 5)
+    agent = AgentInfo("Turbo", "PPO", historico=[{"mapa": "corridor", "xp_gained": 10, "score": i} for i in range(8)])
+    save_agents([agent.to_dict(), AgentInfo("Lento", "DQN").to_dict()])
+    store = get_agent_store()
+    record = store.find("Turbo")
+    assert [h["score"] for h in record["historico"]] == [3, 4, 5, 6, 7]  # Só a visão recente
+    # Como no SimulationSession: acrescenta, trunca a lista em memória e atualiza
+    record["historico"].append({"mapa": "curve", "xp_gained": 100, "score": 99})
+    record["historico"] = record["historico"][-2:]
+    store.update(record)
+    store.update(record)  # Entradas já gravadas não se repetem
+    assert [h["score"] for h in sqlite_backend.agent_history("Turbo")] == list(range(8)) + [99]
+    assert sqlite_backend.top_agents_by_xp(2) == [("Turbo", 180), ("Lento", 0)]
+    assert [a["nome"] for a in load_agents()] == ["Turbo", "Lento"]
+
+    # Renomear (tela de edição) leva o histórico; remover apaga em cascata
+    agents = load_agents()
+    agents[0]["nome"] = "Turbo2"
+    save_agents(agents[:1])
+    assert len(sqlite_backend.agent_history("Turbo2")) == 9
+    assert sqlite_backend.agent_history("Turbo") == []
+    assert sqlite_backend.conn.execute("SELECT COUNT(*) FROM agent_history").fetchone()[0] == 9
+
+
+def test_ranking_and_phase_progress(sqlite_backend):
+    save_ranking({"PPO|corridor": {"score": 10.0, "speed": 1.0, "tempo": 5.0},
+                  "DQN|corridor": {"score": 20.0, "speed": 2.0, "tempo": 4.0}})
+    save_ranking({"DQN|corridor": {"score": 25.0, "speed": 2.0, "tempo": 3.0}})
+    assert load_ranking() == {"DQN|corridor": {"score": 25.0, "speed": 2.0, "tempo": 3.0}}
+    assert [k for k, _ in sqlite_backend.top_ranking("corridor")] == ["DQN|corridor"]
+
+    pm = PhaseManager("Turbo")
+    for i in range(6):
+        pm.record_episode(float(i), i % 3 == 0, 100 + i)
+    pm.current_phase_id = 1
+    pm.save_progress()
+    pm.record_episode(1.0, True, 50)
+    restored = PhaseManager("Turbo")
+    assert restored.current_phase_id == 1
+    assert restored.episode_stats == pm.episode_stats
+    assert sqlite_backend.success_rate("Turbo", 3) == pytest.approx(1 / 3)
+    assert sqlite_backend.success_rate("Turbo", 10, phase_id=0) == pytest.approx(2 / 6)
+    assert sqlite_backend.success_rate("Ninguem", 10) == 0.0
+
+
+def test_new_database_imports_json(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "agents.json").write_text(json.dumps(
+        [AgentInfo("Velho", "SAC", historico=[{"xp_gained": 7}]).to_dict()]), encoding="utf-8")
+    (tmp_path / "ranking.json").write_text(json.dumps({"SAC|curve": {"score": 3.0}}), encoding="utf-8")
+    (tmp_path / "models").mkdir()
+    (tmp_path / "models" / "Velho_progress.json").write_text(json.dumps(
+        {"current_phase_id": 2, "episode_stats": [{"phase_id": 2, "reward": 1.5, "success": True, "steps": 9}]}),
+        encoding="utf-8")
+    db = get_database(str(tmp_path / "novo.db"))
+    assert db.find_agent("Velho")["historico"][0]["xp_gained"] == 7
+    assert db.load_ranking() == {"SAC|curve": {"score": 3.0}}
+    assert db.load_phase_progress("Velho") == (2, [{"phase_id": 2, "reward": 1.5, "success": True, "steps": 9}])
+    db.close()
@@ -0,0 +1,110 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+from episode_store import EpisodeStore, load_episodes, convert_text_logs, parse_text_log
+from main import TrainingLogger
+
+
+def test_store_roundtrip_across_chunks(tmp_path):
+    rng = np.random.default_rng(0)
+    store = EpisodeStore(str(tmp_path), chunk_episodes=4, flush_interval=1e9)
+    written = []
+    for i in range(10):
+        n = int(rng.integers(1, 50))
+        episode = dict(env_idx=i % 3, rewards=rng.normal(size=n).astype(np.float32),
+                       collisions=rng.integers(0, 2, size=n), actions=rng.integers(0, 4, size=n),
+                       checkpoints=np.arange(n) // 10, episode_time=0.1 * n, success=bool(i % 2))
+        assert store.add(**episode) == i
+        written.append(episode)
+    # Dois chunks cheios já no disco; o resto fica em memória até o close
+    assert len(os.listdir(tmp_path)) == 2
+    store.close()
+    assert sorted(os.listdir(tmp_path)) == ["chunk_000000.npz", "chunk_000001.npz", "chunk_000002.npz"]
+
+    log = load_episodes(str(tmp_path))
+    assert len(log) == 10
+    assert log.index["episode"].tolist() == list(range(10))
+    assert log.index["env"].tolist() == [e["env_idx"] for e in written]
+    assert log.index["success"].tolist() == [e["success"] for e in written]
+    for i, episode in enumerate(written):
+        arrays = log.episode(i)
+        assert np.array_equal(arrays["rewards"], episode["rewards"])
+        assert np.array_equal(arrays["actions"], episode["actions"])
+        assert log.index["score"][i] == pytest.approx(float(np.sum(episode["rewards"], dtype=np.float64)))
+    frame = log.step_frame("rewards")
+    assert len(frame) == sum(len(e["rewards"]) for e in written)
+    assert frame.groupby("episode")["step"].max().tolist() == [len(e["rewards"]) - 1 for e in written]
+
+    # Reabrir continua a numeração
+    store = EpisodeStore(str(tmp_path), chunk_episodes=4)
+    assert store.add(0, [1.0], [0]) == 10
+    store.close()
+    assert len(load_episodes(str(tmp_path))) == 11
+
+
+def test_pending_chunk_is_written_at_exit_without_close(tmp_path):
+    # O processo termina por exit() sem chamar close (como ao fechar a janela do main)
+    script = (f"from episode_store import EpisodeStore\n"
+              f"store = EpisodeStore({str(tmp_path)!r}, flush_interval=1e9)\n"
+              f"for i in range(5):\n"
+              f"    store.add(i, [1.0, 2.0], [0, 0])\n"
+              f"exit()\n")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", script], cwd=root, check=True)
+    log = load_episodes(str(tmp_path))
+    assert log.index["env"].tolist() == list(range(5))
+
+
+def test_store_optional_columns_and_empty_dir(tmp_path):
+    assert len(load_episodes(str(tmp_path))) == 0
+    store = EpisodeStore(str(tmp_path / "ep"))
+    store.add(2, [0.5, 0.25], [0, 1])
+    store.close()
+    log = load_episodes(str(tmp_path / "ep"))
+    assert log.episode(0)["actions"].size == 0
+    assert np.isnan(log.index["episode_time"][0])
+
+
+def test_convert_legacy_text_logs(tmp_path):
+    session = tmp_path / "sessao_x"
+    session.mkdir()
+    (session / "treinados_sucesso_x.txt").write_text(
+        "Episódio 1:\n"
+        "Recompensas: [np.float32(0.5), np.float32(-10.0), np.float32(1e-05)]\n"
+        "Colisões: [0, 1, 0]\n"
+        "Ações: [0, 2, 3]\n"
+        "Checkpoints: [0, 0, 1]\n"
+        "Tempo do episódio: 5.30s\n"
+        "Componentes da recompensa: speed=1.00\n"
+        "Sucesso: True\n" + "-" * 40 + "\n"
+        "Sessão iniciada em: 20251120_061921\n", encoding="utf-8")
+    (session / "incompletos_x.txt").write_text(
+        "Episódio 0:\nRecompensas: [1.5, 2.0]\nColisões: [0]\nSucesso: False\n" + "-" * 40 + "\n", encoding="utf-8")
+    assert parse_text_log(str(session / "incompletos_x.txt"))[0]["rewards"] == [1.5, 2.0]
+    assert convert_text_logs(str(session)) == 2
+    log = load_episodes(str(session))
+    assert log.index["success"].tolist() == [True, False]
+    assert log.episode(0)["rewards"].tolist() == pytest.approx([0.5, -10.0, 1e-05])
+    assert log.episode(0)["checkpoints"].tolist() == [0, 0, 1]
+    assert log.index["episode_time"][0] == pytest.approx(5.3)
+    assert log.episode(1)["collisions"].tolist() == [0]
+
+
+def test_training_logger_writes_columnar_store(tmp_path):
+    logger = TrainingLogger(base_dir=str(tmp_path))
+    logger.log(3, [1.0, 2.0], [0, 1], actions=[1, 2], checkpoints=[0, 1], episode_time=2.0, success=True)
+    logger.log(4, [0.5], [0], success=False)
+    logger.close()
+    log = load_episodes(logger.session_dir)
+    assert log.index["env"].tolist() == [3, 4]
+    assert log.episode(0)["actions"].tolist() == [1, 2]
+    with open(logger.success_file, encoding="utf-8") as f:
+        text = f.read()
+    assert "Recompensas:" not in text and "Recompensa total: 3.00" in text
+
+    legacy = TrainingLogger(base_dir=str(tmp_path / "legacy"), text_dumps=True)
+    legacy.log(0, [1.0, 2.0], [0, 1], actions=[1, 2], success=True)
+    legacy.close()
+    assert parse_text_log(legacy.success_file)[0]["actions"] == [1.0, 2.0]
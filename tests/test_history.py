@@ -0,0 +1,64 @@
+import pytest
+import numpy as np
+from history import EpisodeHistory
+from sparkline import MeanSeries, mean_tail
+from metrics import Metrics
+
+
+def test_episode_history_ring_and_running_sums():
+    hist = EpisodeHistory(3, capacity=4)
+    for step in range(6):
+        hist.append([step, 10 + step, 20 + step])
+    assert hist.window(0).tolist() == [2, 3, 4, 5]
+    assert hist.window(1, 2).tolist() == [14, 15]
+    assert hist.window(2, 10).tolist() == [22, 23, 24, 25]
+    # A soma do episódio é exata mesmo depois de o anel sobrescrever amostras
+    assert hist.episode_sum(0) == 15.0
+    assert hist.episode_mean(1) == pytest.approx(12.5)
+    assert hist.episode(0).tolist() == [2, 3, 4, 5]
+    assert hist.last(2) == 25
+
+    hist.end_episode(1)
+    assert hist.episode_sum(1) == 0.0 and hist.episode(1).size == 0 and hist.last(1, -1) == -1
+    hist.append_env(1, 7.0)
+    assert hist.episode(1).tolist() == [7.0]
+    assert hist.window(1).tolist() == [13, 14, 15, 7]
+    assert hist.recent_mean(1) == pytest.approx((5 + 7 + 25) / 3)
+    hist.clear()
+    assert hist.window(0).size == 0 and hist.recent_mean(5) == 0.0
+
+
+def test_episode_history_window_is_view_when_contiguous():
+    hist = EpisodeHistory(1, capacity=8)
+    for value in range(5):
+        hist.append([value])
+    assert np.shares_memory(hist.window(0), hist._data)
+
+
+def test_episode_history_feeds_dashboard_series():
+    rng = np.random.default_rng(0)
+    n_envs = 4
+    hist = EpisodeHistory(n_envs, capacity=64)
+    lists = [[] for _ in range(n_envs)]
+    series, list_series = MeanSeries(30), MeanSeries(30)
+    for step in range(150):
+        values = rng.normal(size=n_envs)
+        hist.append(values)
+        for row, value in zip(lists, values):
+            row.append(float(value))
+        if step % 9 == 0:
+            series.update(hist)
+            list_series.update(lists)
+            assert series.ring.values() == pytest.approx(list_series.ring.values())
+            assert mean_tail(hist, 30) == pytest.approx(mean_tail(lists, 30))
+    hist.clear()
+    assert series.update(hist) and len(series) == 0
+
+
+def test_metrics_keeps_last_window():
+    m = Metrics()
+    for i in range(250):
+        m.update(float(i), i % 2, episode_time=0.5, checkpoint=i % 3)
+    assert len(m.rewards) == 100
+    assert m.rewards[0] == 150.0 and m.rewards[-1] == 249.0
+    assert len(m.compute_moving_average(m.rewards)) == 91
@@ -66,6 +66,39 @@ def test_draw_env_grid_simple(interface):
     # Verifica que algo foi desenhado na grade
     assert interface.screen.get_at((50, 50))[:3] != (255, 255, 255)
 
+@pytest.mark.parametrize("map_type", ["corridor", "curve", "circle"])
+def test_draw_env_grid_uses_cached_track_layer(interface, map_type):
+    env = CorridaEnv(map_type=map_type)
+    env.checkpoints = env.setup_checkpoints(map_type)
+    interface.draw_env_grid_simple(env, 1)
+    assert len(interface._track_cache) == 1
+    layer = next(iter(interface._track_cache.values()))
+    interface.draw_env_grid_simple(env, 0)
+    assert len(interface._track_cache) == 1
+    assert next(iter(interface._track_cache.values())) is layer
+    # A camada em cache equivale a desenhar a parte estática direto na célula (o
+    # arredondamento de coordenadas float pode deslocar um checkpoint em 1px)
+    direct = pygame.Surface((interface.width, interface.height))
+    interface._draw_track_static(direct, env, interface.cell_width, 0)
+    cell = pygame.Rect(interface.cell_width, 0, interface.cell_width, interface.cell_height)
+    expected = pygame.surfarray.array3d(direct.subsurface(cell))
+    differs = (pygame.surfarray.array3d(layer) != expected).any(axis=2)
+    assert differs.mean() < 0.005
+
+def test_track_layer_cache_invalidation(interface):
+    env = CorridaEnv(map_type="corridor")
+    env.checkpoints = env.setup_checkpoints("corridor")
+    interface.draw_env_grid_simple(env, 0)
+    env.checkpoints = [(300, 300)]
+    interface.draw_env_grid_simple(env, 0)
+    assert len(interface._track_cache) == 2
+    interface.cell_width //= 2
+    interface.draw_env_grid_simple(env, 0)
+    assert len(interface._track_cache) == 1
+    assert next(iter(interface._track_cache.values())).get_width() == interface.cell_width
+    interface.clear_track_cache()
+    assert interface._track_cache == {}
+
 # Additional tests for agent selection, ranking, events, names, and models
 
 def test_select_screen_agent_selection(monkeypatch, temp_agents_file):
@@ -0,0 +1,74 @@
+import pytest
+import numpy as np
+from environment import CorridaEnv
+from batch_env import BatchCorridaEnv
+from lidar import lidar_angles, lidar_max_dist, lidar_readings, march_readings, exact_readings
+from config import ENV_SCALE
+
+
+def _random_poses(env, n, seed=0):
+    rng = np.random.default_rng(seed)
+    xs, ys = [], []
+    while len(xs) < n:
+        x, y = rng.uniform(0, env.width), rng.uniform(0, env.height)
+        if env.is_on_corridor([x, y]):
+            xs.append(x)
+            ys.append(y)
+    return np.array(xs), np.array(ys), rng.uniform(0, 360, size=n)
+
+
+def _dense_reference(env, x, y, angle, n_samples=20000):
+    samples = np.linspace(0, lidar_max_dist(), num=n_samples)
+    rad = np.radians(angle)
+    blocked = ~env.is_on_corridor_batch(x + samples * np.cos(rad), y + samples * np.sin(rad))
+    return samples[blocked.argmax()] / lidar_max_dist() if blocked.any() else 1.0
+
+
+@pytest.mark.parametrize("map_type", ["corridor", "curve", "circle"])
+def test_march_readings_match_original_lidar(map_type):
+    env = CorridaEnv(map_type=map_type, lidar_mode="march")
+    xs, ys, car_angles = _random_poses(env, 30)
+    batch = march_readings(env, xs, ys, lidar_angles(car_angles))
+    for i in range(len(xs)):
+        env.car1_pos = [xs[i], ys[i]]
+        env.car1_angle = car_angles[i]
+        assert np.array_equal(batch[i], env.get_lidar_readings())
+
+
+@pytest.mark.parametrize("map_type", ["corridor", "curve", "circle"])
+def test_exact_readings_match_dense_reference(map_type):
+    env = CorridaEnv(map_type=map_type)
+    xs, ys, car_angles = _random_poses(env, 10, seed=1)
+    angles = lidar_angles(car_angles)
+    exact = exact_readings(env, xs, ys, angles)
+    step = lidar_max_dist() / 20000
+    for i in range(len(xs)):
+        for k in range(angles.shape[1]):
+            ref = _dense_reference(env, xs[i], ys[i], angles[i, k])
+            assert abs(exact[i, k] - ref) * lidar_max_dist() <= 2 * step + 1e-3
+
+
+def test_exact_readings_known_distances():
+    env = CorridaEnv(map_type="corridor")
+    readings = exact_readings(env, np.array([150 * ENV_SCALE]), np.array([300 * ENV_SCALE]), lidar_angles([0.0]))[0]
+    assert readings[0] == 1.0  # Parede direita fora do alcance
+    assert readings[2] == 1.0  # Borda inferior a 100 px
+    assert readings[4] == pytest.approx(0.5)  # Barreira esquerda em x=100
+    assert readings[6] == 1.0
+
+
+def test_lidar_mode_option():
+    env = CorridaEnv(map_type="corridor", lidar_mode="exact")
+    obs, _ = env.reset()
+    assert obs.shape == (15,)
+    with pytest.raises(ValueError):
+        CorridaEnv(map_type="corridor", lidar_mode="sonar")
+    with pytest.raises(ValueError):
+        lidar_readings(env, [0.0], [0.0], [0.0], mode="sonar")
+
+
+def test_batch_env_exact_lidar():
+    batch = BatchCorridaEnv(8, map_type="curve", lidar_mode="exact")
+    obs = batch.reset()
+    expected = exact_readings(batch.track, batch.car1_pos[:, 0], batch.car1_pos[:, 1], lidar_angles(batch.car1_angle))
+    assert np.allclose(obs[:, 7:], expected, atol=0.1)  # Tolerância do ruído de observação
@@ -0,0 +1,59 @@
+import logging
+import logging.handlers
+import time
+import logger as corrida_logger
+from logger import setup_logger, flush_logs, log_sampled, log_rate_limited
+
+
+class ListHandler(logging.Handler):
+    def __init__(self, delay=0.0):
+        super().__init__()
+        self.delay = delay
+        self.messages = []
+
+    def emit(self, record):
+        time.sleep(self.delay)
+        self.messages.append(record.getMessage())
+
+
+def test_setup_is_idempotent_and_non_blocking():
+    log = setup_logger()
+    assert setup_logger() is log
+    assert sum(isinstance(h, logging.handlers.QueueHandler) for h in log.handlers) == 1
+    listener = corrida_logger._listener
+    slow = ListHandler(delay=0.01)
+    listener.handlers = listener.handlers + (slow,)
+    try:
+        start = time.perf_counter()
+        for i in range(50):
+            log.debug("evento %d", i)
+        assert time.perf_counter() - start < 0.25  # Quem loga não espera os 0.5 s do handler lento
+        flush_logs()
+        assert slow.messages == [f"evento {i}" for i in range(50)]
+    finally:
+        corrida_logger._listener.handlers = tuple(h for h in corrida_logger._listener.handlers if h is not slow)
+
+
+def make_logger(name):
+    log = logging.getLogger(name)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    handler = ListHandler()
+    log.addHandler(handler)
+    return log, handler
+
+
+def test_sampled_and_rate_limited_helpers():
+    log, handler = make_logger("test_logger_sampled")
+    logged = [log_sampled(log, logging.INFO, "teste_amostra", 4, "passo %d", i) for i in range(10)]
+    assert logged == [i % 4 == 0 for i in range(10)]
+    assert handler.messages[0] == "passo 0" and handler.messages[1] == "passo 4 (amostra 1/4, 5 ocorrências)"
+    assert not log_sampled(log, logging.DEBUG, "teste_debug", 1, "abaixo do nível")
+
+    log, handler = make_logger("test_logger_rate")
+    assert log_rate_limited(log, logging.INFO, "teste_rate", "cp %d", 1, interval=0.05)
+    assert not log_rate_limited(log, logging.INFO, "teste_rate", "cp %d", 2, interval=0.05)
+    assert not log_rate_limited(log, logging.INFO, "teste_rate", "cp %d", 3, interval=0.05)
+    time.sleep(0.06)
+    assert log_rate_limited(log, logging.INFO, "teste_rate", "cp %d", 4, interval=0.05)
+    assert handler.messages == ["cp 1", "cp 4 (+2 suprimidas)"]
@@ -0,0 +1,79 @@
+import pytest
+import numpy as np
+from loop_detector import LoopDetector, IncrementalLoopDetector, BatchLoopDetector
+
+
+def _trajectory(kind, n, rng):
+    t = np.arange(n)
+    if kind == "circle":
+        radius, omega = rng.uniform(5, 60), rng.uniform(0.05, 1.5)
+        points = np.c_[400 + radius * np.cos(omega * t), 300 + radius * np.sin(omega * t)]
+        return points + rng.normal(0, 1.0, (n, 2))
+    if kind == "walk":
+        return 300 + np.cumsum(rng.normal(0, 5, (n, 2)), axis=0)
+    if kind == "line":
+        return np.c_[100 + 2.0 * t, 300 + 0 * t] + rng.normal(0, 0.5, (n, 2))
+    if kind == "zigzag":
+        return np.c_[2.0 * t, 300 + 20 * ((t // 4) % 2)]
+    return np.tile([[150.0, 300.0]], (n, 1))
+
+
+@pytest.mark.parametrize("kind", ["circle", "walk", "line", "zigzag", "still"])
+@pytest.mark.parametrize("history_size", [40, 100])
+def test_incremental_detector_matches_loop_detector(kind, history_size):
+    rng = np.random.default_rng(history_size)
+    reference = LoopDetector(history_size=history_size, threshold=0.7)
+    incremental = IncrementalLoopDetector(history_size=history_size, threshold=0.7)
+    for x, y in _trajectory(kind, 250, rng):
+        reference.add_position((x, y))
+        incremental.add_position((x, y))
+        with np.errstate(invalid="ignore"):
+            assert incremental.detect_loop() == reference.detect_loop()
+        assert incremental.loop_count == reference.loop_count
+    assert np.allclose(incremental.position_history, reference.position_history)
+
+
+def test_incremental_detector_syncs_with_external_history():
+    """Uso do CorridaEnv: a lista externa é passada a cada passo e cresce a cada 10."""
+    rng = np.random.default_rng(0)
+    reference = LoopDetector(history_size=30, threshold=0.7)
+    incremental = IncrementalLoopDetector(history_size=30, threshold=0.7)
+    history = []
+    for step, (x, y) in enumerate(_trajectory("circle", 600, rng)):
+        if step % 10 == 0:
+            history.append([x, y])
+            if len(history) > 45:
+                history.pop(0)
+        assert incremental.detect_loop(history) == reference.detect_loop(history)
+    assert np.allclose(incremental.position_history, history[-30:])
+
+
+def test_incremental_path_length_is_running_sum():
+    detector = IncrementalLoopDetector(history_size=5)
+    for x in [0.0, 3.0, 3.0, 7.0, 7.0, 10.0, 20.0]:
+        detector.add_position((x, 0.0))
+    # Janela: 3, 7, 7, 10, 20
+    assert detector.path_length == pytest.approx(17.0)
+    detector.reset()
+    assert detector.path_length == 0.0
+    assert detector.position_history == []
+
+
+def test_batch_detector_matches_loop_detector():
+    rng = np.random.default_rng(7)
+    kinds = ["circle", "walk", "line", "still"]
+    histories = np.stack([_trajectory(kinds[i % 4], 80, rng) for i in range(48)])
+    lengths = rng.integers(0, 81, size=48)
+    lengths[:8] = 80
+    loops = BatchLoopDetector(history_size=64, threshold=0.7).detect(histories, lengths)
+    assert loops.shape == (48,) and loops.any()
+    for i in range(48):
+        with np.errstate(invalid="ignore"):
+            expected = LoopDetector(history_size=64, threshold=0.7).detect_loop(
+                [tuple(p) for p in histories[i, :lengths[i]]])
+        assert loops[i] == expected
+
+
+def test_batch_detector_short_histories_never_loop():
+    circle = _trajectory("circle", 29, np.random.default_rng(0))
+    assert not BatchLoopDetector().detect(circle[None]).any()
@@ -130,3 +130,67 @@ def test_training_logger(tmp_path):
     logger.close()
     assert os.path.exists(tmp_path / logger.session_dir / f"treinados_sucesso_{logger.session_time}.txt")
     print("Finalizando test_training_logger")
+
+def test_render_schedule(monkeypatch):
+    from main import RenderSchedule
+    assert RenderSchedule().throttled
+    assert all(RenderSchedule().due(step) for step in range(5))
+    every = RenderSchedule(every_n=3)
+    assert not every.throttled
+    assert [every.due(step) for step in range(7)] == [True, False, False, True, False, False, True]
+    clock = [100.0]
+    monkeypatch.setattr("main.time.monotonic", lambda: clock[0])
+    fps = RenderSchedule(fps=10)
+    assert fps.due(0)
+    clock[0] += 0.05
+    assert not fps.due(1)
+    clock[0] += 0.06
+    assert fps.due(2)
+    with pytest.raises(ValueError):
+        RenderSchedule(every_n=0)
+
+@pytest.mark.timeout(120)
+def test_run_headless_bookkeeping(tmp_path, monkeypatch):
+    import json
+    import pygame
+    from main import run_headless
+    monkeypatch.chdir(tmp_path)
+    with open("agents.json", "w", encoding="utf-8") as f:
+        json.dump([{"nome": "Turbo", "tipo": "PPO"}], f)
+    # Sem pygame: o modo headless não pode abrir janela nem inicializar o display
+    monkeypatch.setattr(pygame.display, "set_mode", Mock(side_effect=AssertionError("janela aberta")))
+    session = run_headless(agent_name="Turbo", map_type="corridor", n_parallel=2, learning_rate=3e-4, gamma=0.99,
+                           max_episodes=2)
+    assert session.episodes_done >= 2
+    assert session.iter_count > 0
+    with open("agents.json", encoding="utf-8") as f:
+        turbo = json.load(f)[0]
+    assert len(turbo["historico"]) == session.episodes_done
+    assert turbo["historico"][0]["tipo_evento"] == "simulacao"
+    with open("ranking.json", encoding="utf-8") as f:
+        assert "PPO|corridor" in json.load(f)
+    with pytest.raises(ValueError):
+        run_headless(agent_name="Fantasma", n_parallel=1, max_steps=1)
+
+
+def test_race_manager_batches_lanes_by_model(tmp_path):
+    import numpy as np
+    from stable_baselines3 import DQN
+    from main import RaceManager
+    from interface_agents import AgentInfo
+    env = CorridaEnv(map_type="corridor")
+    paths = []
+    for seed in (0, 1):
+        path = str(tmp_path / f"m{seed}.zip")
+        DQN("MlpPolicy", env, buffer_size=100, seed=seed, verbose=0).save(path)
+        paths.append(path)
+    agents = [AgentInfo("A", "DQN", modelo_path=paths[0]), AgentInfo("B", "DQN", modelo_path=paths[1]),
+              AgentInfo("A2", "DQN", modelo_path=paths[0]), AgentInfo("Sem", "DQN", modelo_path=str(tmp_path / "x.zip"))]
+    manager = RaceManager(agents, "corridor", n_parallel=7)
+    assert len(manager.models) == 3 and manager.models[0] is manager.models[2]  # Um load por arquivo
+    groups = manager.lane_groups(7)
+    assert [lanes.tolist() for _, lanes in groups] == [[0, 2, 3, 5, 6], [1, 4]]
+
+    obs = np.stack([env.reset(seed=i)[0] for i in range(7)])
+    expected = [int(manager.models[i % 3].predict(obs[i:i + 1], deterministic=True)[0][0]) for i in range(7)]
+    assert manager.get_actions(obs, deterministic=True) == expected
@@ -0,0 +1,57 @@
+import os
+import pytest
+from stable_baselines3 import DQN
+from environment import CorridaEnv
+from model_cache import ModelCache, model_nbytes, get_model_cache
+from agent import Agent
+from policy_inference import InferencePolicy
+
+
+@pytest.fixture(scope="module")
+def model_files(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp("modelos")
+    env = CorridaEnv(map_type="corridor")
+    paths = []
+    for seed in range(3):
+        path = str(tmp / f"m{seed}.zip")
+        DQN("MlpPolicy", env, buffer_size=50000, seed=seed, verbose=0).save(path)
+        paths.append(path)
+    return paths
+
+
+def test_cache_shares_models_and_reloads_changed_files(model_files):
+    cache = ModelCache()
+    model = cache.get(model_files[0], "DQN")
+    assert cache.get(model_files[0], "DQN") is model
+    assert (cache.loads, cache.hits) == (1, 1)
+    assert isinstance(model, InferencePolicy)  # Só a rede da política
+    assert cache.nbytes == model_nbytes(model)
+
+    stat = os.stat(model_files[0])
+    os.utime(model_files[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert cache.get(model_files[0], "DQN") is not model
+    assert cache.loads == 2 and len(cache) == 1
+    assert get_model_cache() is get_model_cache()
+
+
+def test_cache_evicts_least_recently_used(model_files):
+    probe = ModelCache()
+    size = model_nbytes(probe.get(model_files[0], "DQN"))
+    cache = ModelCache(max_bytes=int(size * 2.5))
+    first = cache.get(model_files[0], "DQN")
+    cache.get(model_files[1], "DQN")
+    assert cache.get(model_files[0], "DQN") is first  # Mais recente agora
+    cache.get(model_files[2], "DQN")
+    assert cache.evictions == 1 and len(cache) == 2
+    assert cache.get(model_files[0], "DQN") is first
+    assert cache.loads == 3  # O m1 saiu; m0 continuou
+    cache.get(model_files[1], "DQN")
+    assert cache.loads == 4
+
+
+def test_agent_from_saved_keeps_training_state(model_files):
+    env = CorridaEnv(map_type="corridor")
+    agent = Agent.from_saved(model_files[0], env)
+    assert agent.model_path == model_files[0][:-4]
+    assert agent.model.replay_buffer.buffer_size == 50000
+    assert agent.predict(env.reset()[0], deterministic=True) in range(4)
@@ -0,0 +1,88 @@
+import json
+import os
+import numpy as np
+import pytest
+import phase_manager
+from phase_manager import PhaseManager
+
+
+@pytest.fixture
+def in_tmp(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(phase_manager, "PHASE_JOURNAL_COMPACT", 10)
+    return tmp_path
+
+
+def brute_force_progress(pm):
+    """Progresso calculado como antes: filtrando episode_stats inteiro."""
+    phase = pm.get_current_phase()
+    stats = [s for s in pm.episode_stats if s["phase_id"] == pm.current_phase_id]
+    recent = stats[-phase.min_episodes_success:]
+    rate = sum(s["success"] for s in recent) / len(recent) if recent else 0
+    reward = sum(s["reward"] for s in recent) / len(recent) if recent else 0
+    return len(stats), rate, reward
+
+
+def run_curriculum(pm, n, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        pm.record_episode(np.float64(rng.uniform(0, 150)), bool(rng.random() < 0.8), int(rng.integers(100, 1000)))
+        if pm.check_phase_completion():
+            pm.advance_phase()
+
+
+def test_journal_replay_restores_exact_state(in_tmp):
+    pm = PhaseManager("Turbo")
+    run_curriculum(pm, 56)
+    assert pm.current_phase_id > 0
+    with open(pm.journal_file) as f:  # Só o que veio depois da última compactação
+        assert 0 < len(f.readlines()) < 10
+    progress = pm.get_phase_progress()
+    total, rate, reward = brute_force_progress(pm)
+    assert (progress["total_episodes"], progress["recent_success_rate"]) == (total, rate)
+    assert progress["avg_reward"] == pytest.approx(reward)
+
+    restored = PhaseManager("Turbo")
+    assert restored.current_phase_id == pm.current_phase_id
+    assert restored.episode_stats == pm.episode_stats
+    assert restored.get_phase_progress() == progress
+    run_curriculum(restored, 5, seed=1)
+    run_curriculum(pm, 5, seed=1)
+    assert PhaseManager("Turbo").episode_stats == pm.episode_stats
+
+
+def test_interrupted_compaction_and_torn_line(in_tmp):
+    pm = PhaseManager("Turbo")
+    run_curriculum(pm, 7)
+    with open(pm.journal_file) as f:
+        journal = f.read()
+    pm.save_progress()
+    # Queda depois de gravar o snapshot e antes de apagar o diário, com uma linha pela metade
+    with open(pm.journal_file, "w") as f:
+        f.write(journal + '{"n": 7, "episo')
+    restored = PhaseManager("Turbo")
+    assert restored.episode_stats == pm.episode_stats
+    assert restored.current_phase_id == pm.current_phase_id
+
+
+def test_episodes_after_a_torn_line_survive_reload(in_tmp):
+    pm = PhaseManager("Turbo")
+    run_curriculum(pm, 3)
+    with open(pm.journal_file, "a") as f:
+        f.write('{"n": 3, "epi')
+    restored = PhaseManager("Turbo")
+    assert len(restored.episode_stats) == 3
+    run_curriculum(restored, 5, seed=1)
+    assert len(restored.episode_stats) == 8
+    assert PhaseManager("Turbo").episode_stats == restored.episode_stats
+
+
+def test_legacy_progress_file(in_tmp):
+    os.makedirs("models")
+    stats = [{"phase_id": 0, "reward": 60.0, "success": True, "steps": 300}] * 5
+    with open("models/Velho_progress.json", "w") as f:
+        json.dump({"current_phase_id": 0, "episode_stats": stats}, f, indent=2)
+    pm = PhaseManager("Velho")
+    assert pm.check_phase_completion()
+    assert pm.advance_phase()
+    assert PhaseManager("Velho").current_phase_id == 1
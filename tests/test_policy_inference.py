@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from stable_baselines3 import DQN, PPO, SAC
+from environment import CorridaEnv
+from agent import Agent
+from policy_inference import InferencePolicy, BACKENDS
+
+
+@pytest.fixture(scope="module")
+def env():
+    return CorridaEnv(map_type="corridor")
+
+
+@pytest.mark.parametrize("algorithm", [DQN, PPO])
+def test_inference_policy_matches_sb3_predict(tmp_path, env, algorithm):
+    model = algorithm("MlpPolicy", env, seed=0, verbose=0)
+    path = str(tmp_path / "modelo.zip")
+    model.save(path)
+    policy = InferencePolicy.load(path)
+
+    obs = np.stack([env.observation_space.sample() for _ in range(64)]).astype(np.float32)
+    expected, _ = model.predict(obs, deterministic=True)
+    actions, state = policy.predict(obs, deterministic=True)
+    assert state is None
+    np.testing.assert_array_equal(actions, expected)
+    single, _ = policy.predict(obs[0], deterministic=True)
+    assert single.shape == () and int(single) == expected[0]
+    assert policy.predict(obs, deterministic=False)[0].shape == (64,)
+    assert not any(p.requires_grad for p in policy.net.parameters())
+
+
+@pytest.mark.parametrize("algorithm", [DQN, PPO])
+def test_exported_backends_match_sb3_predict(env, algorithm):
+    agent = Agent.__new__(Agent)
+    agent.model = algorithm("MlpPolicy", env, seed=1, verbose=0)
+    obs = np.stack([env.observation_space.sample() for _ in range(128)]).astype(np.float32)
+    expected, _ = agent.model.predict(obs, deterministic=True)
+    reference = agent.export_policy(backend="torch").forward(obs)
+    for backend in BACKENDS:
+        policy = agent.export_policy(backend=backend)
+        np.testing.assert_allclose(policy.forward(obs), reference, rtol=1e-5, atol=1e-5)
+        np.testing.assert_array_equal(policy.predict_batch(obs), expected)
+        assert policy.predict(obs[0], deterministic=True)[0] == expected[0]
+    assert next(agent.model.policy.parameters()).requires_grad  # O modelo segue treinável
+    with pytest.raises(ValueError):
+        policy.set_backend("onnx")
+
+
+def test_agent_for_inference_evaluates_without_training_state(tmp_path, env):
+    path = str(tmp_path / "modelo.zip")
+    DQN("MlpPolicy", env, seed=0, verbose=0).save(path)
+    agent = Agent.for_inference(path)
+    assert agent.env is None and agent.model_path == path[:-4]
+    assert not hasattr(agent.model, "replay_buffer")
+    assert isinstance(agent.evaluate(env, n_episodes=1), float)
+
+
+def test_inference_policy_rejects_continuous_actions(tmp_path):
+    from gymnasium.wrappers import TimeLimit
+    from gymnasium.envs.classic_control import PendulumEnv
+    path = str(tmp_path / "sac.zip")
+    SAC("MlpPolicy", TimeLimit(PendulumEnv(), 10), buffer_size=10, verbose=0).save(path)
+    with pytest.raises(ValueError):
+        InferencePolicy.load(path)
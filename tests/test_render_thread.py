@@ -0,0 +1,187 @@
+import time
+import numpy as np
+import pytest
+from batch_env import BatchCorridaEnv
+from environment import CorridaEnv
+from render_thread import (CarSnapshot, RaceSnapshot, SnapshotBuffer, RenderThread, capture_snapshot,
+                           pump_events, DASHBOARD_WINDOW)
+from sparkline import SeriesTail
+
+
+class SlowInterface:
+    """Interface falsa que demora para desenhar e registra os quadros."""
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.steps_drawn = []
+        self.paused = False
+
+    def process_events(self):
+        pass
+
+    def clear(self):
+        pass
+
+    def draw_env_grid_simple(self, car, idx):
+        assert isinstance(car, CarSnapshot)
+
+    def draw_dashboard(self, *args):
+        time.sleep(self.delay)
+
+    def present(self):
+        pass
+
+
+def test_capture_snapshot_is_immutable_copy():
+    batch = BatchCorridaEnv(3, map_type="curve")
+    batch.reset()
+    rewards = [[1.0, 2.0], [3.0], [5.0, 6.0]]
+    snapshot = capture_snapshot(batch.envs, 7, rewards, [[0, 1], [0], [1, 1]], [[0.0], [-1.0], []], 4, 2.5, 3)
+    assert isinstance(snapshot, RaceSnapshot)
+    assert snapshot.step == 7 and len(snapshot.cars) == 3
+    car = snapshot.cars[1]
+    assert car.car1_pos == (batch.car1_pos[1, 0], batch.car1_pos[1, 1])
+    assert car.checkpoint_index == batch.checkpoint_index[1]
+    assert car.barriers == tuple(tuple(b) for b in batch.track.barriers)
+    assert isinstance(car.checkpoints, tuple)
+    # Séries já agregadas: média entre ambientes, preenchendo com 0 os históricos curtos
+    assert snapshot.dashboard[0] == SeriesTail(2, (3.0, 8.0 / 3))
+    assert snapshot.dashboard[3:] == (4, 2.5, 3)
+
+    before = snapshot.cars[1].car1_pos
+    batch.step(np.array([0, 0, 0]))
+    batch.car1_pos[1] += 50.0
+    assert snapshot.cars[1].car1_pos == before
+
+
+def test_capture_snapshot_window_and_plain_envs():
+    envs = [CorridaEnv(map_type="corridor") for _ in range(2)]
+    for env in envs:
+        env.reset()
+    hist = [list(range(300)), list(range(300))]
+    snapshot = capture_snapshot(envs, 0, hist, hist, hist, 0, 0.0, 0)
+    # Só as últimas DASHBOARD_WINDOW médias viajam no snapshot
+    assert snapshot.dashboard[0] == SeriesTail(300, tuple(float(v) for v in range(300 - DASHBOARD_WINDOW, 300)))
+    assert snapshot.cars[0].corridor_rect == tuple(envs[0].corridor_rect)
+    assert capture_snapshot(envs, 0, [[]], [[]], [[]], 0, 0.0, 0).dashboard[0] == SeriesTail(0, ())
+
+
+def test_snapshot_buffer_double_buffering():
+    buffer = SnapshotBuffer()
+    assert buffer.wants_snapshot()
+    assert buffer.latest() == (0, None)
+    buffer.publish("a")
+    assert not buffer.wants_snapshot()
+    buffer.publish("b")
+    assert buffer.latest() == (2, "b")
+    assert buffer.wants_snapshot()
+
+
+def test_render_thread_never_blocks_publisher():
+    buffer = SnapshotBuffer()
+    interface = SlowInterface(delay=0.02)
+    renderer = RenderThread(interface, buffer, fps=200)
+    renderer.start()
+    try:
+        start = time.perf_counter()
+        published = 0
+        for step in range(20000):
+            if buffer.wants_snapshot():
+                buffer.publish(RaceSnapshot(step, (), ((), (), (), step, 0.0, 0)))
+                published += 1
+        elapsed = time.perf_counter() - start
+        deadline = time.monotonic() + 2.0
+        while renderer.frames == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        renderer.stop()
+    assert not renderer.is_alive()
+    assert renderer.frames >= 1
+    # O desenho leva 20 ms por quadro; 20000 passos não podem ter esperado por ele
+    assert elapsed < 0.02 * 20000 / 100
+    assert published <= renderer.frames + 1
+
+
+def test_render_thread_leaves_events_to_main_thread():
+    class EventsInterface(SlowInterface):
+        def process_events(self):
+            raise AssertionError("process_events fora da thread principal")
+
+    buffer = SnapshotBuffer()
+    interface = EventsInterface(delay=0.0)
+    renderer = RenderThread(interface, buffer, fps=200)
+    renderer.start()
+    try:
+        buffer.publish(RaceSnapshot(0, (), ((), (), (), 0, 0.0, 0)))
+        deadline = time.monotonic() + 2.0
+        while renderer.frames == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        renderer.stop()
+    assert renderer.frames == 1
+
+
+def test_render_thread_draws_with_pygame_interface():
+    from interface_dpg import InterfaceDPG
+    interface = InterfaceDPG(width=640, height=480, n_parallel=2)
+    batch = BatchCorridaEnv(2, map_type="corridor")
+    batch.reset()
+    snapshot = capture_snapshot(batch.envs, 1, [[1.0], [2.0]], [[0], [0]], [[0.0], [0.0]], 0, 1.0, 2)
+    renderer = RenderThread(interface, SnapshotBuffer())
+    renderer.draw(snapshot)
+    assert renderer.frames == 1
+    assert renderer.present() and not renderer.present()
+    interface.close()
+
+
+def test_quit_while_drawing_stops_renderer_before_pygame_quit():
+    import threading
+    import pygame
+    from interface_dpg import InterfaceDPG
+    interface = InterfaceDPG(width=640, height=480, n_parallel=2)
+    batch = BatchCorridaEnv(2, map_type="corridor")
+    batch.reset()
+    buffer = SnapshotBuffer()
+    renderer = RenderThread(interface, buffer, fps=1000)
+    errors = []
+    draw = renderer.draw
+
+    def checked_draw(snapshot):
+        try:
+            draw(snapshot)
+        except Exception as e:  # O loop da thread só registraria o erro no log
+            errors.append(e)
+            raise
+
+    renderer.draw = checked_draw
+    change_threads = []
+    change_state = interface.change_state
+
+    def recorded_change_state(state):
+        change_threads.append(threading.current_thread())
+        change_state(state)
+
+    interface.change_state = recorded_change_state
+    renderer.start()
+    try:
+        step = 0
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_ESCAPE))
+        deadline = time.monotonic() + 5.0
+        while (renderer.frames < 5 or not change_threads) and time.monotonic() < deadline:
+            step += 1
+            if buffer.wants_snapshot():
+                buffer.publish(capture_snapshot(batch.envs, step, [[1.0]], [[0]], [[0.0]], 0, 1.0, 2))
+            assert not pump_events(interface, renderer)
+            renderer.present()
+            time.sleep(0.001)
+        assert renderer.frames >= 5
+        # Fecha a janela com a RenderThread desenhando sem parar
+        pygame.event.post(pygame.event.Event(pygame.QUIT))
+        buffer.publish(capture_snapshot(batch.envs, step + 1, [[1.0]], [[0]], [[0.0]], 0, 1.0, 2))
+        assert pump_events(interface, renderer)
+        assert not renderer.is_alive()
+        frames = renderer.frames
+    finally:
+        renderer.stop(timeout=None)
+        interface.close()
+    assert change_threads == [renderer] and interface.state == "menu_inicial"
+    assert errors == [] and renderer.frames == frames
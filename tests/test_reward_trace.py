@@ -0,0 +1,185 @@
+import pytest
+import numpy as np
+import environment
+import batch_env
+from environment import CorridaEnv
+from batch_env import BatchCorridaEnv
+from core.reward_shaper import RewardShapeFactory, RewardComponentStats, BaseRewardShaper, BalancedRewardShaper
+from core.callbacks import MetricsCallback
+from main import TrainingLogger
+from stable_baselines3 import PPO
+
+
+@pytest.fixture
+def deterministic(monkeypatch):
+    """Desliga ruído e largada aleatória para comparar ambientes passo a passo."""
+    for module in (environment, batch_env):
+        monkeypatch.setattr(module, "OBS_NOISE_STD", 0)
+        monkeypatch.setattr(module, "RANDOMIZE_START", False)
+
+
+@pytest.mark.parametrize("shaper_type", ["balanced", "speed", "safety"])
+def test_reward_components_sum_to_compute_reward(shaper_type):
+    rng = np.random.default_rng(0)
+    plain = RewardShapeFactory.create(shaper_type)
+    traced = RewardShapeFactory.create(shaper_type)
+    checkpoint_idx = 0
+    last_velocity = None
+    for _ in range(50):
+        checkpoint_idx += int(rng.integers(0, 2))
+        kwargs = dict(position=(100.0, 200.0), velocity=float(rng.uniform(-5, 30)), angle=0.0,
+                      checkpoint_idx=checkpoint_idx, total_checkpoints=5,
+                      collision=bool(rng.random() < 0.2), out_of_bounds=bool(rng.random() < 0.2),
+                      progress=float(rng.uniform(-1, 1)), last_velocity=last_velocity)
+        reward = 0.0
+        for value in traced.reward_components(**kwargs).values():
+            reward += value
+        assert reward == plain.compute_reward(**kwargs)
+        assert traced.last_checkpoint == plain.last_checkpoint
+        last_velocity = kwargs["velocity"]
+
+
+@pytest.mark.parametrize("shaper_type", RewardShapeFactory.list())
+def test_scalar_and_batch_paths_agree_component_by_component(shaper_type):
+    """compute_reward, reward_components e reward_components_batch são três escritas da mesma fórmula."""
+    rng = np.random.default_rng(1)
+    n = 8
+    batch = RewardShapeFactory.create_batch(shaper_type, n)
+    plain = [RewardShapeFactory.create(shaper_type) for _ in range(n)]
+    traced = [RewardShapeFactory.create(shaper_type) for _ in range(n)]
+    checkpoint_idx = np.zeros(n, dtype=np.int64)
+    last_velocities = None
+    for _ in range(200):
+        checkpoint_idx += rng.integers(0, 3, size=n)  # Inclui saltos de mais de um checkpoint
+        velocities = rng.uniform(-5, 30, size=n)
+        velocities[rng.random(n) < 0.1] = 0.0
+        arrays = dict(positions=rng.uniform(0, 800, size=(n, 2)), velocities=velocities,
+                      angles=rng.uniform(0, 360, size=n), checkpoint_idx=checkpoint_idx.copy(),
+                      total_checkpoints=5, collisions=rng.random(n) < 0.3,
+                      out_of_bounds=rng.random(n) < 0.3, progress=rng.uniform(-1, 1, size=n),
+                      last_velocities=last_velocities)
+        components = batch.reward_components_batch(**arrays)
+        for i in range(n):
+            kwargs = dict(position=tuple(arrays["positions"][i]), velocity=float(velocities[i]),
+                          angle=float(arrays["angles"][i]), checkpoint_idx=int(checkpoint_idx[i]),
+                          total_checkpoints=5, collision=bool(arrays["collisions"][i]),
+                          out_of_bounds=bool(arrays["out_of_bounds"][i]),
+                          progress=float(arrays["progress"][i]),
+                          last_velocity=None if last_velocities is None else float(last_velocities[i]))
+            scalar = traced[i].reward_components(**kwargs)
+            assert list(scalar) == list(components)
+            for name, value in scalar.items():
+                assert value == pytest.approx(float(components[name][i]), rel=1e-12, abs=1e-12), name
+            reward = 0.0
+            for value in scalar.values():
+                reward += value
+            assert plain[i].compute_reward(**kwargs) == reward
+        assert list(batch.last_checkpoints) == [s.last_checkpoint for s in plain]
+        assert [s.last_checkpoint for s in traced] == [s.last_checkpoint for s in plain]
+        last_velocities = velocities
+
+
+def test_trace_components_toggle_and_custom_shaper():
+    class ConstantShaper(BaseRewardShaper):
+        def compute_reward(self, **kwargs):
+            return 3.0
+
+        def reset(self):
+            pass
+
+    kwargs = dict(position=(0.0, 0.0), velocity=5.0, angle=0.0, checkpoint_idx=1, total_checkpoints=5,
+                  collision=False, out_of_bounds=False, progress=0.1)
+    trace = {}
+    custom = ConstantShaper()
+    custom.trace_components(trace)
+    assert custom.compute_reward(**kwargs) == 3.0
+    assert trace == {"total": 3.0}
+
+    shaper = BalancedRewardShaper()
+    shaper.trace_components(trace)
+    shaper.compute_reward(**kwargs)
+    assert trace["checkpoint"] == 100.0
+    shaper.trace_components(None)
+    assert "compute_reward" not in vars(shaper)
+    shaper.compute_reward(**dict(kwargs, checkpoint_idx=2))
+    assert trace["checkpoint"] == 100.0
+
+
+@pytest.mark.parametrize("fast_path", [False, True])
+def test_traced_env_matches_untraced_and_reports_episode(deterministic, fast_path):
+    plain = CorridaEnv(map_type="curve", fast_path=fast_path)
+    traced = CorridaEnv(map_type="curve", fast_path=fast_path, reward_trace=True)
+    plain.reset()
+    traced.reset()
+    rng = np.random.default_rng(1)
+    episode_return = 0.0
+    episodes = 0
+    while episodes < 3:
+        action = int(rng.integers(0, 4))
+        _, r1, d1, _, i1 = plain.step(action)
+        _, r2, d2, _, i2 = traced.step(action)
+        assert r1 == r2 and d1 == d2
+        assert "reward_components" not in i1
+        episode_return += r2
+        if d2:
+            components = i2["reward_components"]
+            assert sum(components.values()) == pytest.approx(episode_return)
+            assert {"checkpoint", "speed", "progress", "stability"} <= set(components)
+            plain.reset()
+            traced.reset()
+            assert traced.reward_trace == {}
+            episode_return = 0.0
+            episodes += 1
+        else:
+            assert "reward_components" not in i2
+
+
+def test_batch_env_trace_matches_corrida_env(deterministic):
+    n = 3
+    envs = [CorridaEnv(map_type="corridor", reward_trace=True) for _ in range(n)]
+    for env in envs:
+        env.reset()
+    batch = BatchCorridaEnv(n, map_type="corridor", reward_trace=True)
+    batch.reset()
+    rng = np.random.default_rng(2)
+    reported = 0
+    for _ in range(200):
+        actions = rng.integers(0, 4, size=n)
+        _, _, dones, infos = batch.step(actions)
+        for i, env in enumerate(envs):
+            _, _, done, _, info = env.step(int(actions[i]))
+            if done:
+                expected = info["reward_components"]
+                got = infos[i]["reward_components"]
+                assert {name: got[name] for name in expected} == pytest.approx(expected)
+                assert all(got[name] == 0.0 for name in set(got) - set(expected))
+                reported += 1
+                env.reset()
+    assert reported > 0
+
+
+def test_reward_component_stats_and_training_logger(tmp_path):
+    stats = RewardComponentStats()
+    assert stats.means() == {}
+    stats.add({"speed": 2.0, "checkpoint": 100.0})
+    stats.add({"speed": 4.0, "off_track": -50.0})
+    assert stats.means() == {"speed": 3.0, "checkpoint": 50.0, "off_track": -25.0}
+
+    logger = TrainingLogger(base_dir=str(tmp_path))
+    logger.log(1, [10], [0], success=True, reward_components={"speed": 1.5, "checkpoint": 100.0})
+    logger.log(2, [5], [1], success=False, reward_components={"speed": 0.5})
+    logger.close()
+    assert logger.reward_components.means() == {"speed": 1.0, "checkpoint": 50.0}
+    with open(logger.success_file, encoding="utf-8") as f:
+        text = f.read()
+    assert "Componentes da recompensa: speed=1.50, checkpoint=100.00" in text
+    assert "Média dos componentes da recompensa (2 episódios)" in text
+
+
+def test_metrics_callback_aggregates_reward_components():
+    env = BatchCorridaEnv(4, map_type="corridor", reward_trace=True)
+    callback = MetricsCallback(collect_fps=False, collect_policy_entropy=False)
+    model = PPO("MlpPolicy", env, n_steps=160, batch_size=64, n_epochs=1, verbose=0)
+    model.learn(total_timesteps=640, callback=callback)
+    assert callback.reward_components.episodes >= 4
+    assert "speed" in callback.reward_components.means()
@@ -0,0 +1,72 @@
+import pytest
+import numpy as np
+import environment
+import batch_env
+import shm_vec_env
+from batch_env import BatchCorridaEnv
+from shm_vec_env import SharedMemoryVecEnv, default_n_workers
+from stable_baselines3 import PPO
+from stable_baselines3.common.vec_env import VecEnv
+
+
+@pytest.fixture
+def deterministic(monkeypatch):
+    """Sem ruído nem largada aleatória; com 'fork' os workers herdam os patches."""
+    for module in (environment, batch_env):
+        monkeypatch.setattr(module, "OBS_NOISE_STD", 0)
+        monkeypatch.setattr(module, "RANDOMIZE_START", False)
+
+
+def test_default_n_workers_follows_cores(monkeypatch):
+    monkeypatch.setattr(shm_vec_env, "available_cores", lambda: 32)
+    assert default_n_workers(256, envs_per_worker=8) == 32
+    assert default_n_workers(64, envs_per_worker=8) == 8
+    assert default_n_workers(3, envs_per_worker=8) == 1
+    monkeypatch.setattr(shm_vec_env, "available_cores", lambda: 1)
+    assert default_n_workers(256, envs_per_worker=8) == 1
+
+
+def test_shm_vec_env_matches_batch_env(deterministic):
+    n = 6
+    rng = np.random.default_rng(0)
+    batch = BatchCorridaEnv(n, map_type="curve")
+    vec = SharedMemoryVecEnv(n, map_type="curve", n_workers=3, start_method="fork")
+    try:
+        assert np.allclose(vec.reset(), batch.reset())
+        for _ in range(200):
+            actions = rng.integers(0, 4, size=n)
+            obs, rewards, dones, infos = vec.step(actions)
+            b_obs, b_rewards, b_dones, b_infos = batch.step(actions)
+            assert np.allclose(obs, b_obs, atol=1e-6)
+            assert np.allclose(rewards, b_rewards)
+            assert np.array_equal(dones, b_dones)
+            for info, b_info in zip(infos, b_infos):
+                assert info.keys() == b_info.keys()
+                for key, value in info.items():
+                    assert np.allclose(value, b_info[key])
+        assert np.allclose(vec.envs[4].car1_pos, batch.car1_pos[4])
+    finally:
+        vec.close()
+
+
+def test_shm_vec_env_api_and_close():
+    stats = [{"accel": 0.5, "turn_speed": 5.0, "max_speed": 20.0}] * 2 + [{"accel": 1.0, "turn_speed": 10.0, "max_speed": 30.0}] * 2
+    vec = SharedMemoryVecEnv(4, map_type="corridor", car_stats=stats, n_workers=2)
+    assert isinstance(vec, VecEnv)
+    vec.reset()
+    vec.step(np.zeros(4, dtype=int))
+    speeds = vec.get_attr("car1_speed")
+    assert speeds[3] > speeds[0]
+    assert speeds == [view.car1_speed for view in vec.envs]
+    vec.set_attr("max_steps", 1, indices=[2])
+    assert vec.get_attr("max_steps", indices=[1, 2]) == [1000, 1]
+    obs, info = vec.envs[1].reset()
+    assert obs.shape == (15,) and vec.envs[1].car1_speed == 1.0
+    assert vec.envs[0].barriers == vec.track.barriers
+    model = PPO("MlpPolicy", vec, n_steps=16, batch_size=32, n_epochs=1, verbose=0)
+    model.learn(total_timesteps=64)
+    name = vec._shm.name
+    vec.close()
+    assert all(not p.is_alive() for p in vec.processes)
+    with pytest.raises(FileNotFoundError):
+        shm_vec_env.shared_memory.SharedMemory(name=name)
@@ -0,0 +1,108 @@
+import pytest
+import numpy as np
+import pygame
+from sparkline import RingSeries, MeanSeries, Sparkline, mean_tail
+from interface_dashboard import Dashboard, DASHBOARD_WINDOW
+from metrics import Metrics
+
+
+def full_mean(hist):
+    """Média entre ambientes calculada do zero, como o Dashboard fazia a cada quadro."""
+    n = len(hist)
+    maxlen = max(len(h) for h in hist)
+    return [sum(h[i] if i < len(h) else 0 for h in hist) / n for i in range(maxlen)]
+
+
+def test_ring_series_wraparound():
+    ring = RingSeries(5)
+    ring.append(1.0)
+    ring.extend([2.0, 3.0])
+    assert ring.values().tolist() == [1.0, 2.0, 3.0]
+    ring.extend([4.0, 5.0, 6.0, 7.0])
+    assert ring.values().tolist() == [3.0, 4.0, 5.0, 6.0, 7.0]
+    ring.extend(np.arange(20.0))
+    assert ring.values().tolist() == [15.0, 16.0, 17.0, 18.0, 19.0]
+    version = ring.version
+    ring.extend([])
+    assert ring.version == version
+    ring.clear()
+    assert len(ring) == 0 and ring.version == version + 1
+
+
+def test_mean_series_incremental_matches_full_recompute():
+    rng = np.random.default_rng(0)
+    hist = [[] for _ in range(4)]
+    series = MeanSeries(30)
+    tail_series = MeanSeries(30)
+    for step in range(120):
+        for h in hist:
+            h.append(float(rng.normal()))
+        if step % 7 == 0:
+            changed = series.update(hist)
+            assert changed
+            assert not series.update(hist)
+            tail_series.update(mean_tail(hist, 30))
+            expected = full_mean(hist)[-30:]
+            assert series.ring.values() == pytest.approx(expected)
+            assert tail_series.ring.values() == pytest.approx(expected)
+    # Históricos zerados (reinício) recomeçam a série
+    hist = [[1.0], [3.0], [5.0], [7.0]]
+    assert series.update(hist)
+    assert series.ring.values().tolist() == [4.0]
+
+
+def test_sparkline_redraws_only_with_new_data():
+    pygame.init()
+    ring = RingSeries(50)
+    plot = Sparkline((200, 120), [(255, 0, 0)], title="Teste", labels=["a"])
+    surface = plot.draw([ring])
+    assert plot.redraws == 1
+    assert plot.draw([ring]) is surface and plot.redraws == 1
+    ring.extend(np.sin(np.linspace(0, 6, 50)))
+    plot.draw([ring])
+    assert plot.redraws == 2
+    pixels = pygame.surfarray.array3d(surface)
+    assert ((pixels == (255, 0, 0)).all(axis=2)).sum() > 50
+    # Arrays comuns sem chave sempre redesenham; com chave, só quando ela muda
+    plot.draw([np.arange(10.0)])
+    plot.draw([np.arange(10.0)], key=1)
+    plot.draw([np.arange(10.0)], key=1)
+    assert plot.redraws == 4
+
+
+def test_dashboard_plots_latest_window_without_redrawing():
+    pygame.init()
+    screen = pygame.display.set_mode((800, 600))
+    dashboard = Dashboard(screen, 560, 240, 600)
+    rewards = [list(np.arange(250.0)), list(np.arange(250.0) * 2)]
+    collisions = [[0] * 250, [1] * 250]
+    penalties = [[0.0] * 250, [-1.0] * 250]
+    args = (10, 5.5, 2, "Fase", 2, [1, 0])
+    for _ in range(3):
+        dashboard.draw_dashboard(rewards, collisions, penalties, *args)
+    assert dashboard.plot.redraws == 1
+    assert dashboard.series[0].ring.values().tolist() == full_mean(rewards)[-DASHBOARD_WINDOW:]
+    rewards[0].append(1000.0)
+    rewards[1].append(1000.0)
+    dashboard.draw_dashboard(rewards, collisions, penalties, *args)
+    assert dashboard.plot.redraws == 2
+    assert dashboard.series[0].ring.values()[-1] == 1000.0
+    dashboard.draw_metrics_grid(rewards, collisions, None)
+    dashboard.draw_metrics([1.0, 2.0], [0.0, 1.0])
+
+
+def test_metrics_render_reuses_surface_and_exports_plot(tmp_path):
+    pygame.init()
+    screen = pygame.Surface((900, 300))
+    m = Metrics()
+    assert "fig" not in vars(m)
+    for i in range(20):
+        m.update(i, i % 2, checkpoint=i % 3)
+    m.render(screen, render_interval=1)
+    m.render(screen, render_interval=1)
+    assert m.plot.redraws == 1
+    m.update(20, 0, checkpoint=2)
+    m.render(screen, render_interval=1)
+    assert m.plot.redraws == 2
+    m.export_plot(str(tmp_path / "metrics.png"))
+    assert (tmp_path / "metrics.png").stat().st_size > 0
@@ -0,0 +1,62 @@
+import pytest
+from stable_baselines3 import DQN
+from environment import CorridaEnv
+from interface_agents import AgentInfo
+from race_manager import CompetitiveRaceManager
+from tournament import Entrant, RaceResult, run_races, iter_tournament, round_robin, tournament_table
+
+
+@pytest.fixture(scope="module")
+def entrants(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp("torneio")
+    env = CorridaEnv(map_type="corridor")
+    result = []
+    for seed in range(4):
+        path = str(tmp / f"agente{seed}.zip")
+        DQN("MlpPolicy", env, buffer_size=100, seed=seed, verbose=0).save(path)
+        result.append(Entrant(f"Agente{seed}", "DQN", path, {"accel": 0.5 + seed * 0.1, "turn_speed": 5.0, "max_speed": 20.0}))
+    return result
+
+
+def summary(result):
+    return result.agent_names, result.scores, result.checkpoints, result.times
+
+
+def test_run_races_is_reproducible_per_seed(entrants):
+    races = [entrants[:2], entrants[2:]]
+    first = run_races(races, max_steps=60, seed=7)
+    assert [r.agent_names for r in first] == [["Agente0", "Agente1"], ["Agente2", "Agente3"]]
+    assert [summary(r) for r in run_races(races, max_steps=60, seed=7)] == [summary(r) for r in first]
+
+
+def test_pool_streams_the_same_results_as_in_process(entrants):
+    local = {num: (pair, summary(r)) for num, pair, r in iter_tournament(entrants, 2, max_steps=40, n_workers=1,
+                                                                         races_per_task=3, seed=1)}
+    assert sorted(local) == list(range(1, len(round_robin(4, 2)) + 1))
+    pooled = {num: (pair, summary(r)) for num, pair, r in iter_tournament(entrants, 2, max_steps=40, n_workers=2,
+                                                                          races_per_task=3, seed=1)}
+    assert pooled == local
+
+
+def test_tournament_table_counts_wins_and_points():
+    results = [RaceResult(["A", "B"], [1.0, 2.0], [2, 1], [1.0, 1.0]),  # Checkpoints decidem antes do score
+               RaceResult(["A", "C"], [1.0, 2.0], [1, 1], [1.0, 1.0])]
+    table = tournament_table(["A", "B", "C", "D"], results)
+    assert list(table) == ["A", "C", "B", "D"]
+    assert table["A"] == {"vitorias": 1, "pontos": 4, "corridas": 2}
+    assert table["C"] == {"vitorias": 1, "pontos": 3, "corridas": 1}
+    assert table["B"] == {"vitorias": 0, "pontos": 1, "corridas": 1}
+    assert table["D"]["corridas"] == 0
+
+
+def test_competitive_manager_runs_round_robin(entrants):
+    manager = CompetitiveRaceManager()
+    manager.agents_data = [AgentInfo(e.nome, e.tipo, modelo_path=e.modelo_path, stats=e.stats) for e in entrants[:3]]
+    manager.agent_names = [a.nome for a in manager.agents_data]
+    manager.models = [object()] * 3
+    table, history = manager.run_tournament(races_per_pair=2, verbose=False, max_steps=30, n_workers=1, seed=3)
+    assert [race["race_num"] for race in history] == list(range(1, 7))
+    assert sum(row["corridas"] for row in table.values()) == 12
+    assert sum(row["vitorias"] for row in table.values()) == 6
+    assert all(race["vencedor"] in (race["agente1"], race["agente2"]) for race in history)
+    assert manager.run_race(max_steps=30, verbose=False, seed=3).agent_names == manager.agent_names
@@ -0,0 +1,62 @@
+import pytest
+import numpy as np
+from environment import CorridaEnv
+from batch_env import BatchCorridaEnv
+from track_raster import TrackRaster, get_track_raster
+
+
+@pytest.mark.parametrize("map_type", ["corridor", "curve", "circle"])
+def test_raster_matches_geometry_away_from_edges(map_type):
+    env = CorridaEnv(map_type=map_type, use_raster=True)
+    rng = np.random.default_rng(0)
+    xs = rng.uniform(-50, env.width + 50, size=20000)
+    ys = rng.uniform(-50, env.height + 50, size=20000)
+    exact = env.is_on_corridor_exact(xs, ys)
+    raster = env.is_on_corridor_batch(xs, ys)
+    sdf = env.track_raster.signed_distance(xs, ys)
+    # Só pode divergir a menos de uma célula (diagonal) da borda
+    far_from_edge = np.abs(sdf) > 1.5 * env.track_raster.cell_size
+    inside_map = (xs >= 0) & (xs < env.width) & (ys >= 0) & (ys < env.height)
+    assert np.array_equal(raster[far_from_edge & inside_map], exact[far_from_edge & inside_map])
+    for x, y, expected in zip(xs[:200], ys[:200], raster[:200]):
+        assert env.is_on_corridor([x, y]) == expected
+
+
+def test_raster_signed_distance_corridor():
+    env = CorridaEnv(map_type="corridor", use_raster=True)
+    sdf = env.track_raster.signed_distance(np.array([400.0, 150.0, 400.0]), np.array([300.0, 300.0, 100.0]))
+    assert sdf[0] == pytest.approx(100, abs=1.5)  # Centro: 100 px até as bordas de cima/baixo
+    assert sdf[1] == pytest.approx(50, abs=1.5)   # Largada: 50 px até a barreira esquerda
+    assert sdf[2] == pytest.approx(-100, abs=1.5)  # Fora da pista, 100 px acima do corredor
+
+
+def test_raster_is_cached_and_read_only():
+    a = CorridaEnv(map_type="curve", use_raster=True)
+    b = CorridaEnv(map_type="curve", use_raster=True)
+    assert a.track_raster is b.track_raster
+    assert get_track_raster(a, 2.0) is not a.track_raster
+    with pytest.raises(ValueError):
+        a.track_raster.occupancy[0, 0] = True
+    assert CorridaEnv(map_type="curve", use_raster=False).track_raster is None
+
+
+def test_raster_resolution():
+    env = CorridaEnv(map_type="corridor")
+    raster = TrackRaster(env, cell_size=4.0)
+    assert raster.occupancy.shape == (150, 200)
+    assert raster.lookup(np.array([[150.0]]), np.array([[300.0]])).shape == (1, 1)
+
+
+@pytest.mark.parametrize("lidar_mode", ["march", "exact"])
+def test_envs_run_with_raster(lidar_mode):
+    env = CorridaEnv(map_type="circle", use_raster=True, lidar_mode=lidar_mode)
+    env.reset()
+    for _ in range(20):
+        obs, reward, done, _, info = env.step(0)
+        if done:
+            env.reset()
+    batch = BatchCorridaEnv(4, map_type="curve", use_raster=True, lidar_mode=lidar_mode)
+    batch.reset()
+    for _ in range(20):
+        obs, rewards, dones, infos = batch.step(np.zeros(4, dtype=int))
+    assert obs.shape == (4, 15)
@@ -0,0 +1,205 @@
+"""Motor de torneios do Corrida DRL: corridas headless em lote num pool de processos.
+
+Um torneio round-robin (todos os pares de agentes × races_per_pair) é quebrado em
+tarefas de TOURNAMENT_RACES_PER_TASK corridas. Cada tarefa roda todas as suas
+corridas ao mesmo tempo num único BatchCorridaEnv (um carro por participante), com
+um predict em lote por modelo distinto a cada passo. As tarefas são distribuídas num
+pool de processos; cada worker carrega os modelos no seu ModelCache ao iniciar e o
+mantém quente entre tarefas. iter_tournament devolve os resultados à medida que as
+tarefas terminam e tournament_table os agrega em vitórias e pontos.
+"""
+import multiprocessing as mp
+from collections import namedtuple
+import numpy as np
+from batch_env import BatchCorridaEnv
+from config import TOURNAMENT_RACES_PER_TASK, TOURNAMENT_POINTS
+from logger import setup_logger
+from model_cache import get_model_cache
+from shm_vec_env import available_cores
+
+logger = setup_logger()
+
+# Participante de uma corrida (só dados picklable: o modelo é resolvido no processo que corre)
+Entrant = namedtuple("Entrant", ["nome", "tipo", "modelo_path", "stats"])
+
+
+class RaceResult:
+    """Resultado de uma corrida entre múltiplos agentes."""
+    def __init__(self, agent_names, scores, checkpoints, times):
+        self.agent_names = agent_names
+        self.scores = scores
+        self.checkpoints = checkpoints
+        self.times = times
+
+        # Calcula ranking
+        self.ranking = sorted(
+            enumerate(self.agent_names),
+            key=lambda x: (self.checkpoints[x[0]], self.scores[x[0]]),
+            reverse=True
+        )
+
+    def get_winner(self):
+        """Retorna o nome do agente vencedor."""
+        idx = self.ranking[0][0]
+        return self.agent_names[idx]
+
+    def get_stats(self, agent_idx):
+        """Retorna stats de um agente específico."""
+        return {
+            "nome": self.agent_names[agent_idx],
+            "score": self.scores[agent_idx],
+            "checkpoints": self.checkpoints[agent_idx],
+            "tempo": self.times[agent_idx],
+            "posicao": next(i+1 for i, (idx, _) in enumerate(self.ranking) if idx == agent_idx)
+        }
+
+
+def _load_model(cache, entrant):
+    try:
+        return cache.get(entrant.modelo_path, entrant.tipo)
+    except Exception as e:
+        logger.warning(f"[Torneio] Falha ao carregar {entrant.nome}: {e}")
+        return None
+
+
+def run_races(races, map_type="corridor", max_steps=500, seed=None):
+    """Corre várias corridas ao mesmo tempo, sem render, num único BatchCorridaEnv.
+
+    Cada carro corre até terminar o episódio (ou até max_steps); carros de corridas
+    diferentes não interagem, assim como em CompetitiveRaceManager.run_race.
+
+    Args:
+        races (list): Corridas; cada uma é uma lista de Entrant.
+        map_type (str): Tipo de mapa.
+        max_steps (int): Máximo de passos por corrida.
+        seed (int): Seed do ambiente (None = aleatório).
+    Returns:
+        list: Um RaceResult por corrida, na ordem de races.
+    """
+    entrants = [entrant for race in races for entrant in race]
+    env = BatchCorridaEnv(len(entrants), map_type=map_type, car_stats=[e.stats for e in entrants])
+    if seed is not None:
+        env.seed(seed)
+    obs = env.reset()
+
+    # Carros agrupados por modelo: um predict em lote por modelo distinto a cada passo
+    cache = get_model_cache()
+    groups = {}
+    for car, entrant in enumerate(entrants):
+        model = _load_model(cache, entrant)
+        if model is not None:
+            groups.setdefault(id(model), (model, []))[1].append(car)
+    groups = [(model, np.array(cars)) for model, cars in groups.values()]
+
+    n = len(entrants)
+    scores = np.zeros(n, dtype=np.float64)
+    checkpoints = np.zeros(n, dtype=np.int64)
+    times = np.zeros(n, dtype=np.float64)
+    finished = np.zeros(n, dtype=bool)
+    actions = np.zeros(n, dtype=np.int64)  # Ação padrão se o modelo não carregou
+    for _ in range(max_steps):
+        for model, cars in groups:
+            cars = cars[~finished[cars]]
+            if len(cars):
+                group_actions, _ = model.predict(obs[cars], deterministic=True)
+                actions[cars] = np.asarray(group_actions).reshape(len(cars), -1)[:, 0]
+        obs, rewards, dones, infos = env.step(actions)
+        # Carros que já terminaram seguem no lote (reset automático), mas não contam mais
+        for car in np.flatnonzero(~finished):
+            checkpoints[car] = infos[car]["checkpoint"]
+            times[car] = infos[car]["episode_time"]
+        scores[~finished] += rewards[~finished]
+        finished |= dones
+        if finished.all():
+            break
+    env.close()
+
+    results = []
+    start = 0
+    for race in races:
+        stop = start + len(race)
+        results.append(RaceResult([e.nome for e in race], scores[start:stop].tolist(),
+                                  checkpoints[start:stop].tolist(), times[start:stop].tolist()))
+        start = stop
+    return results
+
+
+def round_robin(n_agents, races_per_pair=1):
+    """Pares (i, j), i < j, de um round-robin, cada um repetido races_per_pair vezes."""
+    return [(i, j) for i in range(n_agents) for j in range(i + 1, n_agents) for _ in range(races_per_pair)]
+
+
+def _init_worker(entrants):
+    # Aquece o ModelCache do worker: cada modelo é lido do disco uma vez por processo
+    cache = get_model_cache()
+    for entrant in entrants:
+        _load_model(cache, entrant)
+
+
+def _run_task(task):
+    race_nums, pairs, races, map_type, max_steps, seed = task
+    return list(zip(race_nums, pairs, run_races(races, map_type, max_steps, seed)))
+
+
+def iter_tournament(entrants, races_per_pair=1, map_type="corridor", max_steps=500, n_workers=None,
+                    races_per_task=TOURNAMENT_RACES_PER_TASK, seed=None, start_method=None):
+    """Roda um round-robin e devolve cada corrida assim que a tarefa dela termina.
+
+    Args:
+        entrants (list): Participantes (Entrant).
+        races_per_pair (int): Corridas por par de agentes.
+        map_type (str): Tipo de mapa.
+        max_steps (int): Máximo de passos por corrida.
+        n_workers (int): Processos do pool. Se None, um por núcleo (limitado ao número de
+            tarefas); com 1 as corridas rodam no próprio processo.
+        races_per_task (int): Corridas simuladas juntas em cada tarefa.
+        seed (int): Seed base (a tarefa k usa seed + k); None = aleatório.
+        start_method (str): Método do multiprocessing. Se None, usa 'forkserver' quando
+            disponível, senão 'spawn'.
+    Yields:
+        tuple: (race_num, (i, j), RaceResult), com race_num começando em 1; a ordem é a
+        de término das tarefas.
+    """
+    pairs = round_robin(len(entrants), races_per_pair)
+    tasks = []
+    for k, start in enumerate(range(0, len(pairs), races_per_task)):
+        chunk = pairs[start:start + races_per_task]
+        tasks.append((list(range(start + 1, start + len(chunk) + 1)), chunk,
+                      [[entrants[i], entrants[j]] for i, j in chunk],
+                      map_type, max_steps, None if seed is None else seed + k))
+    if not tasks:
+        return
+    n_workers = min(n_workers or available_cores(), len(tasks))
+    if n_workers == 1:
+        _init_worker(entrants)
+        for task in tasks:
+            yield from _run_task(task)
+        return
+
+    if start_method is None:
+        start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+    ctx = mp.get_context(start_method)
+    if start_method == "forkserver":
+        ctx.set_forkserver_preload([__name__])  # Workers nascem com torch/SB3 já importados
+    with ctx.Pool(n_workers, initializer=_init_worker, initargs=(entrants,)) as pool:
+        for results in pool.imap_unordered(_run_task, tasks):
+            yield from results
+
+
+def tournament_table(names, results):
+    """Tabela de vitórias e pontos (TOURNAMENT_POINTS por posição de chegada).
+
+    Args:
+        names (list): Nomes de todos os participantes.
+        results (iterable): RaceResult das corridas.
+    Returns:
+        dict: nome -> {"vitorias", "pontos", "corridas"}, ordenado por pontos e vitórias.
+    """
+    table = {name: {"vitorias": 0, "pontos": 0, "corridas": 0} for name in names}
+    for result in results:
+        for position, (_, name) in enumerate(result.ranking):
+            table[name]["corridas"] += 1
+            if position < len(TOURNAMENT_POINTS):
+                table[name]["pontos"] += TOURNAMENT_POINTS[position]
+        table[result.get_winner()]["vitorias"] += 1
+    return dict(sorted(table.items(), key=lambda item: (item[1]["pontos"], item[1]["vitorias"]), reverse=True))
@@ -0,0 +1,124 @@
+"""Raster pré-computado de ocupação e distância com sinal (SDF) para cada mapa.
+
+A geometria de um mapa (barreiras, corridor_rect, anel do círculo) é compilada uma
+única vez em uma grade; as consultas passam a ser indexação O(1) em arrays, inclusive
+para lotes de pontos. Os rasters ficam em cache por geometria e resolução e são
+compartilhados (somente leitura) entre todas as instâncias de ambiente.
+"""
+import numpy as np
+from scipy import ndimage
+
+_RASTER_CACHE = {}
+
+
+class TrackRaster:
+    """Grade de ocupação + SDF de um mapa.
+
+    Attributes:
+        cell_size (float): Tamanho de cada célula em pixels.
+        occupancy (np.ndarray): bool [rows, cols], True onde a célula está na pista.
+        sdf (np.ndarray): float32 [rows, cols], distância (px) até a borda da pista;
+            positiva dentro da pista e negativa fora.
+    """
+    def __init__(self, track, cell_size=1.0):
+        """Compila a geometria do ambiente em raster.
+
+        Args:
+            track (CorridaEnv): Ambiente com a geometria do mapa.
+            cell_size (float): Tamanho da célula em pixels (resolução).
+        """
+        self.cell_size = float(cell_size)
+        self.inv_cell = 1.0 / self.cell_size
+        self.cols = int(np.ceil(track.width / self.cell_size))
+        self.rows = int(np.ceil(track.height / self.cell_size))
+        centers_x = (np.arange(self.cols) + 0.5) * self.cell_size
+        centers_y = (np.arange(self.rows) + 0.5) * self.cell_size
+        occupancy = track.is_on_corridor_exact(centers_x[None, :], centers_y[:, None])
+        inside = ndimage.distance_transform_edt(occupancy)
+        outside = ndimage.distance_transform_edt(~occupancy)
+        sdf = ((inside - outside) * self.cell_size).astype(np.float32)
+        occupancy.setflags(write=False)
+        sdf.setflags(write=False)
+        self.occupancy = occupancy
+        self.sdf = sdf
+        # Visões achatadas para indexação linear e bytes para consultas escalares sem NumPy
+        self._occupancy_flat = occupancy.ravel()
+        self._sdf_flat = sdf.ravel()
+        self._occupancy_bytes = occupancy.tobytes()
+
+    def _flat_cells(self, xs, ys):
+        """Índice linear das células; pontos fora do mapa usam a célula da borda."""
+        cols = (np.asarray(xs) * self.inv_cell).astype(np.int32)
+        rows = (np.asarray(ys) * self.inv_cell).astype(np.int32)
+        np.clip(cols, 0, self.cols - 1, out=cols)
+        np.clip(rows, 0, self.rows - 1, out=rows)
+        rows *= self.cols
+        rows += cols
+        return rows
+
+    def contains(self, x, y):
+        """Versão escalar de lookup para um único ponto.
+
+        Returns:
+            bool: True se o ponto está na pista.
+        """
+        col = min(max(int(x * self.inv_cell), 0), self.cols - 1)
+        row = min(max(int(y * self.inv_cell), 0), self.rows - 1)
+        return self._occupancy_bytes[row * self.cols + col] == 1
+
+    def lookup(self, xs, ys):
+        """Ocupação de um lote de pontos.
+
+        Args:
+            xs (np.ndarray): Coordenadas x (qualquer formato).
+            ys (np.ndarray): Coordenadas y (mesmo formato de xs).
+        Returns:
+            np.ndarray: Máscara booleana, True onde o ponto está na pista.
+        """
+        return self._occupancy_flat.take(self._flat_cells(xs, ys))
+
+    def signed_distance(self, xs, ys):
+        """Distância com sinal (px) até a borda da pista para um lote de pontos.
+
+        Returns:
+            np.ndarray: Positiva dentro da pista, negativa fora.
+        """
+        return self._sdf_flat.take(self._flat_cells(xs, ys))
+
+
+def _geometry_key(track, cell_size):
+    """Chave de cache: tudo que define a forma da pista, mais a resolução."""
+    circle = None
+    if track.map_type == "circle":
+        circle = (tuple(track.circle_center), track.circle_r_in, track.circle_r_out)
+    return (
+        track.map_type,
+        track.width,
+        track.height,
+        tuple(tuple(b) for b in track.barriers),
+        tuple(track.corridor_rect) if track.corridor_rect else None,
+        circle,
+        float(cell_size),
+    )
+
+
+def get_track_raster(track, cell_size=1.0):
+    """Retorna o raster (em cache) da geometria atual do ambiente.
+
+    Args:
+        track (CorridaEnv): Ambiente com a geometria do mapa.
+        cell_size (float): Tamanho da célula em pixels.
+    Returns:
+        TrackRaster: Raster compartilhado entre ambientes com a mesma geometria.
+    """
+    key = _geometry_key(track, cell_size)
+    raster = _RASTER_CACHE.get(key)
+    if raster is None:
+        raster = TrackRaster(track, cell_size)
+        _RASTER_CACHE[key] = raster
+    return raster
+
+
+def clear_raster_cache():
+    """Esvazia o cache de rasters (útil em testes ou ao editar mapas)."""
+    _RASTER_CACHE.clear()